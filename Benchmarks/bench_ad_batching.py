@@ -0,0 +1,64 @@
+"""
+Compares per-ad and batched ad creation against the local proxy stand-in, counting
+requests and request body bytes.
+
+Run from the repository root:
+    python -m Benchmarks.bench_ad_batching
+"""
+import asyncio
+import random
+import time
+from unittest.mock import AsyncMock
+import Helpers.helperClasses as helperClasses
+from Tests.ads_proxy_stub import AdsProxyStub
+
+AD_COUNTS = (10, 50)
+BATCH_SIZES = (0, 10, 25)
+# Roughly the size of a real OAuth client credentials blob
+CREDENTIALS = {
+    "refresh_token": "1//" + "r" * 100,
+    "token_uri": "https://oauth2.googleapis.com/token",
+    "client_id": "c" * 72 + ".apps.googleusercontent.com",
+    "client_secret": "s" * 35,
+    "developer_token": "d" * 22,
+    "scopes": ["https://www.googleapis.com/auth/adwords"]
+}
+
+def make_ads(count):
+    # Distinct wording per ad so none are dropped as near-duplicates before sending
+    rng = random.Random(count)
+    words = [f"word{i}" for i in range(2000)]
+    return [
+        {
+            "headlines": [" ".join(rng.sample(words, 3)) for _ in range(4)],
+            "descriptions": [" ".join(rng.sample(words, 8)) for _ in range(2)],
+            "keywords": [" ".join(rng.sample(words, 2)) for _ in range(2)]
+        }
+        for _ in range(count)
+    ]
+
+async def run(ad_count, batch_size):
+    stub = await AdsProxyStub().start()
+    helperClasses.GOOGLE_ADS_API_URL = stub.url
+    helperClasses.ADS_BATCH_SIZE = batch_size
+    view = helperClasses.ConfirmSelectedAdsView(make_ads(ad_count), "1234567890", CREDENTIALS, "Spring Campaign", "https://example.com")
+    interaction = AsyncMock()
+    interaction.client.job_queue = None
+    interaction.client.idempotency_ledger = None
+    started = time.perf_counter()
+    await view.create_ads(interaction)
+    elapsed = time.perf_counter() - started
+    await stub.stop()
+    return stub.requests, stub.bytes_received, elapsed
+
+def main():
+    # create_ad_request logs every payload; keep the benchmark output readable
+    helperClasses.print = lambda *args, **kwargs: None
+    for ad_count in AD_COUNTS:
+        for batch_size in BATCH_SIZES:
+            requests, sent_bytes, elapsed = asyncio.run(run(ad_count, batch_size))
+            mode = f"batch {batch_size:2d}" if batch_size > 1 else "per-ad  "
+            print(f"{ad_count:3d} ads, {mode}: {requests:3d} requests, {sent_bytes:7d} bytes, {elapsed * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Times an autocomplete answer from the in-memory prefix index against a linear substring scan
+over the same list, and an incremental refresh against a full rebuild.
+
+Run from the repository root:
+    python -m Benchmarks.bench_autocomplete
+"""
+import random
+import timeit
+import Helpers.autocomplete as autocomplete
+from Helpers.prefix_index import PrefixIndex
+
+SIZES = (100, 1_000, 10_000, 50_000)
+QUERIES = ("pyth", "online cou", "b", "course 42", "b w", "1234", "zzz")
+WORDS = ["python", "course", "online", "learn", "coding", "bootcamp", "beginner", "data", "science", "web",
+         "developer", "free", "certificate", "remote", "job", "career", "tutorial", "class", "near", "me"]
+
+def make_keywords(count, rng):
+    return [f"{' '.join(rng.sample(WORDS, 3))} {i}" for i in range(count)]
+
+def linear(keywords, query):
+    query = query.lower()
+    return sorted(k for k in keywords if query in k.lower())[:autocomplete.AUTOCOMPLETE_LIMIT]
+
+def main():
+    rng = random.Random(5)
+    for size in SIZES:
+        autocomplete.clear_autocomplete_cache()
+        keywords = make_keywords(size, rng)
+        autocomplete.remember_business(1, "Bench")
+        rebuild = timeit.timeit(lambda: PrefixIndex((k, k) for k in keywords), number=1)
+        autocomplete.set_items("Bench", 'keywords', keywords)
+
+        changed = keywords[:-10] + make_keywords(10, rng)
+        incremental = timeit.timeit(lambda: autocomplete.set_items("Bench", 'keywords', changed), number=1)
+
+        scan = sum(timeit.timeit(lambda q=q: linear(keywords, q), number=20) / 20 for q in QUERIES) / len(QUERIES)
+        indexed = sum(timeit.timeit(lambda q=q: autocomplete.suggest(1, 'keywords', q), number=20) / 20 for q in QUERIES) / len(QUERIES)
+        print(f"{size:6d} keywords: suggest {indexed * 1e3:6.2f} ms indexed, {scan * 1e3:7.2f} ms linear; "
+              f"refresh 10 changes {incremental * 1e3:6.2f} ms, full rebuild {rebuild * 1e3:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Times campaign lookup by id and name search as the number of campaigns grows, against the
+linear next(...) scan the picker used before.
+
+Run from the repository root:
+    python -m Benchmarks.bench_campaign_index
+"""
+import random
+import timeit
+from Helpers.campaign_index import CampaignIndex
+
+SIZES = (100, 1_000, 10_000, 100_000)
+LOOKUPS = 1_000
+WORDS = ["spring", "summer", "autumn", "winter", "sale", "brand", "search", "display", "retarget", "launch"]
+
+def make_response(count, rng):
+    accounts = max(1, count // 50)
+    return {
+        f"acct{a}": {
+            "Account Name": f"Client {a}",
+            "Campaigns": [
+                {"Campaign Name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {c}", "Campaign ID": a * 100_000 + c, "Budget": 25.0}
+                for c in range(count // accounts)
+            ]
+        }
+        for a in range(accounts)
+    }
+
+def main():
+    rng = random.Random(3)
+    for size in SIZES:
+        index = CampaignIndex.from_response(make_response(size, rng))
+        all_campaigns = index.campaigns
+        ids = [str(rng.choice(all_campaigns)['id']) for _ in range(LOOKUPS)]
+
+        linear = timeit.timeit(lambda: [next((c for c in all_campaigns if str(c['id']) == i), None) for i in ids], number=1)
+        indexed = timeit.timeit(lambda: [index.get(i) for i in ids], number=1)
+        search = timeit.timeit(lambda: index.search("client 1 spr", limit=25), number=100) / 100
+        print(f"{len(index):7d} campaigns: id lookup {linear / LOOKUPS * 1e6:9.1f} us linear, "
+              f"{indexed / LOOKUPS * 1e6:5.2f} us indexed; prefix search {search * 1e3:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares gateway cache memory for the "full" and "lean" runtime profiles at 1k guilds.
+
+Each profile runs in its own process. GUILD_CREATE payloads, each carrying the members that
+member chunking would deliver, go through discord.py's own state parsers, followed by a burst of
+channel messages. The report shows resident memory growth and the bytes tracemalloc attributes
+to the cache.
+
+Run from the repository root:
+    python -m Benchmarks.bench_gateway_memory
+"""
+import gc
+import subprocess
+import sys
+import tracemalloc
+import discord
+from Helpers.gateway_profile import client_options, PROFILE_FULL, PROFILE_LEAN
+
+GUILD_COUNT = 1_000
+MEMBERS_PER_GUILD = 50
+CHANNELS_PER_GUILD = 5
+MESSAGES_PER_GUILD = 5
+BOT_ID = 1
+
+def user_payload(user_id):
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+def guild_payload(guild_id):
+    owner_id = guild_id * 1000
+    members = [
+        {"user": user_payload(owner_id + offset), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+        for offset in range(MEMBERS_PER_GUILD)
+    ]
+    members.append({"user": user_payload(BOT_ID), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0})
+    return {
+        "id": str(guild_id), "name": f"guild {guild_id}", "owner_id": str(owner_id), "icon": None,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [
+            {"id": str(guild_id * 100 + index), "type": 0, "name": f"channel-{index}", "position": index, "permission_overwrites": []}
+            for index in range(CHANNELS_PER_GUILD)
+        ],
+        "members": members, "member_count": len(members), "emojis": [], "stickers": [], "features": [],
+        "voice_states": [], "presences": [], "threads": [], "stage_instances": [], "guild_scheduled_events": [],
+    }
+
+def message_payload(guild_id, index):
+    return {
+        "id": str(guild_id * 10_000 + index), "channel_id": str(guild_id * 100), "guild_id": str(guild_id),
+        "author": user_payload(guild_id * 1000 + index), "content": f"message {index} " * 10,
+        "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False, "mention_everyone": False,
+        "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+    }
+
+def resident_kib():
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * 4
+
+def run_profile(profile):
+    options = client_options(profile)
+    client = discord.Client(**options)
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=user_payload(BOT_ID))
+    gc.collect()
+    rss_before = resident_kib()
+    tracemalloc.start()
+    for guild_id in range(2, GUILD_COUNT + 2):
+        state._add_guild_from_data(guild_payload(guild_id))
+        for index in range(MESSAGES_PER_GUILD):
+            state.parse_message_create(message_payload(guild_id, index))
+    gc.collect()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    members = sum(len(guild._members) for guild in state._guilds.values())
+    print(f"{profile} {resident_kib() - rss_before} {traced} {members} {len(state._messages or ())}")
+
+def main():
+    if len(sys.argv) > 1:
+        run_profile(sys.argv[1])
+        return
+    results = {}
+    for profile in (PROFILE_FULL, PROFILE_LEAN):
+        output = subprocess.run([sys.executable, "-m", "Benchmarks.bench_gateway_memory", profile], capture_output=True, text=True, check=True)
+        _, rss, traced, members, messages = output.stdout.split()
+        results[profile] = int(traced)
+        print(f"{profile:>5}: {int(rss) / 1024:6.1f} MiB resident, {int(traced) / 2**20:6.1f} MiB traced, "
+              f"{members} members and {messages} messages cached for {GUILD_COUNT} guilds")
+    print(f"reduction: {results[PROFILE_FULL] / results[PROFILE_LEAN]:.1f}x less cache memory")
+
+if __name__ == "__main__":
+    main()
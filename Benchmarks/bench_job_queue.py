@@ -0,0 +1,43 @@
+"""
+Measures job queue throughput as the worker count grows.
+
+Each job waits 50 ms, standing in for a remote Google Ads call, against an in-memory
+MongoDB collection.
+
+Run from the repository root:
+    python -m Benchmarks.bench_job_queue
+"""
+import asyncio
+import time
+from mongomock import MongoClient
+import Helpers.job_queue as job_queue
+
+JOBS = 80
+JOB_SECONDS = 0.05
+WORKER_COUNTS = (1, 2, 4, 8, 16)
+
+@job_queue.job_handler('bench_sleep')
+async def sleep_job(context):
+    await asyncio.sleep(JOB_SECONDS)
+    return "done"
+
+async def run(concurrency):
+    collection = MongoClient().db.jobs
+    queue = job_queue.JobQueue(collection, concurrency=concurrency, poll_interval=0.01)
+    for i in range(JOBS):
+        queue.enqueue('bench_sleep', {'index': i})
+    started = time.perf_counter()
+    queue.start()
+    while collection.count_documents({'state': job_queue.JOB_SUCCEEDED}) < JOBS:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+    return elapsed
+
+def main():
+    for concurrency in WORKER_COUNTS:
+        elapsed = asyncio.run(run(concurrency))
+        print(f"{concurrency:3d} workers: {JOBS} jobs in {elapsed:6.2f} s, {JOBS / elapsed:7.1f} jobs/s")
+
+if __name__ == "__main__":
+    main()
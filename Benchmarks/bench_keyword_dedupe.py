@@ -0,0 +1,38 @@
+"""
+Times near-duplicate keyword clustering on a synthetic research run.
+
+A quarter of the keywords are plural, reordered or re-cased variants of another keyword.
+
+Run from the repository root:
+    python -m Benchmarks.bench_keyword_dedupe
+"""
+import random
+import time
+from Helpers.keyword_table import KeywordTable
+from Helpers.keyword_dedupe import find_keyword_clusters
+
+SIZES = (10_000, 30_000, 50_000)
+VOCABULARY = [f"term{i}" for i in range(4000)]
+
+def make_keywords(count, rng):
+    keywords = []
+    while len(keywords) < count:
+        words = rng.sample(VOCABULARY, rng.randint(2, 5))
+        keywords.append(" ".join(words))
+        if rng.random() < 0.25:
+            variant = [word + "s" if rng.random() < 0.5 else word for word in words]
+            rng.shuffle(variant)
+            keywords.append(" ".join(variant).upper() if rng.random() < 0.3 else " ".join(variant))
+    return [{"text": text, "avg_monthly_searches": rng.randint(0, 5000)} for text in keywords[:count]]
+
+def main():
+    rng = random.Random(5)
+    for size in SIZES:
+        table, _ = KeywordTable.from_keywords(make_keywords(size, rng))
+        started = time.perf_counter()
+        clusters = find_keyword_clusters(table)
+        elapsed = time.perf_counter() - started
+        print(f"{size:6d} keywords: {elapsed * 1000:7.1f} ms, {len(clusters.representatives)} clusters, {clusters.duplicate_count()} duplicates merged")
+
+if __name__ == "__main__":
+    main()
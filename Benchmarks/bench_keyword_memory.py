@@ -0,0 +1,69 @@
+"""
+Measures the keyword state an open /keywords view keeps alive for a 10k-keyword business.
+
+"dict rows" reproduces the layout the view used to hold (normalized per-keyword dicts for
+both categories plus a selected_keywords_dict keyed by text). "columnar" is the
+KeywordTable the view holds now. Keywords come from a fresh JSON decode, as they would
+from Mongo, so neither layout shares string objects with the input.
+
+Run from the repository root:
+    python -m Benchmarks.bench_keyword_memory
+"""
+import gc
+import json
+import random
+import tracemalloc
+from Helpers.keyword_table import KeywordTable
+
+KEYWORD_COUNT = 10_000
+SELECTED_COUNT = 2_000
+
+def make_document():
+    rng = random.Random(7)
+    keywords = [
+        {
+            "text": f"keyword {i} {rng.choice(['software', 'course', 'bootcamp', 'jobs'])}",
+            "avg_monthly_searches": rng.choice([rng.randint(10, 100_000), "N/A"]),
+            "competition": rng.choice(["LOW", "MEDIUM", "HIGH", "N/A"])
+        }
+        for i in range(KEYWORD_COUNT)
+    ]
+    selected = [dict(kw) for kw in keywords[:SELECTED_COUNT]]
+    return json.dumps({"keywords": keywords, "selected_keywords": selected})
+
+def dict_rows_state(document):
+    selected_keywords = [kw for kw in document["selected_keywords"]]
+    new_keywords = [kw for kw in document["keywords"]]
+    selected_keywords_dict = {kw["text"]: kw for kw in selected_keywords}
+    return selected_keywords, new_keywords, selected_keywords_dict
+
+def columnar_state(document):
+    table, rows = KeywordTable.from_keywords(document["selected_keywords"], document["keywords"])
+    for row in rows[0]:
+        table.set_selected(row, True)
+    return table, rows
+
+def measure(build, payload):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    document = json.loads(payload)
+    state = build(document)
+    # Drop the decoded document so only what the view keeps is counted
+    del document
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return state, retained
+
+def main():
+    payload = make_document()
+    results = {}
+    for name, build in (("dict rows", dict_rows_state), ("columnar", columnar_state)):
+        _, retained = measure(build, payload)
+        results[name] = retained
+        print(f"{name:>9}: {retained / 1024:8.1f} KiB retained for {KEYWORD_COUNT} keywords")
+    print(f"reduction: {results['dict rows'] / results['columnar']:.1f}x less memory per view")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares a /keywords review session in toggle mode against bulk select mode.
+
+Each simulated session walks every page of the "new" keywords and selects the keywords
+picked by a scenario (every other keyword, or all of them). Every callback that answers
+Discord counts as one interaction round trip.
+
+Run from the repository root:
+    python -m Benchmarks.bench_keyword_selection
+"""
+import asyncio
+import time
+from mongomock import MongoClient
+from Helpers.helperClasses import KeywordPaginationView
+
+KEYWORD_COUNT = 200
+
+class FakeResponse:
+    def __init__(self):
+        self.calls = 0
+
+    async def edit_message(self, **kwargs):
+        self.calls += 1
+
+class FakeInteraction:
+    def __init__(self, response, custom_id=""):
+        self.response = response
+        self.data = {"custom_id": custom_id}
+
+def make_view(keywords):
+    collection = MongoClient().judge_data.bench_business
+    view = KeywordPaginationView([], keywords, collection, "Available Keywords", "N/A")
+    view.current_keyword_type = "new"
+    return view
+
+SCENARIOS = {
+    "every other keyword": lambda i: i % 2 == 0,
+    "all keywords": lambda i: True,
+}
+
+async def toggle_session(keywords, wanted):
+    view = make_view(keywords)
+    response = FakeResponse()
+    while True:
+        start, end = view.page_bounds()
+        for i in range(start, end):
+            if wanted(i):
+                await view.interaction_check(FakeInteraction(response, f"toggle_{i}"))
+        if view.current_page >= view.last_page():
+            break
+        await view.next_callback(FakeInteraction(response))
+    return view, response.calls
+
+async def bulk_session(keywords, wanted):
+    view = make_view(keywords)
+    response = FakeResponse()
+    await view.mode_callback(FakeInteraction(response))
+    if all(wanted(i) for i in range(len(keywords))):
+        await view.select_all_callback(FakeInteraction(response))
+        return view, response.calls
+    while True:
+        start, end = view.page_bounds()
+        view.bulk_select._values = [str(i) for i in range(start, end) if wanted(i)]
+        await view.bulk_select_callback(FakeInteraction(response, "bulk_select"))
+        if view.current_page >= view.last_page():
+            break
+        await view.next_callback(FakeInteraction(response))
+    return view, response.calls
+
+async def main():
+    keywords = [{"text": f"keyword {i}", "avg_monthly_searches": i * 10, "competition": "LOW"} for i in range(KEYWORD_COUNT)]
+    for scenario, wanted in SCENARIOS.items():
+        print(f"{KEYWORD_COUNT} keywords, selecting {scenario}:")
+        results = {}
+        for name, session in (("toggle", toggle_session), ("bulk", bulk_session)):
+            started = time.perf_counter()
+            view, calls = await session(keywords, wanted)
+            elapsed = time.perf_counter() - started
+            results[name] = calls
+            print(f"  {name:>6}: {calls:4d} interactions, {view.table.selected_count()} selected, {elapsed * 1000:.1f} ms local view work")
+        print(f"  reduction: {results['toggle'] / results['bulk']:.1f}x fewer interactions")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+Times /search queries against a warm per-business index, the cold build, and an incremental
+update after a write, for businesses of growing size.
+
+Run from the repository root:
+    python -m Benchmarks.bench_search_index
+"""
+import random
+import timeit
+from Helpers.search_index import SearchIndex
+
+SIZES = (100, 1_000, 10_000)
+QUERIES = ("w0 w7", "w3 w150 w900", "w25 w40 w60 w80", "w1999", "zzz")
+# Word frequencies in real text fall off roughly as 1/rank, so a few words are in most items
+WORDS = [f"w{i}" for i in range(2_000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+def sentence(rng, length):
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=length))
+
+def make_business(items, rng):
+    return {
+        'business': "\n\n".join(sentence(rng, 40) for _ in range(10)),
+        'user_personas': [{"title": sentence(rng, 3), "motivation": sentence(rng, 20)} for _ in range(items // 20 + 1)],
+        'list_of_paths_taken': [sentence(rng, 12) for _ in range(items // 5)],
+        'keywords': [sentence(rng, 3) for _ in range(items)],
+        'ad_variations': [{"headlines": [sentence(rng, 4)] * 3, "descriptions": [sentence(rng, 12)] * 2} for _ in range(items // 10)],
+        'finalized_ad_text': [{"headline": sentence(rng, 4), "description": sentence(rng, 12)} for _ in range(items // 20)],
+    }
+
+def build(business):
+    index = SearchIndex()
+    for source, value in business.items():
+        index.set_source(source, value)
+    return index
+
+def main():
+    rng = random.Random(11)
+    for size in SIZES:
+        business = make_business(size, rng)
+        cold = timeit.timeit(lambda: build(business), number=1)
+        index = build(business)
+        warm = sum(timeit.timeit(lambda q=q: index.search(q), number=50) / 50 for q in QUERIES) / len(QUERIES)
+        paths = business['list_of_paths_taken'] + [sentence(rng, 12)]
+        update = timeit.timeit(lambda: index.set_source('list_of_paths_taken', paths), number=1)
+        print(f"{len(index):6d} items: search {warm * 1e3:6.3f} ms warm, build {cold * 1e3:7.1f} ms cold, "
+              f"add one path {update * 1e3:6.3f} ms")
+
+if __name__ == "__main__":
+    main()
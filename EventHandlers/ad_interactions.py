@@ -1,3 +1,4 @@
+import asyncio
 import os
 import json
 import aiohttp
@@ -7,17 +8,23 @@ import discord
 from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
 import Helpers.helperfuncs as helperfuncs
 import Helpers.helperClasses as helperClasses
+import Helpers.autocomplete as autocomplete
+import Helpers.ad_text_store as ad_text_store
+import Helpers.dashboard as dashboard
+import Helpers.job_queue as job_queue
+import Helpers.worker_pool as worker_pool
+import Helpers.metrics as metrics
 
 logger = logging.getLogger(__name__)
 
-async def handle_keywords(interaction: Interaction, check_onboarded_status):
+async def handle_keywords(interaction: Interaction, check_onboarded_status, keyword=None):
     await interaction.response.defer(ephemeral=True)
     
     try:
         user_id = interaction.user.id
         logger.info(f"Keywords command initiated by user {user_id}")
         
-        is_onboarded = await check_onboarded_status(user_id)
+        is_onboarded, user_record = await dashboard.business_record(interaction, check_onboarded_status)
         logger.info(f"User onboarded status: {is_onboarded}")
         
         if not is_onboarded:
@@ -29,15 +36,17 @@ async def handle_keywords(interaction: Interaction, check_onboarded_status):
             return
 
         CONNECTION_STRING = os.getenv("CONNECTION_STRING")
-        mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
-        user_record = mappings_collection.find_one({"owner_ids": user_id})
         
         if not user_record or "business_name" not in user_record:
             await interaction.followup.send("Unable to find your business name. Please make sure you've completed the initial setup.", ephemeral=True)
             return
+        if dashboard.shows_none(user_record, 'selected_keyword_count', 'new_keyword_count'):
+            await interaction.followup.send("No keywords found for your business.", ephemeral=True)
+            return
 
         business_name = user_record["business_name"]
         logger.info(f"Business name: {business_name}")
+        autocomplete.remember_business(user_id, business_name)
         
         business_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "judge_data", business_name)
         if business_collection is None:
@@ -46,6 +55,7 @@ async def handle_keywords(interaction: Interaction, check_onboarded_status):
 
         latest_document = helperfuncs.get_latest_document(business_collection)
         logger.info(f"Latest document retrieved: {latest_document is not None}")
+        autocomplete.refresh(business_name, 'keywords', latest_document)
         
         if not latest_document:
             await interaction.followup.send(f"No document found for business: {business_name}", ephemeral=True)
@@ -72,7 +82,12 @@ async def handle_keywords(interaction: Interaction, check_onboarded_status):
             await interaction.followup.send("No keywords found for your business.", ephemeral=True)
             return
 
-        view = helperClasses.KeywordPaginationView(selected_keywords, new_keywords, business_collection, title, last_update)
+        view = helperClasses.KeywordPaginationView(
+            selected_keywords, new_keywords, business_collection, title, last_update,
+            business_name=business_name, keyword_weights=user_record.get("keyword_weights")
+        )
+        if keyword:
+            view.go_to_keyword(keyword)
         embed = view.get_embed()
         await interaction.followup.send(embed=embed, view=view)
         
@@ -81,27 +96,29 @@ async def handle_keywords(interaction: Interaction, check_onboarded_status):
         await interaction.followup.send("An error occurred while processing your request. Please try again later or contact support if the issue persists.", ephemeral=True)
 
 async def handle_adtext(interaction: Interaction, check_onboarded_status):
-    user_id = interaction.user.id
-    is_onboarded = await check_onboarded_status(user_id)
+    is_onboarded, user_record = await dashboard.business_record(interaction, check_onboarded_status)
     
     if is_onboarded:
         CONNECTION_STRING = os.getenv("CONNECTION_STRING")
-        mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
-        user_record = mappings_collection.find_one({"owner_ids": user_id})
         
         if user_record and "business_name" in user_record:
             business_name = user_record["business_name"]
+            if dashboard.shows_none(user_record, 'ad_variation_count'):
+                await interaction.response.send_message("No ad variations found for your business in the latest document.", ephemeral=True)
+                return
             business_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "judge_data", business_name.lower())
             
             if business_collection is not None:
                 latest_document = helperfuncs.get_latest_document(business_collection)
                 
                 if latest_document and 'ad_variations' in latest_document:
-                    ad_variations = latest_document['ad_variations']
-                    finalized_ad_texts = latest_document.get('finalized_ad_text', [])
+                    ad_variations, finalized_ad_texts, version = ad_text_store.ensure_ad_ids(business_collection, latest_document)
                     last_update = latest_document.get('last_update', 'N/A')
                     
-                    view = helperClasses.AdTextView(ad_variations, finalized_ad_texts, business_collection, last_update)
+                    view = helperClasses.AdTextView(
+                        ad_variations, finalized_ad_texts, business_collection, last_update,
+                        document_id=latest_document['_id'], version=version
+                    )
                     embed = view.get_embed()
                     await interaction.response.send_message(embed=embed, view=view)
                 else:
@@ -117,6 +134,56 @@ async def handle_adtext(interaction: Interaction, check_onboarded_status):
             ephemeral=True
         )
 
+CREDENTIAL_FIELDS = ['client_id', 'project_id', 'auth_uri', 'auth_provider_x509_cert_url', 'client_secret', 'use_proto_plus']
+
+def save_credentials(business_name, customer_id, credentials_content):
+    """
+    Validates an uploaded Google Ads credentials file and stores it for the business. Blocking,
+    so callers on the event loop run it in a thread.
+
+    Args:
+    - credentials_content (bytes): the uploaded file
+
+    Returns:
+    - str: the message for the user
+
+    Raises:
+    - ValueError: the file is not valid credentials; the message says why
+    """
+    try:
+        credentials_json = json.loads(credentials_content.decode('utf-8'))
+    except json.JSONDecodeError:
+        raise ValueError("Error: Uploaded file does not contain valid JSON.")
+    for field in CREDENTIAL_FIELDS:
+        if field not in credentials_json:
+            raise ValueError(f"Error: Missing required field '{field}' in credentials file.")
+    if not isinstance(credentials_json['use_proto_plus'], bool):
+        raise ValueError("Error: 'use_proto_plus' must be a boolean value.")
+
+    credentials_json['developer_token'] = os.getenv('DEVELOPER_TOKEN')
+    credentials_json['customer_id'] = customer_id
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    credentials_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "credentials", business_name)
+    credentials_collection.update_one({}, {"$set": {"credentials": credentials_json}}, upsert=True)
+    return "Credentials uploaded and saved successfully."
+
+@job_queue.job_handler('upload_credentials', isolated=True)
+async def run_upload_credentials_job(context):
+    """
+    Downloads the attachment and saves the credentials, in a worker process when a worker
+    pool is running.
+    """
+    payload = context.payload
+    async with metrics.client_session() as session:
+        async with session.get(payload["url"]) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Could not download the credentials file (HTTP {response.status}).")
+            credentials_content = await response.read()
+    try:
+        return await asyncio.to_thread(save_credentials, payload["business_name"], payload["customer_id"], credentials_content)
+    except ValueError as e:
+        raise job_queue.JobFailed(str(e))
+
 async def handle_upload_credentials(interaction: Interaction, credentials_file: discord.Attachment, customer_id: str, check_onboarded_status):
     user_id = interaction.user.id
     is_onboarded = await check_onboarded_status(user_id)
@@ -133,27 +200,18 @@ async def handle_upload_credentials(interaction: Interaction, credentials_file:
             if not credentials_file.filename.endswith('.json'):
                 await interaction.followup.send("Error: Please upload a JSON file.")
                 return
-            
+
+            if worker_pool.available(interaction.client):
+                payload = {"url": credentials_file.url, "customer_id": customer_id, "business_name": business_name}
+                await job_queue.submit(interaction, 'upload_credentials', payload, "Saving your credentials")
+                return
+
             try:
                 credentials_content = await credentials_file.read()
-                credentials_json = json.loads(credentials_content.decode('utf-8'))
-                required_fields = ['client_id', 'project_id', 'auth_uri', 'auth_provider_x509_cert_url', 'client_secret', 'use_proto_plus']
-                for field in required_fields:
-                    if field not in credentials_json:
-                        await interaction.followup.send(f"Error: Missing required field '{field}' in credentials file.")
-                        return
-
-                if not isinstance(credentials_json['use_proto_plus'], bool):
-                    await interaction.followup.send("Error: 'use_proto_plus' must be a boolean value.")
-                    return
-                
-                credentials_json['developer_token'] = os.getenv('DEVELOPER_TOKEN')
-                credentials_json['customer_id'] = customer_id
-                credentials_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "credentials", business_name)
-                credentials_collection.update_one({}, {"$set": {"credentials": credentials_json}}, upsert=True)
-                await interaction.followup.send("Credentials uploaded and saved successfully.")
-            except json.JSONDecodeError:
-                await interaction.followup.send("Error: Uploaded file does not contain valid JSON.")
+                message = await asyncio.to_thread(save_credentials, business_name, customer_id, credentials_content)
+                await interaction.followup.send(message)
+            except ValueError as e:
+                await interaction.followup.send(str(e))
             except Exception as e:
                 await interaction.followup.send(f"An unexpected error occurred: {str(e)}")
             
@@ -167,7 +225,7 @@ async def handle_upload_credentials(interaction: Interaction, credentials_file:
             ephemeral=True
         )
 
-async def handle_create_ad(interaction: Interaction, check_onboarded_status):
+async def handle_create_ad(interaction: Interaction, check_onboarded_status, campaign_id=None):
     await interaction.response.defer(thinking=True)
     user_id = interaction.user.id
     is_onboarded = await check_onboarded_status(user_id)
@@ -229,7 +287,7 @@ async def handle_create_ad(interaction: Interaction, check_onboarded_status):
                     "credentials": web_credentials
                 }
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with metrics.client_session() as session:
                         async with session.post('https://googleadsapicalls.onrender.com/authenticate', json=data) as response:
                             if response.status == 200:
                                 result_text = await response.text()
@@ -253,7 +311,7 @@ async def handle_create_ad(interaction: Interaction, check_onboarded_status):
                                         "scopes": ['https://www.googleapis.com/auth/adwords']
                                     }
                                     if select_menu.values[0] == "existing":
-                                        await helperfuncs.get_campaigns(interaction, customer_id, complete_credentials, business_name, business_website)
+                                        await helperfuncs.get_campaigns(interaction, customer_id, complete_credentials, business_name, business_website, selected_campaign_id=campaign_id)
                                     else:
                                         await helperfuncs.create_campaign_flow(interaction, customer_id, complete_credentials)
                                 elif "auth_url" in result and "state" in result:
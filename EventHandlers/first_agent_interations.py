@@ -4,19 +4,23 @@ import discord
 from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
 import Helpers.helperfuncs as helperfuncs
 import Helpers.helperClasses as helperClasses
+import Helpers.autocomplete as autocomplete
+import Helpers.search_index as search_index
+import Helpers.dashboard as dashboard
 from discord import Embed
 
 async def handle_business(interaction, check_onboarded_status):
-    user_id = interaction.user.id
-    is_onboarded = await check_onboarded_status(user_id)
+    is_onboarded, user_record = await dashboard.business_record(interaction, check_onboarded_status)
     
     if is_onboarded:
         CONNECTION_STRING = os.getenv("CONNECTION_STRING")
-        mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
-        user_record = mappings_collection.find_one({"owner_ids": user_id})
         
         if user_record and "business_name" in user_record:
             business_name = user_record["business_name"]
+            if user_record.get('business_blurb') == "":
+                # The dashboard already shows there is nothing to load
+                await interaction.response.send_message(f"No business data found for: {business_name} in the latest document", ephemeral=True)
+                return
             business_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "marketing_agent", business_name.lower())
             
             if business_collection is not None:
@@ -45,7 +49,7 @@ async def handle_business(interaction, check_onboarded_status):
             ephemeral=True
         )
 
-async def handle_research_paths(interaction, check_onboarded_status):
+async def handle_research_paths(interaction, check_onboarded_status, path=None):
     user_id = interaction.user.id
     is_onboarded = await check_onboarded_status(user_id)
     
@@ -56,10 +60,12 @@ async def handle_research_paths(interaction, check_onboarded_status):
         
         if user_record and "business_name" in user_record:
             business_name = user_record["business_name"]
+            autocomplete.remember_business(user_id, business_name)
             business_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "marketing_agent", business_name.lower())
             
             if business_collection is not None:
                 latest_document = helperfuncs.get_latest_document(business_collection)
+                autocomplete.refresh(business_name, 'research_paths', latest_document)
                 
                 if latest_document and 'list_of_paths_taken' in latest_document:
                     paths = latest_document['list_of_paths_taken']
@@ -69,6 +75,9 @@ async def handle_research_paths(interaction, check_onboarded_status):
                         return
                     
                     view = helperClasses.ResearchPathsView(paths, business_name)
+                    position = autocomplete.find_item('research_paths', paths, path)
+                    if position is not None:
+                        view.go_to(position)
                     embed = view.get_embed()
                     await interaction.response.send_message(embed=embed, view=view)
                 else:
@@ -86,7 +95,7 @@ async def handle_research_paths(interaction, check_onboarded_status):
             ephemeral=True
         )
 
-async def handle_user_personas(interaction, check_onboarded_status):
+async def handle_user_personas(interaction, check_onboarded_status, persona=None):
     user_id = interaction.user.id
     is_onboarded = await check_onboarded_status(user_id)
     
@@ -97,10 +106,12 @@ async def handle_user_personas(interaction, check_onboarded_status):
         
         if user_record and "business_name" in user_record:
             business_name = user_record["business_name"]
+            autocomplete.remember_business(user_id, business_name)
             business_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "marketing_agent", business_name.lower())
             
             if business_collection is not None:
                 latest_document = helperfuncs.get_latest_document(business_collection)
+                autocomplete.refresh(business_name, 'user_personas', latest_document)
                 
                 if latest_document and 'user_personas' in latest_document:
                     personas = latest_document['user_personas']
@@ -108,6 +119,9 @@ async def handle_user_personas(interaction, check_onboarded_status):
                         personas = [personas] 
                     
                     view = helperClasses.UserPersonaView(personas, business_name)
+                    position = autocomplete.find_item('user_personas', view.personas, persona)
+                    if position is not None:
+                        view.go_to(position)
                     embed = view.get_embed()
                     await interaction.response.send_message(embed=embed, view=view)
                 else:
@@ -123,4 +137,92 @@ async def handle_user_personas(interaction, check_onboarded_status):
         await interaction.response.send_message(
             f"You don't have access to this command yet. Please complete the onboarding process by scheduling a call: {calendly_link}",
             ephemeral=True
-        )
\ No newline at end of file
+        )
+
+
+async def handle_search(interaction, check_onboarded_status, query):
+    user_id = interaction.user.id
+    is_onboarded = await check_onboarded_status(user_id)
+
+    if not is_onboarded:
+        calendly_link = "https://calendly.com/emmanuel-emmanuelsibanda/30min"
+        await interaction.response.send_message(
+            f"You don't have access to this command yet. Please complete the onboarding process by scheduling a call: {calendly_link}",
+            ephemeral=True
+        )
+        return
+
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    user_record = mappings_collection.find_one({"owner_ids": user_id})
+
+    if not user_record or "business_name" not in user_record:
+        await interaction.response.send_message("Unable to find your business name. Please make sure you've completed the initial setup.", ephemeral=True)
+        return
+
+    business_name = user_record["business_name"]
+    # Only the first search for a business reads MongoDB; later ones are answered from memory
+    if search_index.get_index(business_name) is None:
+        await interaction.response.defer(ephemeral=True)
+        send = interaction.followup.send
+    else:
+        send = interaction.response.send_message
+    index = await search_index.load_index(business_name)
+    results = index.search(query)
+
+    if not results:
+        await send(f"No matches found for '{query}'.", ephemeral=True)
+        return
+
+    embed = Embed(title=f"Search results for '{query}'"[:256], color=discord.Color.blue())
+    for score, source, position, text in results:
+        embed.add_field(
+            name=f"{search_index.SOURCES[source][1]} {position + 1} (score {score:.2f})",
+            value=text[:1024],
+            inline=False
+        )
+    embed.set_footer(text=f"{len(results)} best of {len(index)} indexed items")
+    await send(embed=embed, ephemeral=True)
+
+async def handle_overview(interaction):
+    store = getattr(interaction.client, 'dashboards', None)
+    if not isinstance(store, dashboard.DashboardStore):
+        await interaction.response.send_message("The overview isn't available yet. Please try again in a moment.", ephemeral=True)
+        return
+
+    # One indexed read of the materialized dashboard; it also carries the onboarding status
+    summary = store.summary_for(interaction.user.id)
+    if summary is None:
+        await interaction.response.send_message("Unable to find your business name. Please make sure you've completed the initial setup.", ephemeral=True)
+        return
+    if not summary.get('onboarded'):
+        calendly_link = "https://calendly.com/emmanuel-emmanuelsibanda/30min"
+        await interaction.response.send_message(
+            f"You don't have access to this command yet. Please complete the onboarding process by scheduling a call: {calendly_link}",
+            ephemeral=True
+        )
+        return
+
+    embed = Embed(title=f"{summary.get('business_name', 'Business')} Overview"[:256], color=discord.Color.blue())
+    embed.add_field(name="Business", value=(summary.get('business_blurb') or "No business information yet.")[:1024], inline=False)
+    embed.add_field(name="User Personas", value=str(summary.get('persona_count', 0)), inline=True)
+    embed.add_field(name="Research Paths", value=str(summary.get('research_path_count', 0)), inline=True)
+    embed.add_field(
+        name="Keywords",
+        value=f"{summary.get('selected_keyword_count', 0)} selected, {summary.get('new_keyword_count', 0)} new",
+        inline=True
+    )
+    top_keywords = summary.get('top_keywords') or []
+    if top_keywords:
+        embed.add_field(
+            name="Top Keywords",
+            value="\n".join(f"{keyword['text']} ({keyword['avg_monthly_searches']}/mo)" for keyword in top_keywords)[:1024],
+            inline=False
+        )
+    embed.add_field(
+        name="Ad Text",
+        value=f"{summary.get('ad_variation_count', 0)} variations, {summary.get('finalized_ad_count', 0)} finalized",
+        inline=False
+    )
+    embed.set_footer(text=f"Last update: {summary.get('last_update', 'N/A')}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
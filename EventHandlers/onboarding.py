@@ -1,92 +1,175 @@
+import asyncio
 import re
 from datetime import datetime, timezone
+from pymongo import ReturnDocument, UpdateOne
 from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
 import os
 import Helpers.helperClasses as helperClasses
+import Helpers.outbound as outbound
 
-async def handle_guild_join(guild, guild_onboarded_status, guild_states):
-    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
-    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
-
-    owner_id = guild.owner.id
-
-    # Create webhook
-    webhook_url = None
-    for channel in guild.text_channels:
-        if channel.permissions_for(guild.me).manage_webhooks:
-            try:
-                webhook = await channel.create_webhook(name="AdAlchemyAI Notifications")
-                webhook_url = webhook.url
-                break
-            except Exception as e:
-                print(f"Failed to create webhook in channel {channel.id}: {str(e)}")
-
-    # Check if the owner already has a record
-    user_record = mappings_collection.find_one({"owner_ids": owner_id})
-
-    if user_record:
-        # Update existing user
-        update_data = {
-            "$addToSet": {"owner_ids": owner_id},
-            "$set": {"webhook_url": webhook_url}
-        }
-        mappings_collection.update_one({"_id": user_record["_id"]}, update_data)
-
-        business_name = user_record.get("business_name", "valued business")
-        welcome_back_message = f"Welcome back {business_name}!"
-        
-        if user_record.get("onboarded") == True:
-            calendly_message = "You have full access to all commands. Type / to see available commands."
-            guild_onboarded_status[guild.id] = True
-        else:
-            calendly_message = "Please schedule a date to complete your onboarding and discuss your business needs: [Calendly Link](https://calendly.com/emmanuel-emmanuelsibanda/30min)"
-            guild_onboarded_status[guild.id] = False
-
-        message_sent = False
-        for channel in guild.text_channels:
-            if channel.permissions_for(guild.me).send_messages and not message_sent:
-                await channel.send(welcome_back_message)
-                await channel.send(calendly_message)
-                message_sent = True
-                break
-    else:
-        # New user
-        new_user_data = {
-            "owner_ids": [owner_id],
-            "webhook_url": webhook_url,
-            "business_name": None,
-            "website_link": None,
-            "onboarded": False,
-            "created_at": datetime.now(timezone.utc)
-        }
-        mappings_collection.insert_one(new_user_data)
-
-        welcome_message = """
+BOOTSTRAP_WORKERS = 8
+CALENDLY_LINK = "https://calendly.com/emmanuel-emmanuelsibanda/30min"
+WELCOME_MESSAGE = """
         Hello! I am AdAlchemyAI, a bot to help you get good leads for a cost-effective price for your business by automating the process of setting up, running, and optimizing your Google Ads. I only run ads after you manually approve the keywords I researched, the ad text ideas I generate, and the information I use to carry out my research.
 
         But for now, I would like to learn more about you and your business.
         """
-        first_question = "What is the name of your business?"
-        guild_onboarded_status[guild.id] = False
+FIRST_QUESTION = "What is the name of your business?"
 
-        message_sent = False
-        for channel in guild.text_channels:
-            if channel.permissions_for(guild.me).send_messages and not message_sent:
-                await channel.send(welcome_message)
-                await channel.send(first_question)
-                message_sent = True
-                break
+def choose_channels(guild):
+    """
+    Picks channels from the permissions discord.py already has cached, in one pass.
 
+    Returns:
+    - tuple: (channels where a webhook may be created, first channel the bot can post in or None)
+    """
+    webhook_channels = []
+    message_channel = None
+    for channel in guild.text_channels:
+        permissions = channel.permissions_for(guild.me)
+        if permissions.manage_webhooks:
+            webhook_channels.append(channel)
+        if message_channel is None and permissions.send_messages:
+            message_channel = channel
+    return webhook_channels, message_channel
+
+async def create_notification_webhook(webhook_channels):
+    for channel in webhook_channels:
+        try:
+            webhook = await channel.create_webhook(name="AdAlchemyAI Notifications")
+            return webhook.url
+        except Exception as e:
+            print(f"Failed to create webhook in channel {channel.id}: {str(e)}")
+    return None
+
+def new_user_fields(owner_id):
+    return {
+        "owner_ids": [owner_id],
+        "business_name": None,
+        "website_link": None,
+        "onboarded": False,
+        "created_at": datetime.now(timezone.utc)
+    }
+
+def join_update(owner_id, guild_id, webhook_url):
+    """
+    Upsert for an owner's company record when one of their guilds adds the bot. The filter
+    matches on the owner, so owner_ids only needs writing when the record is created.
+    """
+    return {
+        "$setOnInsert": new_user_fields(owner_id),
+        "$addToSet": {"guild_ids": guild_id},
+        "$set": {"webhook_url": webhook_url}
+    }
+
+def join_messages(user_record):
+    """
+    Returns:
+    - tuple: (messages to post in the guild, whether the owner is onboarded)
+    """
+    if user_record is None:
+        return (WELCOME_MESSAGE, FIRST_QUESTION), False
+    business_name = user_record.get("business_name") or "valued business"
+    if user_record.get("onboarded") == True:
+        return (f"Welcome back {business_name}!", "You have full access to all commands. Type / to see available commands."), True
+    calendly_message = f"Please schedule a date to complete your onboarding and discuss your business needs: [Calendly Link]({CALENDLY_LINK})"
+    return (f"Welcome back {business_name}!", calendly_message), False
+
+async def welcome_guild(guild, message_channel, user_record, guild_onboarded_status, guild_states):
+    messages, onboarded = join_messages(user_record)
+    guild_onboarded_status[guild.id] = onboarded
+    if message_channel is not None:
+        await outbound.send(message_channel, *messages)
+    if user_record is None:
         guild_states[guild.id] = "waiting_for_business_name"
 
+async def handle_guild_join(guild, guild_onboarded_status, guild_states):
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+
+    owner_id = guild.owner_id
+    webhook_channels, message_channel = choose_channels(guild)
+    webhook_url = await create_notification_webhook(webhook_channels)
+
+    # One upsert; the pre-update document tells a returning owner from a new one
+    user_record = mappings_collection.find_one_and_update(
+        {"owner_ids": owner_id},
+        join_update(owner_id, guild.id, webhook_url),
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    await welcome_guild(guild, message_channel, user_record, guild_onboarded_status, guild_states)
+
+async def bootstrap_guilds(guilds, guild_onboarded_status, guild_states, workers=BOOTSTRAP_WORKERS):
+    """
+    Brings mappings.companies in line with the guilds the bot is in, so guilds that added the
+    bot while it was offline get the same onboarding as a live join. Known guilds only have
+    their onboarding status loaded.
+
+    Args:
+    - guilds: the client's guilds
+    - workers: how many guilds are set up at once
+
+    Returns:
+    - int: number of guilds that were set up
+    """
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    if mappings_collection is None or not guilds:
+        return 0
+
+    records = {}
+    for record in mappings_collection.find(
+        {"owner_ids": {"$in": list({guild.owner_id for guild in guilds})}},
+        {"owner_ids": 1, "guild_ids": 1, "business_name": 1, "onboarded": 1}
+    ):
+        for owner_id in record.get("owner_ids", []):
+            records[owner_id] = record
+
+    missing = []
+    legacy = {}
+    for guild in guilds:
+        record = records.get(guild.owner_id)
+        if record is None or ("guild_ids" in record and guild.id not in record["guild_ids"]):
+            missing.append(guild)
+        else:
+            guild_onboarded_status[guild.id] = record.get("onboarded") == True
+            if "guild_ids" not in record:
+                # Records from before guild ids were stored are backfilled without messages
+                legacy.setdefault(record["_id"], []).append(guild.id)
+
+    semaphore = asyncio.Semaphore(workers)
+    async def prepare(guild):
+        async with semaphore:
+            webhook_channels, message_channel = choose_channels(guild)
+            return guild, message_channel, await create_notification_webhook(webhook_channels)
+    prepared = await asyncio.gather(*(prepare(guild) for guild in missing))
+
+    operations = [
+        UpdateOne({"owner_ids": guild.owner_id}, join_update(guild.owner_id, guild.id, webhook_url), upsert=True)
+        for guild, _, webhook_url in prepared
+    ]
+    operations.extend(
+        UpdateOne({"_id": record_id}, {"$addToSet": {"guild_ids": {"$each": guild_ids}}})
+        for record_id, guild_ids in legacy.items()
+    )
+    if operations:
+        mappings_collection.bulk_write(operations, ordered=False)
+
+    async def welcome(guild, message_channel):
+        async with semaphore:
+            await welcome_guild(guild, message_channel, records.get(guild.owner_id), guild_onboarded_status, guild_states)
+    await asyncio.gather(*(welcome(guild, message_channel) for guild, message_channel, _ in prepared))
+    return len(missing)
+
 async def handle_message(message, mappings_collection, guild_states):
-    if message.author.bot:
+    if message.author.bot or message.guild is None:
         return
 
     guild_id = message.guild.id
     current_state = guild_states.get(guild_id)
 
-    user_record = mappings_collection.find_one({"owner_ids": message.guild.owner.id})
+    user_record = mappings_collection.find_one({"owner_ids": message.guild.owner_id})
     
     if not user_record:
         return
@@ -110,8 +193,11 @@ async def handle_message(message, mappings_collection, guild_states):
                 {"_id": user_record["_id"]},
                 {"$set": {"website_link": website_link}}
             )
-            await message.channel.send("We are currently running in beta")
-            await message.channel.send("Please confirm your interest in joining the AdAlchemyAI waiting list")
+            await outbound.send(
+                message.channel,
+                "We are currently running in beta",
+                "Please confirm your interest in joining the AdAlchemyAI waiting list"
+            )
             guild_states[guild_id] = "waiting_for_consent"
         else:
             await message.channel.send("That doesn't appear to be a valid URL. Please enter a valid website URL (e.g., https://www.example.com):")
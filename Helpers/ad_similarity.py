@@ -0,0 +1,80 @@
+import hashlib
+import json
+from collections import OrderedDict
+from Helpers.keyword_dedupe import cluster_token_sets, singularize, TOKEN_PATTERN
+import Helpers.metrics as metrics
+
+AD_SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 2
+AD_GROUP_CACHE_SIZE = 64
+
+_group_cache = OrderedDict()
+
+def ad_shingles(ad, size=SHINGLE_SIZE):
+    """
+    Turns an ad's headlines and descriptions into a set of word n-gram shingles.
+    Texts shorter than the shingle size contribute their words individually.
+
+    Returns:
+    - frozenset: shingle strings
+    """
+    shingles = set()
+    for text in list(ad.get('headlines') or []) + list(ad.get('descriptions') or []):
+        words = [singularize(word) for word in TOKEN_PATTERN.findall(text.lower())]
+        if len(words) < size:
+            shingles.update(words)
+        else:
+            shingles.update(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return frozenset(shingles)
+
+def _ads_fingerprint(ads):
+    payload = json.dumps(
+        [[ad.get('headlines'), ad.get('descriptions')] for ad in ads],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def group_similar_ads(ads, threshold=AD_SIMILARITY_THRESHOLD):
+    """
+    Finds groups of ad variations whose shingle sets reach the Jaccard threshold.
+    Results are cached by ad content, so the same fetch is only analysed once.
+
+    Returns:
+    - list: for each ad, the index of the first ad in its group
+    """
+    key = (_ads_fingerprint(ads), threshold)
+    metrics.cache_lookup("ad_groups", key in _group_cache)
+    if key in _group_cache:
+        _group_cache.move_to_end(key)
+        return _group_cache[key]
+
+    # MinHash banding is tuned for keyword_dedupe's 0.8 threshold and would miss about a third
+    # of pairs at 0.6; a fetch holds few enough ads to compare every pair
+    roots = cluster_token_sets([ad_shingles(ad) for ad in ads], threshold, exact_pairwise_limit=None)
+    _group_cache[key] = roots
+    if len(_group_cache) > AD_GROUP_CACHE_SIZE:
+        _group_cache.popitem(last=False)
+    return roots
+
+def collapse_similar_ads(ads, threshold=AD_SIMILARITY_THRESHOLD):
+    """
+    Keeps the first ad of every near-duplicate group.
+
+    Returns:
+    - tuple: (list of kept ads, dict kept position -> number of near-duplicates dropped)
+    """
+    roots = group_similar_ads(ads, threshold)
+    kept = []
+    position_of_root = {}
+    dropped = {}
+    for index, root in enumerate(roots):
+        if root == index:
+            position_of_root[index] = len(kept)
+            kept.append(ads[index])
+        else:
+            position = position_of_root[root]
+            dropped[position] = dropped.get(position, 0) + 1
+    return kept, dropped
+
+def clear_ad_group_cache():
+    _group_cache.clear()
@@ -0,0 +1,114 @@
+import uuid
+
+VERSION_FIELD = 'ad_text_version'
+
+class AdTextConflict(Exception):
+    """Raised when an ad text write loses a compare-and-swap against another edit."""
+
+def new_ad_id():
+    return uuid.uuid4().hex[:12]
+
+def version_filter(document_id, version):
+    """
+    Builds a filter that only matches the document while it is still at the given version.
+    Documents written before versioning have no version field and count as version 0.
+    """
+    if version:
+        return {'_id': document_id, VERSION_FIELD: version}
+    return {'_id': document_id, VERSION_FIELD: {'$in': [None, 0]}}
+
+def ensure_ad_ids(collection, document):
+    """
+    Gives every ad variation and finalized ad text in a document a stable id, migrating
+    legacy finalized entries that were addressed by positional 'index'.
+
+    Args:
+    - collection: MongoDB collection holding the document
+    - document: the latest document, as read from the collection
+
+    Returns:
+    - tuple: (ad_variations, finalized_ad_texts, version) after any migration
+    """
+    variations = document.get('ad_variations') or []
+    finalized = document.get('finalized_ad_text') or []
+    version = document.get(VERSION_FIELD) or 0
+
+    changed = False
+    for variation in variations:
+        if isinstance(variation, dict) and 'id' not in variation:
+            variation['id'] = new_ad_id()
+            changed = True
+    for finalized_ad in finalized:
+        if isinstance(finalized_ad, dict) and 'id' not in finalized_ad:
+            index = finalized_ad.get('index')
+            if isinstance(index, int) and 0 <= index < len(variations) and isinstance(variations[index], dict):
+                finalized_ad['id'] = variations[index]['id']
+            else:
+                finalized_ad['id'] = new_ad_id()
+            changed = True
+
+    if changed:
+        result = collection.update_one(
+            version_filter(document['_id'], version),
+            {
+                "$set": {"ad_variations": variations, "finalized_ad_text": finalized},
+                "$inc": {VERSION_FIELD: 1}
+            }
+        )
+        if result.matched_count == 0:
+            # Another request migrated or edited the document first; use its copy
+            current = collection.find_one({'_id': document['_id']})
+            return current.get('ad_variations') or [], current.get('finalized_ad_text') or [], current.get(VERSION_FIELD) or 0
+        version += 1
+
+    return variations, finalized, version
+
+def save_finalized_ad(collection, document_id, version, ad_id, headline, description):
+    """
+    Sets the finalized text for one ad in place, or appends it if the ad has none yet.
+
+    Returns:
+    - int: the document's new version
+
+    Raises:
+    - AdTextConflict: if the document changed since it was read at `version`
+    """
+    result = collection.update_one(
+        {**version_filter(document_id, version), "finalized_ad_text.id": ad_id},
+        {
+            "$set": {"finalized_ad_text.$.headline": headline, "finalized_ad_text.$.description": description},
+            "$inc": {VERSION_FIELD: 1}
+        }
+    )
+    if result.matched_count == 0:
+        result = collection.update_one(
+            {**version_filter(document_id, version), "finalized_ad_text.id": {"$ne": ad_id}},
+            {
+                "$push": {"finalized_ad_text": {"id": ad_id, "headline": headline, "description": description}},
+                "$inc": {VERSION_FIELD: 1}
+            }
+        )
+    if result.matched_count == 0:
+        raise AdTextConflict("This ad was changed by someone else since you opened it.")
+    return version + 1
+
+def delete_ad(collection, document_id, version, ad_id, finalized_only=False):
+    """
+    Removes an ad by id. Deleting a variation also removes its finalized text.
+
+    Returns:
+    - int: the document's new version
+
+    Raises:
+    - AdTextConflict: if the document changed since it was read at `version`
+    """
+    pull = {"finalized_ad_text": {"id": ad_id}}
+    if not finalized_only:
+        pull["ad_variations"] = {"id": ad_id}
+    result = collection.update_one(
+        version_filter(document_id, version),
+        {"$pull": pull, "$inc": {VERSION_FIELD: 1}}
+    )
+    if result.matched_count == 0:
+        raise AdTextConflict("The ads were changed by someone else since you opened them.")
+    return version + 1
@@ -0,0 +1,99 @@
+import re
+from collections import namedtuple
+
+HEADLINE_MAX_LENGTH = 30
+DESCRIPTION_MAX_LENGTH = 90
+MIN_HEADLINES = 3
+MAX_HEADLINES = 15
+MIN_DESCRIPTIONS = 2
+MAX_DESCRIPTIONS = 4
+
+# Symbols Google Ads editorial review rejects in ad text, plus emoji and pictographs
+DISALLOWED_CHARACTERS = re.compile(r"[<>{}\[\]^~|\\★☆•●■□▪▫►◄→←↑↓✓✔✗✘❤☀-➿\U0001F000-\U0001FFFF]")
+REPEATED_PUNCTUATION = re.compile(r"([!?.,])\1+")
+
+AdViolation = namedtuple('AdViolation', ['ad_index', 'field', 'item_index', 'code', 'message'])
+
+FIELD_LABELS = {'headlines': 'Headline', 'descriptions': 'Description'}
+LENGTH_LIMITS = {'headlines': HEADLINE_MAX_LENGTH, 'descriptions': DESCRIPTION_MAX_LENGTH}
+COUNT_LIMITS = {'headlines': (MIN_HEADLINES, MAX_HEADLINES), 'descriptions': (MIN_DESCRIPTIONS, MAX_DESCRIPTIONS)}
+
+def _normalize_for_duplicates(text):
+    return " ".join(text.lower().split())
+
+def validate_text(text, field, ad_index=0, item_index=0):
+    """
+    Checks one headline or description against the length limit and character rules.
+
+    Returns:
+    - list: AdViolation entries, empty when the text is valid
+    """
+    label = FIELD_LABELS[field]
+    limit = LENGTH_LIMITS[field]
+    violations = []
+    if len(text) > limit:
+        violations.append(AdViolation(ad_index, field, item_index, 'too_long',
+                                      f"{label} {item_index + 1} exceeds limit by {len(text) - limit} characters"))
+    if not text.strip():
+        violations.append(AdViolation(ad_index, field, item_index, 'empty', f"{label} {item_index + 1} is empty"))
+    bad_characters = sorted(set(DISALLOWED_CHARACTERS.findall(text)))
+    if field == 'headlines' and '!' in text:
+        bad_characters.append('!')
+    if bad_characters:
+        violations.append(AdViolation(ad_index, field, item_index, 'disallowed_characters',
+                                      f"{label} {item_index + 1} contains disallowed characters: {' '.join(bad_characters)}"))
+    if REPEATED_PUNCTUATION.search(text):
+        violations.append(AdViolation(ad_index, field, item_index, 'repeated_punctuation',
+                                      f"{label} {item_index + 1} repeats punctuation"))
+    return violations
+
+def validate_ad(ad, ad_index=0, check_counts=True):
+    """
+    Validates every headline and description of one ad variation.
+
+    Args:
+    - ad: dict with 'headlines' and 'descriptions' lists
+    - ad_index: position of the ad, copied into each violation
+    - check_counts: whether to enforce the per-ad headline/description counts
+
+    Returns:
+    - list: AdViolation entries, empty when the ad is valid
+    """
+    violations = []
+    for field in ('headlines', 'descriptions'):
+        items = ad.get(field) or []
+        minimum, maximum = COUNT_LIMITS[field]
+        label = FIELD_LABELS[field]
+        if check_counts and len(items) < minimum:
+            violations.append(AdViolation(ad_index, field, None, 'too_few', f"Needs at least {minimum} {label.lower()}s (has {len(items)})"))
+        if check_counts and len(items) > maximum:
+            violations.append(AdViolation(ad_index, field, None, 'too_many', f"Allows at most {maximum} {label.lower()}s (has {len(items)})"))
+
+        seen = {}
+        for item_index, text in enumerate(items):
+            violations.extend(validate_text(text, field, ad_index, item_index))
+            if field == 'headlines':
+                key = _normalize_for_duplicates(text)
+                if key in seen:
+                    violations.append(AdViolation(ad_index, field, item_index, 'duplicate',
+                                                  f"Headline {item_index + 1} duplicates headline {seen[key] + 1}"))
+                else:
+                    seen[key] = item_index
+    return violations
+
+def validate_ads(ads, check_counts=True):
+    """
+    Validates a batch of ad variations in one pass.
+
+    Returns:
+    - dict: ad index -> list of AdViolation, only for ads that have violations
+    """
+    results = {}
+    for ad_index, ad in enumerate(ads):
+        violations = validate_ad(ad, ad_index, check_counts)
+        if violations:
+            results[ad_index] = violations
+    return results
+
+def format_violations(violations):
+    return " | ".join(violation.message for violation in violations) if violations else "No warnings"
@@ -0,0 +1,216 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
+import Helpers.helperfuncs as helperfuncs
+from Helpers.prefix_index import PrefixIndex, query_words
+import Helpers.metrics as metrics
+
+AUTOCOMPLETE_LIMIT = 25
+# Discord caps choice names and values at 100 characters
+CHOICE_LENGTH = 100
+# An index older than this is reloaded in the background while it keeps answering
+REFRESH_SECONDS = 60
+# Users whose business is remembered; the least recently seen are forgotten first
+BUSINESS_CACHE_SIZE = 4096
+
+# Database and document fields each autocompleted list is read from
+SOURCES = {
+    'keywords': ('judge_data', ('selected_keywords', 'keywords')),
+    'user_personas': ('marketing_agent', ('user_personas',)),
+    'research_paths': ('marketing_agent', ('list_of_paths_taken',)),
+}
+
+class _BusinessIndex:
+    """
+    One business's list for one command: a word-prefix index plus the same texts sorted
+    case-insensitively, so suggestions come out already in display order.
+    """
+    __slots__ = ('index', 'ordered', 'refreshed_at')
+
+    def __init__(self, texts):
+        self.index = PrefixIndex((text, text) for text in texts)
+        self.ordered = sorted((text.lower(), text) for text in texts)
+        self.refreshed_at = time.monotonic()
+
+    def add(self, text):
+        self.index.add(text, text)
+        insort(self.ordered, (text.lower(), text))
+
+    def remove(self, text):
+        self.index.remove(text)
+        i = bisect_left(self.ordered, (text.lower(), text))
+        if i < len(self.ordered) and self.ordered[i][1] == text:
+            del self.ordered[i]
+
+    def suggest(self, query, limit):
+        query = query.strip().lower()
+        # Texts starting with the whole query sit in one contiguous run of the sorted list
+        start = i = bisect_left(self.ordered, (query,))
+        results = []
+        while i < len(self.ordered) and len(results) < limit and self.ordered[i][0].startswith(query):
+            results.append(self.ordered[i][1])
+            i += 1
+        if len(results) == limit:
+            return results
+
+        words = query_words(query)
+        if not words:
+            return results
+        if self.index.candidate_count(words) * 8 <= len(self.ordered):
+            matches = self.index.search(query).difference(results)
+            return results + sorted(matches, key=lambda text: (text.lower(), text))[:limit - len(results)]
+        # Dense matches: walk the sorted list and stop as soon as the page is full
+        for position, (_, text) in enumerate(self.ordered):
+            if not start <= position < i and self.index.matches(text, words):
+                results.append(text)
+                if len(results) == limit:
+                    break
+        return results
+
+_business_by_user = OrderedDict()
+_indexes = {}
+_loading = set()
+_load_tasks = set()
+
+def item_text(kind, item):
+    if isinstance(item, dict):
+        if kind == 'user_personas':
+            return str(item.get('title') or next(iter(item.values()), ''))
+        return str(item.get('text', ''))
+    return str(item)
+
+def document_items(kind, document):
+    """
+    Returns the items of one autocompleted list in a business document.
+    """
+    items = []
+    for field in SOURCES[kind][1]:
+        value = (document or {}).get(field)
+        if isinstance(value, dict):
+            # Keywords can be stored as a mapping of keyword text to its metrics
+            items.extend(value.keys())
+        elif isinstance(value, list):
+            items.extend(value)
+        elif value:
+            items.append(value)
+    return items
+
+def find_item(kind, items, value):
+    """
+    Resolves an autocomplete choice value back to a position in `items`.
+
+    Returns:
+    - int: the position of the first matching item, or None
+    """
+    if not value:
+        return None
+    for position, item in enumerate(items):
+        if item_text(kind, item).strip()[:CHOICE_LENGTH] == value:
+            return position
+    return None
+
+def remember_business(user_id, business_name):
+    if user_id is not None and business_name:
+        _business_by_user[user_id] = business_name
+        _business_by_user.move_to_end(user_id)
+        if len(_business_by_user) > BUSINESS_CACHE_SIZE:
+            _business_by_user.popitem(last=False)
+
+def business_for(user_id):
+    business_name = _business_by_user.get(user_id)
+    if business_name is not None:
+        _business_by_user.move_to_end(user_id)
+    return business_name
+
+def set_items(business_name, kind, items):
+    """
+    Brings a business's index for `kind` in line with `items`, adding and removing only the
+    entries that changed. Views call this after every write so suggestions never lag the bot's
+    own edits.
+    """
+    wanted = {text for text in (item_text(kind, item).strip() for item in items) if text}
+    key = (business_name.lower(), kind)
+    entry = _indexes.get(key)
+    if entry is None:
+        entry = _indexes[key] = _BusinessIndex(wanted)
+        return entry.index
+    current = set(entry.index.keys())
+    for text in current - wanted:
+        entry.remove(text)
+    for text in wanted - current:
+        entry.add(text)
+    entry.refreshed_at = time.monotonic()
+    return entry.index
+
+def refresh(business_name, kind, document):
+    return set_items(business_name, kind, document_items(kind, document))
+
+def load(user_id, kind, business_name=None):
+    """
+    Reads the user's business, unless already known, and its latest document from MongoDB.
+    Runs off the event loop and only reads, so the indexes suggest() uses are never touched
+    from another thread.
+
+    Returns:
+    - tuple: (business name, latest document), or None if the user has no business
+    """
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    if business_name is None:
+        mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+        user_record = mappings_collection.find_one({"owner_ids": user_id}) if mappings_collection is not None else None
+        if not user_record or not user_record.get("business_name"):
+            return None
+        business_name = user_record["business_name"]
+
+    database, _ = SOURCES[kind]
+    collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, database, business_name.lower())
+    if collection is None:
+        return None
+    return business_name, helperfuncs.get_latest_document(collection)
+
+async def _load_in_background(user_id, kind):
+    try:
+        loaded = await asyncio.to_thread(load, user_id, kind, _business_by_user.get(user_id))
+        if loaded is not None:
+            # Back on the loop: the index is only ever changed from here
+            business_name, document = loaded
+            remember_business(user_id, business_name)
+            refresh(business_name, kind, document)
+    except Exception as e:
+        print(f"Failed to load {kind} autocomplete for user {user_id}: {e}")
+    finally:
+        _loading.discard((user_id, kind))
+
+def schedule_load(user_id, kind):
+    if (user_id, kind) in _loading:
+        return
+    _loading.add((user_id, kind))
+    task = asyncio.get_running_loop().create_task(_load_in_background(user_id, kind))
+    _load_tasks.add(task)
+    task.add_done_callback(_load_tasks.discard)
+
+def suggest(user_id, kind, current, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Answers an autocomplete request from memory. Items whose text starts with the query come
+    first, then items with a word starting with it, each alphabetically. If the user's index
+    is missing or stale it is loaded in the background, ready for the next keystroke.
+
+    Returns:
+    - list: (name, value) pairs
+    """
+    business_name = business_for(user_id)
+    entry = _indexes.get((business_name.lower(), kind)) if business_name else None
+    metrics.cache_lookup("autocomplete", entry is not None)
+    if entry is None or time.monotonic() - entry.refreshed_at > REFRESH_SECONDS:
+        schedule_load(user_id, kind)
+    if entry is None:
+        return []
+
+    return [(text[:CHOICE_LENGTH], text[:CHOICE_LENGTH]) for text in entry.suggest(current or "", limit)]
+
+def clear_autocomplete_cache():
+    _business_by_user.clear()
+    _indexes.clear()
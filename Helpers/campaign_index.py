@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from Helpers.prefix_index import PrefixIndex
+import Helpers.metrics as metrics
+
+CAMPAIGN_CACHE_TTL = 600
+CAMPAIGN_CACHE_SIZE = 256
+
+_campaign_cache = OrderedDict()
+
+class CampaignIndex:
+    """
+    In-memory index over a customer's campaigns across all of their accounts.
+
+    Campaigns are looked up by id through a dict and searched by word prefix through a
+    sorted list of the words in their names, so lookups stay constant-time and searches
+    logarithmic as accounts grow.
+
+    Args:
+    - campaigns: list of dicts with 'name', 'id' and 'budget', in display order
+    """
+    __slots__ = ('campaigns', 'by_id', '_names')
+
+    def __init__(self, campaigns):
+        self.campaigns = list(campaigns)
+        self.by_id = {str(campaign['id']): campaign for campaign in self.campaigns}
+        self._names = PrefixIndex((position, campaign['name']) for position, campaign in enumerate(self.campaigns))
+
+    @classmethod
+    def from_response(cls, campaigns_data):
+        """
+        Flattens the Google Ads proxy's /get_campaigns response into an index.
+        """
+        campaigns = []
+        for account_id, account_data in (campaigns_data or {}).items():
+            account_name = account_data.get('Account Name', 'Unknown Account')
+            for campaign in account_data.get('Campaigns', []):
+                campaigns.append({
+                    'name': f"{account_name} - {campaign['Campaign Name']}",
+                    'id': campaign['Campaign ID'],
+                    'budget': campaign['Budget']
+                })
+        return cls(campaigns)
+
+    def __len__(self):
+        return len(self.campaigns)
+
+    def get(self, campaign_id):
+        if campaign_id is None:
+            return None
+        return self.by_id.get(str(campaign_id))
+
+    def search(self, query, limit=None):
+        """
+        Finds campaigns whose name has a word starting with each word of the query. A query
+        equal to a campaign id matches that campaign first.
+
+        Returns:
+        - list: matching campaign dicts in display order
+        """
+        matches = self._names.search(query)
+        if matches is None:
+            return self.campaigns[:limit] if limit else list(self.campaigns)
+
+        results = [self.campaigns[position] for position in sorted(matches)]
+        exact = self.get(query.strip())
+        if exact is not None:
+            results = [exact] + [campaign for campaign in results if campaign is not exact]
+        return results[:limit] if limit else results
+
+def remember(user_id, index):
+    """
+    Caches a user's campaign index for autocomplete and later pickers.
+    """
+    if user_id is None:
+        return
+    _campaign_cache[user_id] = (time.monotonic() + CAMPAIGN_CACHE_TTL, index)
+    _campaign_cache.move_to_end(user_id)
+    if len(_campaign_cache) > CAMPAIGN_CACHE_SIZE:
+        _campaign_cache.popitem(last=False)
+
+def get_cached(user_id):
+    """
+    Returns the user's cached campaign index, or None if there is none or it has expired.
+    """
+    entry = _campaign_cache.get(user_id)
+    if entry is not None and entry[0] < time.monotonic():
+        del _campaign_cache[user_id]
+        entry = None
+    metrics.cache_lookup("campaign_index", entry is not None)
+    return entry[1] if entry is not None else None
+
+def clear_campaign_cache():
+    _campaign_cache.clear()
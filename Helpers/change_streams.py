@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timezone
+from pymongo.errors import OperationFailure, PyMongoError
+
+TOKEN_DATABASE = "mappings"
+TOKEN_COLLECTION = "change_stream_tokens"
+RETRY_SECONDS = 5
+MAX_AWAIT_MS = 1000
+# MongoDB error codes: resume token fell off the oplog, and change streams unsupported
+CHANGE_STREAM_HISTORY_LOST = 286
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+class ChangeStreamFollower:
+    """
+    Follows a cluster-wide change stream on a background thread and hands each event to
+    apply(). The resume token is stored under `name` after every applied event, so a restarted
+    bot continues where it stopped. Without a usable token the stream starts from now and
+    on_fresh_start() runs once the stream is open, so nothing written meanwhile is missed.
+
+    Args:
+    - client: pymongo MongoClient to watch
+    - name: id of this follower's resume token document
+    - pipeline: aggregation stages filtering the events
+    """
+    full_document = None
+
+    def __init__(self, client, name, pipeline):
+        self.client = client
+        self.name = name
+        self.pipeline = pipeline
+        self.tokens = client[TOKEN_DATABASE][TOKEN_COLLECTION]
+        # Cleared when the deployment has no change streams (standalone servers)
+        self.live = True
+        self._stop = threading.Event()
+        self._thread = None
+
+    def apply(self, change):
+        raise NotImplementedError
+
+    def on_fresh_start(self):
+        pass
+
+    def on_unsupported(self):
+        pass
+
+    def load_token(self):
+        entry = self.tokens.find_one({'_id': self.name})
+        return entry.get('resume_token') if entry else None
+
+    def save_token(self, token):
+        self.tokens.update_one({'_id': self.name}, {'$set': {'resume_token': token, 'saved_at': utcnow()}}, upsert=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name=f"{self.name}-change-stream", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=MAX_AWAIT_MS / 1000 + 1)
+            self._thread = None
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.watch()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    print(f"Change streams are unavailable for {self.name}: {e}")
+                    self.live = False
+                    self.on_unsupported()
+                    return
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    print(f"Resume token for {self.name} expired; starting from now.")
+                    self.save_token(None)
+                else:
+                    print(f"Change stream {self.name} failed: {e}")
+                self._stop.wait(RETRY_SECONDS)
+            except PyMongoError as e:
+                print(f"Change stream {self.name} failed: {e}")
+                self._stop.wait(RETRY_SECONDS)
+
+    def watch(self):
+        token = self.load_token()
+        with self.client.watch(
+            self.pipeline,
+            full_document=self.full_document,
+            resume_after=token,
+            max_await_time_ms=MAX_AWAIT_MS
+        ) as stream:
+            if token is None:
+                self.on_fresh_start()
+                if stream.resume_token is not None:
+                    self.save_token(stream.resume_token)
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    self.apply(change)
+                    self.save_token(stream.resume_token)
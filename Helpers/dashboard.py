@@ -0,0 +1,240 @@
+import os
+from datetime import timezone
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
+import Helpers.helperfuncs as helperfuncs
+from Helpers.change_streams import ChangeStreamFollower, utcnow
+from Helpers.keyword_table import parse_searches, MISSING_SEARCHES
+
+DASHBOARD_DATABASE = "mappings"
+DASHBOARD_COLLECTION = "dashboards"
+UPDATER_ID = "dashboard"
+# Databases whose per-business collections feed the dashboard
+WATCHED_DATABASES = ("marketing_agent", "judge_data")
+WATCHED_OPERATIONS = ("insert", "update", "replace", "delete")
+TOP_KEYWORDS = 10
+BLURB_LENGTH = 1000
+# mappings.companies fields copied into the dashboard
+COMPANY_FIELDS = ('business_name', 'owner_ids', 'onboarded', 'keyword_weights')
+# Without change streams a dashboard is rebuilt on read once it is older than this
+REBUILD_SECONDS = 60
+
+def _keyword_entries(keywords):
+    if isinstance(keywords, dict):
+        return [(text, info if isinstance(info, dict) else {}) for text, info in keywords.items()]
+    if isinstance(keywords, list):
+        return [(keyword.get('text', ''), keyword) if isinstance(keyword, dict) else (str(keyword), {}) for keyword in keywords]
+    return []
+
+def marketing_summary(document):
+    """
+    Dashboard fields taken from a business's latest marketing_agent document.
+    """
+    document = document or {}
+    business = document.get('business') or ""
+    if not isinstance(business, str):
+        business = "\n".join(f"{key}: {value}" for key, value in business.items()) if isinstance(business, dict) else str(business)
+    personas = document.get('user_personas') or []
+    paths = document.get('list_of_paths_taken') or []
+    return {
+        'business_blurb': business[:BLURB_LENGTH],
+        'persona_count': len(personas) if isinstance(personas, list) else 1,
+        'research_path_count': len(paths) if isinstance(paths, list) else 1,
+    }
+
+def judge_summary(document):
+    """
+    Dashboard fields taken from a business's latest judge_data document.
+    """
+    document = document or {}
+    selected = _keyword_entries(document.get('selected_keywords'))
+    new = _keyword_entries(document.get('keywords'))
+    searches = {}
+    for text, info in selected + new:
+        if text:
+            searches[text] = max(searches.get(text, MISSING_SEARCHES), parse_searches(info.get('avg_monthly_searches')))
+    top = sorted((item for item in searches.items() if item[1] != MISSING_SEARCHES), key=lambda item: (-item[1], item[0]))[:TOP_KEYWORDS]
+    return {
+        'selected_keyword_count': len(selected),
+        'new_keyword_count': len(new),
+        'top_keywords': [{'text': text, 'avg_monthly_searches': count} for text, count in top],
+        'ad_variation_count': len(document.get('ad_variations') or []),
+        'finalized_ad_count': len(document.get('finalized_ad_text') or []),
+        'last_update': document.get('last_update', 'N/A'),
+    }
+
+SUMMARIES = {'marketing_agent': marketing_summary, 'judge_data': judge_summary}
+
+class DashboardStore:
+    """
+    One small summary document per business in mappings.dashboards, keyed by the lowercased
+    business name and indexed by owner id, so overview commands need a single read.
+
+    Args:
+    - client: pymongo MongoClient the business databases live on
+    """
+    def __init__(self, client):
+        self.client = client
+        self.dashboards = client[DASHBOARD_DATABASE][DASHBOARD_COLLECTION]
+        # Cleared when change streams are unavailable; readers then refresh on demand
+        self.live = True
+
+    def ensure_indexes(self):
+        self.dashboards.create_index('owner_ids')
+        self.dashboards.create_index('company_id')
+
+    def refresh_business(self, database, collection_name):
+        """
+        Recomputes the half of a business's dashboard that comes from `database`.
+        """
+        latest_document = helperfuncs.get_latest_document(self.client[database][collection_name])
+        fields = SUMMARIES[database](latest_document)
+        fields['updated_at'] = utcnow()
+        self.dashboards.update_one({'_id': collection_name.lower()}, {'$set': fields}, upsert=True)
+
+    def refresh_owners(self, company):
+        if not company or not company.get('business_name'):
+            return
+        dashboard_id = company['business_name'].lower()
+        owner_ids = company.get('owner_ids', [])
+        if owner_ids:
+            # An owner moved to this business no longer gets the dashboard of the one they left
+            self.dashboards.update_many(
+                {'_id': {'$ne': dashboard_id}, 'owner_ids': {'$in': owner_ids}},
+                {'$pull': {'owner_ids': {'$in': owner_ids}}}
+            )
+        self.dashboards.update_one(
+            {'_id': dashboard_id},
+            {'$set': {
+                'company_id': company.get('_id'),
+                'business_name': company['business_name'],
+                'owner_ids': owner_ids,
+                'onboarded': company.get('onboarded') == True,
+                'keyword_weights': company.get('keyword_weights')
+            }},
+            upsert=True
+        )
+
+    def remove_owners(self, company_id):
+        """
+        Revokes a deleted company's access: its dashboard keeps the business's summary but no
+        longer belongs to anyone.
+        """
+        self.dashboards.update_many({'company_id': company_id}, {'$unset': {'owner_ids': '', 'onboarded': ''}})
+
+    def rebuild(self, business_name):
+        company = self.client['mappings']['companies'].find_one({'business_name': business_name})
+        self.refresh_owners(company)
+        for database in WATCHED_DATABASES:
+            names = [name for name in self.client[database].list_collection_names() if name.lower() == business_name.lower()]
+            if names:
+                self.refresh_business(database, names[0])
+        self.dashboards.update_one({'_id': business_name.lower()}, {'$set': {'rebuilt_at': utcnow()}})
+
+    def rebuild_all(self):
+        for company in self.client['mappings']['companies'].find({}, {field: 1 for field in COMPANY_FIELDS}):
+            self.refresh_owners(company)
+        for database in WATCHED_DATABASES:
+            for name in self.client[database].list_collection_names():
+                self.refresh_business(database, name)
+
+    def for_owner(self, user_id):
+        return self.dashboards.find_one({'owner_ids': user_id})
+
+    def is_fresh(self, summary):
+        if self.live:
+            return True
+        rebuilt_at = summary.get('rebuilt_at')
+        if rebuilt_at is None:
+            return False
+        if rebuilt_at.tzinfo is None:
+            rebuilt_at = rebuilt_at.replace(tzinfo=timezone.utc)
+        return (utcnow() - rebuilt_at).total_seconds() < REBUILD_SECONDS
+
+    def summary_for(self, user_id):
+        """
+        The user's dashboard in one indexed read, rebuilt from the business's documents first
+        when it is missing, or when no change stream keeps it current and it is older than
+        REBUILD_SECONDS.
+
+        Returns:
+        - dict: the dashboard, or None if the user has no business
+        """
+        summary = self.for_owner(user_id)
+        if summary is None or not self.is_fresh(summary):
+            company = self.client['mappings']['companies'].find_one({'owner_ids': user_id}, {'business_name': 1})
+            if company and company.get('business_name'):
+                self.rebuild(company['business_name'])
+                summary = self.for_owner(user_id)
+        return summary
+
+    def apply_change(self, change):
+        """
+        Folds one change-stream event into the dashboards. Recomputing from the latest document
+        makes replays after a resume harmless.
+        """
+        if change.get('operationType') not in WATCHED_OPERATIONS:
+            return
+        namespace = change.get('ns', {})
+        database, collection_name = namespace.get('db'), namespace.get('coll')
+        if database == 'mappings' and collection_name == 'companies':
+            if change['operationType'] == 'delete':
+                # Deletes carry only the document's key
+                self.remove_owners(change.get('documentKey', {}).get('_id'))
+            else:
+                self.refresh_owners(change.get('fullDocument'))
+        elif database in WATCHED_DATABASES and collection_name:
+            self.refresh_business(database, collection_name)
+
+async def business_record(interaction, check_onboarded_status):
+    """
+    Resolves the business behind a per-business command. With dashboards kept current by a
+    change stream this is a single read of the user's dashboard, which carries the onboarding
+    status, the business name and the counts commands use to answer empty states without
+    loading the business's documents. Otherwise it is the onboarding check and the mappings
+    record.
+
+    Returns:
+    - tuple: (whether the user is onboarded, dashboard or mappings record or None)
+    """
+    user_id = interaction.user.id
+    store = getattr(interaction.client, 'dashboards', None)
+    if isinstance(store, DashboardStore) and store.live:
+        summary = store.summary_for(user_id)
+        return bool(summary and summary.get('onboarded')), summary
+    if not await check_onboarded_status(user_id):
+        return False, None
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    return True, mappings_collection.find_one({"owner_ids": user_id})
+
+def shows_none(record, *count_fields):
+    """
+    Returns:
+    - bool: the dashboard counts none of `count_fields`; mappings records carry no counts, so
+      they never do
+    """
+    return all(record.get(field) == 0 for field in count_fields)
+
+class DashboardUpdater(ChangeStreamFollower):
+    """
+    Keeps a DashboardStore current from a change stream over the business databases and
+    mappings.companies. With no usable resume token every dashboard is rebuilt first.
+    """
+    full_document = 'updateLookup'
+
+    def __init__(self, store):
+        super().__init__(store.client, UPDATER_ID, [{'$match': {'$or': [
+            {'ns.db': {'$in': list(WATCHED_DATABASES)}},
+            {'ns.db': 'mappings', 'ns.coll': 'companies'}
+        ]}}])
+        self.store = store
+
+    def apply(self, change):
+        self.store.apply_change(change)
+
+    def on_fresh_start(self):
+        self.store.rebuild_all()
+
+    def on_unsupported(self):
+        print("Dashboards will refresh on read.")
+        self.store.live = False
@@ -0,0 +1,46 @@
+import os
+import discord
+
+PROFILE_FULL = "full"
+PROFILE_LEAN = "lean"
+DEFAULT_PROFILE = PROFILE_FULL
+
+def build_intents(profile=DEFAULT_PROFILE):
+    if profile == PROFILE_LEAN:
+        # Guild events plus the content of onboarding messages; slash commands and buttons
+        # arrive as interactions and need no intent
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.message_content = True
+        return intents
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.dm_messages = True
+    intents.members = True
+    return intents
+
+def client_options(profile=None):
+    """
+    Intents and cache settings for the runtime profile picked by BOT_PROFILE.
+
+    "full" keeps discord.py's defaults: every member of every guild, the last 1000 messages and
+    DMs are cached. "lean" caches no other members, keeps no message cache and skips member
+    chunking on startup. The bot only needs the guild owner's id, which guild.owner_id
+    carries without any member cache.
+
+    Returns:
+    - dict: keyword arguments for the discord client
+    """
+    profile = profile or os.getenv("BOT_PROFILE", DEFAULT_PROFILE)
+    if profile not in (PROFILE_FULL, PROFILE_LEAN):
+        raise ValueError(f"Unknown BOT_PROFILE {profile!r}; expected {PROFILE_FULL!r} or {PROFILE_LEAN!r}")
+    intents = build_intents(profile)
+    if profile == PROFILE_FULL:
+        return {'intents': intents}
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'max_messages': None,
+        'chunk_guilds_at_startup': False,
+    }
@@ -1,16 +1,30 @@
 from datetime import datetime
-import aiohttp
 import discord
 from discord import ButtonStyle, Embed, TextStyle
 from discord.ui import Button, View, TextInput, Modal
 from collections import defaultdict
 from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
 import Helpers.helperfuncs as helperfuncs
+from Helpers.keyword_table import KeywordTable
+import Helpers.keyword_ranking as keyword_ranking
+import Helpers.keyword_dedupe as keyword_dedupe
+import Helpers.ad_text_store as ad_text_store
+import Helpers.ad_validation as ad_validation
+import Helpers.ad_similarity as ad_similarity
+import Helpers.job_queue as job_queue
+import Helpers.idempotency as idempotency
+import Helpers.autocomplete as autocomplete
+import Helpers.search_index as search_index
 import os
+import Helpers.metrics as metrics
 
 guild_business_data = defaultdict(dict)
 guild_states = {}
 
+GOOGLE_ADS_API_URL = os.getenv("GOOGLE_ADS_API_URL", "https://googleadsapicalls.onrender.com")
+# Ads sent per /create_ads request; 0 or 1 sends one /create_ad request per ad
+ADS_BATCH_SIZE = int(os.getenv("ADS_BATCH_SIZE", "0"))
+
 class ConfirmPricing(discord.ui.View):
     def __init__(self, guild_id, business_name, website_link):
         super().__init__()
@@ -35,9 +49,8 @@ class ConfirmPricing(discord.ui.View):
 
     async def handle_yes_response(self, interaction: discord.Interaction):
         guild = interaction.guild
-        owner = guild.owner
 
-        await interaction.response.send_message(f"A mapping has been made between your Discord ID: {owner.id} and your business {self.business_name}. This helps us remember you")
+        await interaction.response.send_message(f"A mapping has been made between your Discord ID: {guild.owner_id} and your business {self.business_name}. This helps us remember you")
 
         embed = discord.Embed(
             title="Let's book some time to complete your onboarding and chat more about your business",
@@ -132,6 +145,7 @@ class BusinessEditModal(Modal, title='Edit Business Information'):
             )
 
             if result.modified_count > 0 or result.upserted_id:
+                search_index.update_source(business_name, 'business', self.business_info.value)
                 await interaction.response.send_message(f"Business information updated successfully!", ephemeral=True)
             else:
                 await interaction.response.send_message(f"Failed to update business information.", ephemeral=True)
@@ -172,6 +186,10 @@ class ResearchPathsView(View):
         add_button.callback = self.add_path_callback
         self.add_item(add_button)
 
+    def go_to(self, index):
+        self.current_page = max(0, index) // self.per_page
+        self.update_buttons()
+
     async def previous_callback(self, interaction):
         self.current_page = max(0, self.current_page - 1)
         await self.update_message(interaction)
@@ -197,6 +215,8 @@ class ResearchPathsView(View):
             
             if result.modified_count > 0 or result.upserted_id:
                 self.paths.append(new_path)
+                autocomplete.set_items(self.business_name, 'research_paths', self.paths)
+                search_index.update_source(self.business_name, 'list_of_paths_taken', self.paths)
                 await interaction.response.send_message("New research path added successfully!", ephemeral=True)
                 await self.update_message(interaction)
             else:
@@ -246,6 +266,16 @@ class UserPersonaView(View):
         self.add_item(self.edit_button)
         self.add_item(self.delete_button)
 
+    def go_to(self, index):
+        self.current_page = min(max(0, index), max(0, len(self.personas) - 1))
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_button.disabled = (self.current_page == 0)
+        self.next_button.disabled = (self.current_page >= len(self.personas) - 1)
+        self.edit_button.disabled = (len(self.personas) == 0)
+        self.delete_button.disabled = (len(self.personas) == 0)
+
     async def previous_callback(self, interaction: discord.Interaction):
         self.current_page = max(0, self.current_page - 1)
         await self.update_message(interaction)
@@ -267,11 +297,7 @@ class UserPersonaView(View):
         await self.delete_persona(interaction)
 
     async def update_message(self, interaction):
-        self.previous_button.disabled = (self.current_page == 0)
-        self.next_button.disabled = (self.current_page == len(self.personas) - 1)
-        self.edit_button.disabled = (len(self.personas) == 0)
-        self.delete_button.disabled = (len(self.personas) == 0)
-        
+        self.update_buttons()
         embed = self.get_embed()
         await interaction.response.edit_message(embed=embed, view=self)
 
@@ -306,6 +332,8 @@ class UserPersonaView(View):
             if result.modified_count > 0 or result.upserted_id:
                 self.personas.append(persona_data)
                 self.current_page = len(self.personas) - 1
+                autocomplete.set_items(self.business_name, 'user_personas', self.personas)
+                search_index.update_source(self.business_name, 'user_personas', self.personas)
                 await interaction.response.send_message("New persona added successfully!", ephemeral=True)
                 await self.update_message(interaction)
             else:
@@ -325,6 +353,8 @@ class UserPersonaView(View):
             
             if result.modified_count > 0:
                 self.personas[self.current_page] = persona_data
+                autocomplete.set_items(self.business_name, 'user_personas', self.personas)
+                search_index.update_source(self.business_name, 'user_personas', self.personas)
                 await interaction.response.send_message("Persona updated successfully!", ephemeral=True)
                 await self.update_message(interaction)
             else:
@@ -345,6 +375,8 @@ class UserPersonaView(View):
             if result.modified_count > 0:
                 del self.personas[self.current_page]
                 self.current_page = max(0, self.current_page - 1)
+                autocomplete.set_items(self.business_name, 'user_personas', self.personas)
+                search_index.update_source(self.business_name, 'user_personas', self.personas)
                 await interaction.response.send_message("Persona deleted successfully!", ephemeral=True)
                 await self.update_message(interaction)
             else:
@@ -380,62 +412,153 @@ class PersonaModal(Modal):
         await self.callback(interaction, persona_data)
 
 class KeywordPaginationView(discord.ui.View):
-    def __init__(self, selected_keywords, new_keywords, collection, title, last_update):
+    toggle_page_size = 5
+    bulk_page_size = 25
+    keyword_categories = ("selected", "new", "clusters")
+    category_titles = {
+        "selected": "Previously Selected Keywords",
+        "new": "New Keywords",
+        "clusters": "Grouped Keywords"
+    }
+
+    def __init__(self, selected_keywords, new_keywords, collection, title, last_update, business_name=None, keyword_weights=None):
         super().__init__()
-        self.selected_keywords = self._normalize_keywords(selected_keywords)
-        self.new_keywords = self._normalize_keywords(new_keywords)
         self.collection = collection
         self.current_page = 0
-        self.per_page = 5
+        self.per_page = self.toggle_page_size
         self.current_keyword_type = "selected"
         self.last_update = last_update 
+        self.bulk_mode = False
+        self.business_name = business_name
+        self.keyword_weights = keyword_weights
+        self.ranked = False
+        self.scores = None
+        self.ranked_rows = None
 
-
-        self.selected_keywords_dict = {}  
         latest_document = helperfuncs.get_latest_document(self.collection)
         if latest_document and 'selected_keywords' in latest_document:
-            self.selected_keywords = self._normalize_keywords(latest_document['selected_keywords'])
-        
-        self.selected_keywords_dict = {kw['text']: kw for kw in self.selected_keywords}
+            selected_keywords = latest_document['selected_keywords']
+
+        # Keywords live in one columnar table; each category is a list of row indices into it
+        self.table, (self.selected_rows, self.new_rows) = KeywordTable.from_keywords(
+            self._normalize_keywords(selected_keywords),
+            self._normalize_keywords(new_keywords)
+        )
+        for row in self.selected_rows:
+            self.table.set_selected(row, True)
+
+        # Near-duplicates (plurals, word order, case) are grouped once per set of keyword rows
+        self.clusters = keyword_dedupe.get_keyword_clusters(self.business_name, self.table)
+        self.cluster_rows = self.clusters.representatives
 
         # Create persistent buttons
-        self.previous_button = discord.ui.Button(label="Previous", style=ButtonStyle.gray, disabled=True)
-        self.next_button = discord.ui.Button(label="Next", style=ButtonStyle.gray)
-        self.submit_button = discord.ui.Button(label="Submit", style=ButtonStyle.blurple)
+        self.previous_button = discord.ui.Button(label="Previous", style=ButtonStyle.gray, disabled=True, row=2)
+        self.next_button = discord.ui.Button(label="Next", style=ButtonStyle.gray, row=2)
+        self.submit_button = discord.ui.Button(label="Submit", style=ButtonStyle.blurple, row=2)
+        self.mode_button = discord.ui.Button(label="Bulk Select", style=ButtonStyle.secondary, row=2)
+        self.rank_button = discord.ui.Button(label="Rank by Score", style=ButtonStyle.secondary, row=2)
         
         # Add button callbacks
         self.previous_button.callback = self.previous_callback
         self.next_button.callback = self.next_callback
         self.submit_button.callback = self.submit_callback
+        self.mode_button.callback = self.mode_callback
+        self.rank_button.callback = self.rank_callback
 
          # Create select menu for keyword type
         self.keyword_type_select = discord.ui.Select(
             placeholder="Choose Keyword Category",
             options=[
                 discord.SelectOption(label="Previously Selected Keywords", value="selected"),
-                discord.SelectOption(label="New Keywords", value="new")
-            ]
+                discord.SelectOption(label="New Keywords", value="new"),
+                discord.SelectOption(label="Grouped Keywords", value="clusters", description="Near-duplicate keywords merged with their combined volume")
+            ],
+            row=0
         )
         self.keyword_type_select.callback = self.keyword_type_callback
-        
-        # Add persistent buttons to the view
-        self.add_item(self.keyword_type_select)
-        self.add_item(self.previous_button)
-        self.add_item(self.next_button)
-        self.add_item(self.submit_button)
-        self.add_toggle_buttons()
+
+        # Bulk mode components: one multi-select for the whole page plus page/category shortcuts
+        self.bulk_select = discord.ui.Select(placeholder="Select keywords on this page", min_values=0, custom_id="bulk_select", row=1)
+        self.bulk_select.callback = self.bulk_select_callback
+        self.select_page_button = discord.ui.Button(label="Select Page", style=ButtonStyle.green, row=3)
+        self.clear_page_button = discord.ui.Button(label="Clear Page", style=ButtonStyle.red, row=3)
+        self.select_all_button = discord.ui.Button(label="Select All", style=ButtonStyle.green, row=3)
+        self.clear_all_button = discord.ui.Button(label="Clear All", style=ButtonStyle.red, row=3)
+        self.select_page_button.callback = self.select_page_callback
+        self.clear_page_button.callback = self.clear_page_callback
+        self.select_all_button.callback = self.select_all_callback
+        self.clear_all_button.callback = self.clear_all_callback
+
+        # Toggle buttons are created once and re-pointed at the current page
+        self.toggle_buttons = [
+            discord.ui.Button(style=ButtonStyle.gray, label=f"Toggle {i+1}", custom_id=f"toggle_{i}", row=3)
+            for i in range(self.toggle_page_size)
+        ]
+
+        self.sync_components()
+
+    def current_rows(self):
+        row_lists = self.ranked_rows if self.ranked else (self.selected_rows, self.new_rows, self.cluster_rows)
+        return row_lists[self.keyword_categories.index(self.current_keyword_type)]
+
+    def apply_ranking(self):
+        # Ranked order is shared across views of the same business and keyword rows
+        self.scores, self.ranked_rows = keyword_ranking.get_ranked_rows(
+            self.business_name,
+            self.table,
+            (self.selected_rows, self.new_rows, self.cluster_rows),
+            self.keyword_weights
+        )
+
+    def display_rows(self, row):
+        # In the grouped category a row stands for its whole cluster
+        if self.current_keyword_type == "clusters":
+            return self.clusters.members(row)
+        return (row,)
+
+    def is_row_selected(self, row):
+        return all(self.table.is_selected(member) for member in self.display_rows(row))
+
+    def set_row_selected(self, row, selected):
+        for member in self.display_rows(row):
+            self.table.set_selected(member, selected)
+
+    def last_page(self, rows=None):
+        rows = self.current_rows() if rows is None else rows
+        return max(0, (len(rows) - 1) // self.per_page)
+
+    def page_bounds(self, rows=None):
+        rows = self.current_rows() if rows is None else rows
+        start = self.current_page * self.per_page
+        return start, min(start + self.per_page, len(rows))
+
+    def go_to_keyword(self, value):
+        """
+        Opens the category and page holding the keyword an autocomplete choice refers to.
+
+        Returns:
+        - bool: whether the keyword was found
+        """
+        for keyword_type, rows in (("selected", self.selected_rows), ("new", self.new_rows)):
+            for i, row in enumerate(rows):
+                if self.table.text(row).strip()[:autocomplete.CHOICE_LENGTH] == value:
+                    self.current_keyword_type = keyword_type
+                    self.ranked = False
+                    self.current_page = i // self.per_page
+                    self.sync_components()
+                    return True
+        return False
 
     async def previous_callback(self, interaction: discord.Interaction):
         self.current_page = max(0, self.current_page - 1)
         await self.update_message(interaction)
 
     async def next_callback(self, interaction: discord.Interaction):
-        keywords = self.selected_keywords if self.current_keyword_type == "selected" else self.new_keywords
-        self.current_page = min(len(keywords) // self.per_page, self.current_page + 1)
+        self.current_page = min(self.last_page(), self.current_page + 1)
         await self.update_message(interaction)
 
     async def submit_callback(self, interaction: discord.Interaction):
-        selected_keywords_list = list(self.selected_keywords_dict.values())
+        selected_keywords_list = self.table.selected_documents()
         latest_document = helperfuncs.get_latest_document(self.collection)
         if latest_document:
             result = self.collection.update_one(
@@ -459,12 +582,94 @@ class KeywordPaginationView(discord.ui.View):
         self.current_page = 0
         await self.update_message(interaction)
 
-    def add_toggle_buttons(self):
-        keywords = self.selected_keywords if self.current_keyword_type == "selected" else self.new_keywords
-        start = self.current_page * self.per_page
-        end = start + self.per_page
-        for i in range(start, min(end, len(keywords))):
-            self.add_item(discord.ui.Button(style=ButtonStyle.gray, label=f"Toggle {i+1-start}", custom_id=f"toggle_{i}"))
+    async def mode_callback(self, interaction: discord.Interaction):
+        first_visible = self.current_page * self.per_page
+        self.bulk_mode = not self.bulk_mode
+        self.per_page = self.bulk_page_size if self.bulk_mode else self.toggle_page_size
+        self.current_page = min(first_visible // self.per_page, self.last_page())
+        await self.update_message(interaction)
+
+    async def rank_callback(self, interaction: discord.Interaction):
+        self.ranked = not self.ranked
+        if self.ranked and self.ranked_rows is None:
+            self.apply_ranking()
+        self.current_page = 0
+        await self.update_message(interaction)
+
+    async def bulk_select_callback(self, interaction: discord.Interaction):
+        rows = self.current_rows()
+        start, end = self.page_bounds(rows)
+        chosen = {int(value) for value in self.bulk_select.values}
+        for i in range(start, end):
+            self.set_row_selected(rows[i], i in chosen)
+        await self.update_message(interaction)
+
+    async def select_page_callback(self, interaction: discord.Interaction):
+        self.set_range_selected(*self.page_bounds(), True)
+        await self.update_message(interaction)
+
+    async def clear_page_callback(self, interaction: discord.Interaction):
+        self.set_range_selected(*self.page_bounds(), False)
+        await self.update_message(interaction)
+
+    async def select_all_callback(self, interaction: discord.Interaction):
+        self.set_range_selected(0, len(self.current_rows()), True)
+        await self.update_message(interaction)
+
+    async def clear_all_callback(self, interaction: discord.Interaction):
+        self.set_range_selected(0, len(self.current_rows()), False)
+        await self.update_message(interaction)
+
+    def set_range_selected(self, start, end, selected):
+        rows = self.current_rows()
+        for i in range(start, end):
+            self.set_row_selected(rows[i], selected)
+
+    def build_bulk_options(self):
+        rows = self.current_rows()
+        start, end = self.page_bounds(rows)
+        options = []
+        for i in range(start, end):
+            row = rows[i]
+            options.append(discord.SelectOption(
+                label=self.table.text(row)[:100],
+                value=str(i),
+                description=f"Searches: {self.searches_label(row)} | Competition: {self.table.competition_label(row)}"[:100],
+                default=self.is_row_selected(row)
+            ))
+        return options
+
+    def sync_components(self):
+        """
+        Brings the view's children in line with the current mode and page without rebuilding it.
+        Persistent items are only added or removed when they need to appear or disappear;
+        everything else is updated in place.
+        """
+        start, end = self.page_bounds()
+        self.previous_button.disabled = (self.current_page == 0)
+        self.next_button.disabled = (self.current_page >= self.last_page())
+        self.mode_button.label = "Toggle Mode" if self.bulk_mode else "Bulk Select"
+        self.rank_button.label = "Stored Order" if self.ranked else "Rank by Score"
+
+        wanted = [self.keyword_type_select, self.previous_button, self.next_button, self.submit_button, self.mode_button, self.rank_button]
+        if self.bulk_mode:
+            options = self.build_bulk_options()
+            if options:
+                self.bulk_select.options = options
+                self.bulk_select.max_values = len(options)
+                wanted.append(self.bulk_select)
+            wanted.extend([self.select_page_button, self.clear_page_button, self.select_all_button, self.clear_all_button])
+        else:
+            for slot, button in enumerate(self.toggle_buttons):
+                button.custom_id = f"toggle_{start + slot}"
+            wanted.extend(self.toggle_buttons[:end - start])
+
+        for item in list(self.children):
+            if item not in wanted:
+                self.remove_item(item)
+        for item in wanted:
+            if item not in self.children:
+                self.add_item(item)
 
     def _normalize_keywords(self, keywords):
         if isinstance(keywords, dict):
@@ -474,99 +679,60 @@ class KeywordPaginationView(discord.ui.View):
         else:
             raise ValueError("Invalid keyword format")
 
+    def searches_label(self, row):
+        if self.current_keyword_type == "clusters":
+            searches = self.clusters.combined_searches(row, self.table)
+            return 'N/A' if searches < 0 else searches
+        return self.table.searches_label(row)
+
     async def update_message(self, interaction):
-        self.clear_items()
-        
-        self.add_item(self.keyword_type_select)
-        self.add_item(self.previous_button)
-        self.add_item(self.next_button)
-        self.add_item(self.submit_button)
-        
-        keywords = self.selected_keywords if self.current_keyword_type == "selected" else self.new_keywords
-        self.previous_button.disabled = (self.current_page == 0)
-        self.next_button.disabled = (self.current_page == len(keywords) // self.per_page)
-        
-        self.add_toggle_buttons()
-        
+        self.sync_components()
         embed = self.get_embed()
         await interaction.response.edit_message(embed=embed, view=self)
 
     def get_embed(self):
-        keywords = self.selected_keywords if self.current_keyword_type == "selected" else self.new_keywords
-        start = self.current_page * self.per_page
-        end = start + self.per_page
-        
-        if isinstance(keywords, dict):
-            keywords_list = list(keywords.items())
-        else:
-            keywords_list = keywords
-        
-        current_keywords = keywords_list[start:end]
+        rows = self.current_rows()
+        start, end = self.page_bounds(rows)
 
-        title = "Previously Selected Keywords" if self.current_keyword_type == "selected" else "New Keywords"
+        title = self.category_titles[self.current_keyword_type]
         embed = discord.Embed(title=title, color=discord.Color.blue())
         embed.description = "Use the menu above to switch between keyword categories."
-
-        for keyword in current_keywords:
-            if isinstance(keyword, tuple): 
-                key, value = keyword
-                status = "✅" if key in self.selected_keywords_dict else "❌"
-                embed.add_field(name=f"{key} [{status}]", value=str(value), inline=False)
-            elif isinstance(keyword, dict) and 'text' in keyword:
-                status = "✅" if keyword['text'] in self.selected_keywords_dict else "❌"
-                value = f"Avg. Monthly Searches: {keyword.get('avg_monthly_searches', 'N/A')}\nCompetition: {keyword.get('competition', 'N/A')}"
-                if self.current_keyword_type == "new":
-                    value += f"\nLast Update: {self.last_update}"  
-                embed.add_field(name=f"{keyword['text']} [{status}]", value=value, inline=False)
-            elif isinstance(keyword, str):
-                status = "✅" if keyword in self.selected_keywords_dict else "❌"
-                embed.add_field(name=f"{keyword} [{status}]", value="Previously selected keyword", inline=False)
-
-        total_pages = (len(keywords_list) - 1) // self.per_page + 1
-        embed.set_footer(text=f"Page {self.current_page + 1}/{total_pages}")
+        if self.bulk_mode:
+            embed.description += " Pick keywords from the multi-select to change a whole page at once."
+
+        for row in rows[start:end]:
+            status = "✅" if self.is_row_selected(row) else "❌"
+            members = self.display_rows(row)
+            if len(members) > 1:
+                name = f"{self.table.text(row)} (+{len(members) - 1} variants) [{status}]"
+                value = f"Combined Monthly Searches: {self.searches_label(row)}\nCompetition: {self.table.competition_label(row)}"
+                value += "\nVariants: " + ", ".join(self.table.text(member) for member in members if member != row)
+            else:
+                name = f"{self.table.text(row)} [{status}]"
+                value = f"Avg. Monthly Searches: {self.table.searches_label(row)}\nCompetition: {self.table.competition_label(row)}"
+            if self.ranked:
+                value += f"\nScore: {self.scores[row]:.2f}"
+            if self.current_keyword_type == "new" and not self.bulk_mode:
+                value += f"\nLast Update: {self.last_update}"  
+            embed.add_field(name=name[:256], value=value[:1024], inline=False)
+
+        total_pages = self.last_page(rows) + 1
+        embed.set_footer(text=f"Page {self.current_page + 1}/{total_pages} | {self.table.selected_count()} selected")
         return embed
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
             if interaction.data['custom_id'].startswith('toggle_'):
                 index = int(interaction.data['custom_id'].split('_')[1])
-                keywords = self.selected_keywords if self.current_keyword_type == "selected" else self.new_keywords
-                
-                # Convert keywords to a list if it's a dictionary
-                if isinstance(keywords, dict):
-                    keywords_list = list(keywords.items())
-                else:
-                    keywords_list = keywords
+                rows = self.current_rows()
                 
-                if index < len(keywords_list):
-                    keyword = keywords_list[index]
-                    
-                    if isinstance(keyword, tuple):  
-                        keyword_text = keyword[0]
-                        keyword_data = keyword[1]
-                    elif isinstance(keyword, dict) and 'text' in keyword:
-                        keyword_text = keyword['text']
-                        keyword_data = keyword
-                    elif isinstance(keyword, str):
-                        keyword_text = keyword
-                        keyword_data = {'text': keyword}
-                    else:
-                        return False 
-                    
-                    if keyword_text in self.selected_keywords_dict:
-                        del self.selected_keywords_dict[keyword_text]
-                    else:
-                        self.selected_keywords_dict[keyword_text] = {
-                            'text': keyword_text,
-                            'avg_monthly_searches': keyword_data.get('avg_monthly_searches', 'N/A'),
-                            'competition': keyword_data.get('competition', 'N/A')
-                        }
-                    
+                if index < len(rows):
+                    self.set_row_selected(rows[index], not self.is_row_selected(rows[index]))
                     await self.update_message(interaction)
                 return False
             return True 
      
 class AdTextView(View):
-    def __init__(self, ad_variations, finalized_ad_texts, collection, last_update):
+    def __init__(self, ad_variations, finalized_ad_texts, collection, last_update, document_id=None, version=0):
         super().__init__()
         self.ad_variations = ad_variations
         self.headlines = [variation['headlines'] for variation in ad_variations]
@@ -574,7 +740,10 @@ class AdTextView(View):
         self.finalized_ad_texts = finalized_ad_texts
         self.collection = collection
         self.last_update = last_update
+        self.document_id = document_id
+        self.version = version
         self.current_page = 0
+        self.current_subindex = 0
         self.total_ads = min(len(self.headlines), len(self.descriptions))
         self.current_type = "new" 
         
@@ -608,6 +777,14 @@ class AdTextView(View):
         self.add_item(self.edit_button)
         self.add_item(self.delete_button)
 
+    def current_ad_id(self):
+        if self.current_page < len(self.ad_variations):
+            return self.ad_variations[self.current_page].get('id')
+        return None
+
+    def get_finalized_ad(self, ad_id):
+        return next((fad for fad in self.finalized_ad_texts if fad.get('id') == ad_id), None)
+
     async def delete_callback(self, interaction: discord.Interaction):
         confirm_button = Button(style=ButtonStyle.danger, label="Confirm Delete")
         cancel_button = Button(style=ButtonStyle.secondary, label="Cancel")
@@ -629,36 +806,31 @@ class AdTextView(View):
 
     async def perform_delete(self, interaction: discord.Interaction):
         try:
-            latest_document = helperfuncs.get_latest_document(self.collection)
-            if not latest_document:
-                await interaction.response.send_message("No document found to delete from.", ephemeral=True)
+            ad_id = self.current_ad_id()
+            if self.document_id is None or ad_id is None:
+                await interaction.response.edit_message(content="No ad found to delete.", view=None)
                 return
 
-            if self.current_type == "new":
-                # Delete from ad_variations
-                update = {"$pull": {"ad_variations": {"headline": self.headlines[self.current_page]}}}
-                result = self.collection.update_one({'_id': latest_document['_id']}, update)
-                
-                if result.modified_count > 0:
-                    del self.ad_variations[self.current_page]
-                    del self.headlines[self.current_page]
-                    del self.descriptions[self.current_page]
-                    self.total_ads -= 1
-            else:
-                # Delete from finalized_ad_text
-                update = {"$pull": {"finalized_ad_text": {"index": self.current_page}}}
-                result = self.collection.update_one({'_id': latest_document['_id']}, update)
-                
-                if result.modified_count > 0:
-                    self.finalized_ad_texts = [ad for ad in self.finalized_ad_texts if ad['index'] != self.current_page]
+            finalized_only = self.current_type != "new"
+            if finalized_only and self.get_finalized_ad(ad_id) is None:
+                await interaction.response.edit_message(content="This ad has no finalized text to delete.", view=None)
+                return
 
-            if result.modified_count > 0:
-                await interaction.response.edit_message(content="Ad successfully deleted.", view=None)
-                self.current_page = max(0, min(self.current_page, self.total_ads - 1))
-                await self.update_parent_message(interaction)
-            else:
-                await interaction.response.edit_message(content="Failed to delete the ad. No changes were made.", view=None)
+            self.version = ad_text_store.delete_ad(self.collection, self.document_id, self.version, ad_id, finalized_only=finalized_only)
+
+            self.finalized_ad_texts = [fad for fad in self.finalized_ad_texts if fad.get('id') != ad_id]
+            if not finalized_only:
+                del self.ad_variations[self.current_page]
+                del self.headlines[self.current_page]
+                del self.descriptions[self.current_page]
+                self.total_ads -= 1
+
+            await interaction.response.edit_message(content="Ad successfully deleted.", view=None)
+            self.current_page = max(0, min(self.current_page, self.total_ads - 1))
+            await self.update_parent_message(interaction)
 
+        except ad_text_store.AdTextConflict as e:
+            await interaction.response.edit_message(content=f"{e} Nothing was deleted. Run /adtext again to see the latest ads.", view=None)
         except Exception as e:
             await interaction.response.edit_message(content=f"An error occurred while deleting the ad: {str(e)}", view=None)
 
@@ -681,16 +853,18 @@ class AdTextView(View):
 
     async def edit_callback(self, interaction: discord.Interaction):
         try:
-            headline = self.headlines[self.current_page]
-            description = self.descriptions[self.current_page]
+            headlines = self.headlines[self.current_page]
+            descriptions = self.descriptions[self.current_page]
+            headline = headlines[self.current_subindex % len(headlines)]
+            description = descriptions[self.current_subindex % len(descriptions)]
             
-            finalized_ad = next((fad for fad in self.finalized_ad_texts if fad.get('index') == self.current_page), None)
+            finalized_ad = self.get_finalized_ad(self.current_ad_id())
             is_finalized = finalized_ad is not None
             if finalized_ad:
                 headline = finalized_ad['headline']
                 description = finalized_ad['description']
             
-            modal = AdEditModal(headline, description, self.current_page, self.collection, self, is_finalized)
+            modal = AdEditModal(headline, description, self.current_page, self.collection, self, is_finalized, ad_id=self.current_ad_id())
             await interaction.response.send_modal(modal)
         except Exception as e:
             await interaction.response.send_message(f"An error occurred while opening the edit modal: {str(e)}", ephemeral=True)
@@ -717,20 +891,15 @@ class AdTextView(View):
                 description = "No description"
                 footer_text = f"Ad {self.current_page + 1} of {self.total_ads} | Last Update: {self.last_update}"
         else:
-            finalized_ad = next((fad for fad in self.finalized_ad_texts if fad['index'] == self.current_page), None)
+            title = f"Finalized Ad Variation {self.current_page + 1}"
+            finalized_ad = self.get_finalized_ad(self.current_ad_id())
             if finalized_ad:
-                title = f"Finalized Ad Variation {self.current_page + 1}"
-                if self.current_page < len(self.ad_variations):
-                    current_variation = self.ad_variations[self.current_page]
-                    headlines = current_variation['headlines']
-                    descriptions = current_variation['descriptions']
-                    headline = headlines[self.current_subindex % len(headlines)]
-                    description = descriptions[self.current_subindex % len(descriptions)]
-                    footer_text = f"Ad {self.current_page + 1} of {self.total_ads} | Variation {self.current_subindex + 1} of {len(headlines)}"
-                else:
-                    headline = 'No headline'
-                    description = 'No description'
-                    footer_text = f"Ad {self.current_page + 1} of {self.total_ads}"
+                headline = finalized_ad['headline']
+                description = finalized_ad['description']
+            else:
+                headline = 'No finalized headline'
+                description = 'No finalized description'
+            footer_text = f"Ad {self.current_page + 1} of {self.total_ads}"
 
         embed = Embed(title=title, color=discord.Color.blue())
         embed.add_field(name="Headline", value=headline, inline=False)
@@ -739,9 +908,10 @@ class AdTextView(View):
         return embed
     
 class AdEditModal(Modal):
-    def __init__(self, headline, description, index, collection, view, is_finalized=False):
+    def __init__(self, headline, description, index, collection, view, is_finalized=False, ad_id=None):
         super().__init__(title='Edit Ad Text')
         self.index = index
+        self.ad_id = ad_id
         self.collection = collection
         self.view = view
         self.is_finalized = is_finalized
@@ -749,7 +919,7 @@ class AdEditModal(Modal):
         self.warning = TextInput(
             label='Warning (do not edit)',
             style=TextStyle.short,
-            default=self.get_warning_text(headline, description),
+            default=self.get_warning_text(headline, description)[:100],
             required=False,
             max_length=100
         )
@@ -774,13 +944,11 @@ class AdEditModal(Modal):
         self.add_item(self.headline)
         self.add_item(self.description)
 
+    def get_violations(self, headline, description):
+        return ad_validation.validate_text(headline, 'headlines') + ad_validation.validate_text(description, 'descriptions')
+
     def get_warning_text(self, headline, description):
-        warnings = []
-        if len(headline) > 30:
-            warnings.append(f"Headline exceeds limit by {len(headline) - 30} characters")
-        if len(description) > 90:
-            warnings.append(f"Description exceeds limit by {len(description) - 90} characters")
-        return " | ".join(warnings) if warnings else "No warnings"
+        return ad_validation.format_violations(self.get_violations(headline, description))
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
@@ -789,11 +957,7 @@ class AdEditModal(Modal):
 
             warning_text = self.get_warning_text(new_headline, new_description)
             
-            errors = []
-            if len(new_headline) > 30:
-                errors.append(f"Headline exceeds 30 characters (current: {len(new_headline)})")
-            if len(new_description) > 90:
-                errors.append(f"Description exceeds 90 characters (current: {len(new_description)})")
+            errors = [violation.message for violation in self.get_violations(new_headline, new_description)]
 
             if errors:
                 error_message = "Cannot save ad text. Please correct the following:\n" + "\n".join(errors)
@@ -802,45 +966,29 @@ class AdEditModal(Modal):
 
             await interaction.response.defer(ephemeral=True)
 
+            if self.view.document_id is None or self.ad_id is None:
+                await interaction.followup.send("Failed to save ad: no document found for this ad.", ephemeral=True)
+                return
+
+            try:
+                self.view.version = ad_text_store.save_finalized_ad(
+                    self.collection, self.view.document_id, self.view.version, self.ad_id, new_headline, new_description
+                )
+            except ad_text_store.AdTextConflict as e:
+                await interaction.followup.send(f"{e} Your edit was not saved. Run /adtext again to see the latest version.", ephemeral=True)
+                return
+
             new_finalized_ad = {
-                'index': self.index,
+                'id': self.ad_id,
                 'headline': new_headline,
                 'description': new_description
             }
+            self.view.finalized_ad_texts = [fad for fad in self.view.finalized_ad_texts if fad.get('id') != self.ad_id]
+            self.view.finalized_ad_texts.append(new_finalized_ad)
 
-            latest_document = helperfuncs.get_latest_document(self.collection)
-
-            if latest_document:
-                if 'finalized_ad_text' not in latest_document or not isinstance(latest_document['finalized_ad_text'], list):
-                    update = {"$set": {"finalized_ad_text": [new_finalized_ad]}}
-                else:
-                    existing_finalized_ads = [ad for ad in latest_document['finalized_ad_text'] if ad.get('index') != self.index]
-                    existing_finalized_ads.append(new_finalized_ad)
-                    update = {"$set": {"finalized_ad_text": existing_finalized_ads}}
-
-                result = self.collection.update_one({'_id': latest_document['_id']}, update)
-
-                if result.modified_count > 0:
-                    self.view.finalized_ad_texts = [fad for fad in self.view.finalized_ad_texts if fad.get('index') != self.index]
-                    self.view.finalized_ad_texts.append(new_finalized_ad)
-                    
-                    embed = self.view.get_embed()
-                    await interaction.followup.edit_message(message_id=interaction.message.id, embed=embed, view=self.view)
-                    await interaction.followup.send(f"Ad {self.index + 1} finalized and saved to the database successfully!", ephemeral=True)
-                else:
-                    await interaction.followup.send("No changes were made to the database.", ephemeral=True)
-            else:
-                new_document = {
-                    "finalized_ad_text": [new_finalized_ad]
-                }
-                result = self.collection.insert_one(new_document)
-                if result.inserted_id:
-                    self.view.finalized_ad_texts.append(new_finalized_ad)
-                    embed = self.view.get_embed()
-                    await interaction.followup.edit_message(message_id=interaction.message.id, embed=embed, view=self.view)
-                    await interaction.followup.send(f"Ad {self.index + 1} finalized and saved to a new document in the database.", ephemeral=True)
-                else:
-                    await interaction.followup.send(f"Failed to save ad to the database.", ephemeral=True)
+            embed = self.view.get_embed()
+            await interaction.followup.edit_message(message_id=interaction.message.id, embed=embed, view=self.view)
+            await interaction.followup.send(f"Ad {self.index + 1} finalized and saved to the database successfully!", ephemeral=True)
 
             if warning_text != "No warnings":
                 await interaction.followup.send(f"Warning: {warning_text}. Changes have been saved, but may be truncated in some displays.", ephemeral=True)
@@ -868,7 +1016,7 @@ class AuthCompletedView(discord.ui.View):
             business_name = user_record["business_name"]
 
         
-        async with aiohttp.ClientSession() as session:
+        async with metrics.client_session() as session:
             async with session.get(f'https://googleadsapicalls.onrender.com/check_auth_status/{self.state}') as response:
                 if response.status == 200:
                     result = await response.json()
@@ -908,7 +1056,7 @@ class AuthCompletedView(discord.ui.View):
             "credentials": self.credentials
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with metrics.client_session() as session:
             async with session.post('https://googleadsapicalls.onrender.com/get_campaigns', json=request_data) as response:
                 if response.status == 200:
                     campaigns = await response.json()
@@ -943,67 +1091,250 @@ class CampaignCreationModal(discord.ui.Modal, title='Create New Campaign'):
         await interaction.response.defer(ephemeral=True)
         try:
             daily_budget = float(self.daily_budget.value)
-            start_date = datetime.datetime.strptime(self.start_date.value, "%Y-%m-%d").date()
-            end_date = datetime.datetime.strptime(self.end_date.value, "%Y-%m-%d").date()
-            
-            campaign_data = {
-                "campaign_name": self.campaign_name.value,
-                "daily_budget": daily_budget,
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "customer_id": interaction.client.customer_id,
-                "credentials": interaction.client.credentials
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post('https://googleadsapicalls.onrender.com//create_campaign', json=campaign_data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        await interaction.followup.send(f"Campaign created successfully! Campaign ID: {result['campaign_id']}", ephemeral=True)
-                        CONNECTION_STRING = os.getenv("CONNECTION_STRING")
-                        mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
-                        user_record = mappings_collection.find_one({"owner_ids": interaction.user.id})        
-                        if user_record and "business_name" in user_record:
-                            business_name = user_record["business_name"]
-
-                        ad_variations = await helperfuncs.fetch_ad_variations(business_name)
-                        if ad_variations and 'ad_variation' in ad_variations:
-                            view = AdVariationView(
-                                ad_variations['ad_variation'],
-                                interaction.client.customer_id,
-                                interaction.client.credentials,
-                                self.campaign_name.value
-                            )
-                            embed = view.get_embed()
-                            await interaction.followup.send(
-                                "Please review and select the ad variations for this campaign:",
-                                embed=embed,
-                                view=view,
-                                ephemeral=True
-                            )
-                        else:
-                            await interaction.followup.send(
-                                "Failed to fetch ad variations. Please try again later.",
-                                ephemeral=True
-                            )
-                    else:
-                        error_details = await response.text()
-                        await interaction.followup.send(f"Failed to create campaign. Error: {error_details}", ephemeral=True)
+            start_date = datetime.strptime(self.start_date.value, "%Y-%m-%d").date()
+            end_date = datetime.strptime(self.end_date.value, "%Y-%m-%d").date()
         except ValueError as e:
             await interaction.followup.send(f"Invalid input: {str(e)}", ephemeral=True)
+            return
+
+        try:
+            CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+            mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+            user_record = mappings_collection.find_one({"owner_ids": interaction.user.id}) or {}
+
+            payload = {
+                "campaign_data": {
+                    "campaign_name": self.campaign_name.value,
+                    "daily_budget": daily_budget,
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "customer_id": interaction.client.customer_id
+                },
+                "credentials_ref": helperfuncs.credentials_ref(user_record.get("business_name"), interaction.client.customer_id),
+                "business_name": user_record.get("business_name"),
+                "business_website": user_record.get("website_link")
+            }
+            await job_queue.submit(interaction, 'create_campaign', payload, f"Creating campaign '{self.campaign_name.value}'",
+                                   secrets={"credentials": interaction.client.credentials})
         except Exception as e:
             await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
 
+async def create_campaign_request(campaign_data, ledger, key):
+    """
+    Creates a campaign through the Google Ads service and records the outcome under `key`.
+
+    Returns:
+    - the new campaign's id
+    """
+    try:
+        async with metrics.client_session() as session:
+            async with session.post(f'{GOOGLE_ADS_API_URL}/create_campaign', json=campaign_data, headers={'Idempotency-Key': key}) as response:
+                if response.status != 200:
+                    error_details = await response.text()
+                    if response.status >= 500:
+                        raise RuntimeError(f"Failed to create campaign. Error: {error_details}")
+                    raise job_queue.JobFailed(f"Failed to create campaign. Error: {error_details}")
+                result = await response.json()
+    except Exception as e:
+        if ledger:
+            ledger.abandon(key, str(e))
+        raise
+    if ledger:
+        ledger.complete(key, {'campaign_id': result['campaign_id']})
+    return result['campaign_id']
+
+@job_queue.job_handler('create_campaign')
+async def run_create_campaign_job(context):
+    """
+    Creates the campaign, then offers the business's ad variations for it. The campaign id is
+    checkpointed, and the creation is claimed in the idempotency ledger, so neither a retry
+    nor a repeated submission creates the campaign twice.
+    """
+    payload = context.payload
+    credentials = await helperfuncs.job_credentials(context)
+    campaign_data = dict(payload["campaign_data"], credentials=credentials)
+    campaign_id = context.checkpoint.get("campaign_id")
+    if campaign_id is None:
+        ledger = idempotency.get_ledger(context.client)
+        key = idempotency.campaign_key(campaign_data)
+        existing = ledger.begin(key, 'campaign', owner=context.job_id) if ledger else None
+        if existing is not None:
+            if existing['state'] != idempotency.LEDGER_SUCCEEDED:
+                raise job_queue.JobFailed(f"This campaign is already being created by job {existing.get('owner')}.")
+            campaign_id = existing['result']['campaign_id']
+        else:
+            campaign_id = await create_campaign_request(campaign_data, ledger, key)
+        await context.progress(f"Campaign created successfully! Campaign ID: {campaign_id}. Fetching ad variations...", campaign_id=campaign_id)
+
+    ad_variations = await helperfuncs.fetch_ad_variations(payload["business_name"])
+    if not ad_variations or 'ad_variation' not in ad_variations:
+        raise RuntimeError("Failed to fetch ad variations")
+    if context.followup is None:
+        return f"Campaign created successfully! Campaign ID: {campaign_id}. Use /createad to choose ad variations for it."
+
+    view = AdVariationView(
+        ad_variations['ad_variation'],
+        campaign_data["customer_id"],
+        credentials,
+        campaign_data["campaign_name"],
+        payload["business_website"],
+        business_name=payload["business_name"]
+    )
+    await context.followup.send(
+        "Please review and select the ad variations for this campaign:",
+        embed=view.get_embed(),
+        view=view,
+        ephemeral=True
+    )
+    return f"Campaign created successfully! Campaign ID: {campaign_id}"
+
+async def send_ad_variations(followup, campaign, customer_id, credentials, business_name, business_website):
+    """
+    Fetches the business's ad variations and sends the picker for the chosen campaign on a
+    follow-up webhook.
+    """
+    ad_variations = await helperfuncs.fetch_ad_variations(business_name)
+    if ad_variations and 'ad_variation' in ad_variations:
+        view = AdVariationView(
+            ad_variations['ad_variation'],
+            customer_id,
+            credentials,
+            campaign['name'],
+            business_website,
+            business_name=business_name
+        )
+        await followup.send(
+            "Please review and select the ad variations for this campaign:",
+            embed=view.get_embed(),
+            view=view,
+            ephemeral=True
+        )
+    else:
+        await followup.send("Failed to fetch ad variations. Please try again later.", ephemeral=True)
+
+def campaign_details(campaign):
+    return (
+        f"You selected: {campaign['name']}\n"
+        f"Campaign ID: {campaign['id']}\n"
+        f"Budget: ${campaign['budget']:.2f}"
+    )
+
+class CampaignSearchModal(Modal, title='Search Campaigns'):
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+        self.query = TextInput(
+            label='Campaign name or ID',
+            style=TextStyle.short,
+            placeholder='Start of any word in the campaign or account name',
+            default=view.query or None,
+            required=False,
+            max_length=100
+        )
+        self.add_item(self.query)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.view.set_query(self.query.value)
+        await interaction.response.edit_message(content=self.view.get_content(), view=self.view)
+
+class CampaignSelectView(View):
+    """
+    Campaign picker over a CampaignIndex, 25 campaigns per page with a name search, so
+    every campaign is reachable however many accounts a customer has.
+    """
+    per_page = 25
+
+    def __init__(self, index, customer_id, credentials, business_name, business_website):
+        super().__init__()
+        self.index = index
+        self.customer_id = customer_id
+        self.credentials = credentials
+        self.business_name = business_name
+        self.business_website = business_website
+        self.query = ""
+        self.results = index.campaigns
+        self.current_page = 0
+
+        self.campaign_select = discord.ui.Select(placeholder="Choose a campaign", options=[discord.SelectOption(label="-")], row=0)
+        self.campaign_select.callback = self.campaign_selected
+        self.previous_button = Button(label="Previous", style=ButtonStyle.gray, row=1)
+        self.previous_button.callback = self.previous_callback
+        self.next_button = Button(label="Next", style=ButtonStyle.gray, row=1)
+        self.next_button.callback = self.next_callback
+        self.search_button = Button(label="Search", style=ButtonStyle.primary, row=1)
+        self.search_button.callback = self.search_callback
+        for item in (self.campaign_select, self.previous_button, self.next_button, self.search_button):
+            self.add_item(item)
+        self.update_components()
+
+    def last_page(self):
+        return max(0, (len(self.results) - 1) // self.per_page)
+
+    def set_query(self, query):
+        self.query = (query or "").strip()
+        self.results = self.index.search(self.query)
+        self.current_page = 0
+        self.update_components()
+
+    def update_components(self):
+        start = self.current_page * self.per_page
+        page = self.results[start:start + self.per_page]
+        if page:
+            self.campaign_select.options = [
+                discord.SelectOption(
+                    label=f"{campaign['name']} (Budget: ${campaign['budget']:.2f})"[:100],
+                    value=str(campaign['id']),
+                    description=f"Campaign ID: {campaign['id']}"[:100]
+                ) for campaign in page
+            ]
+            self.campaign_select.disabled = False
+        else:
+            self.campaign_select.options = [discord.SelectOption(label="No campaigns match your search", value="none")]
+            self.campaign_select.disabled = True
+        self.previous_button.disabled = self.current_page == 0
+        self.next_button.disabled = self.current_page >= self.last_page()
+
+    def get_content(self):
+        matching = f" matching '{self.query}'" if self.query else ""
+        return (f"Please select a campaign to post your ad to "
+                f"(page {self.current_page + 1} of {self.last_page() + 1}, {len(self.results)} campaigns{matching}):")
+
+    async def previous_callback(self, interaction: discord.Interaction):
+        self.current_page = max(0, self.current_page - 1)
+        self.update_components()
+        await interaction.response.edit_message(content=self.get_content(), view=self)
+
+    async def next_callback(self, interaction: discord.Interaction):
+        self.current_page = min(self.last_page(), self.current_page + 1)
+        self.update_components()
+        await interaction.response.edit_message(content=self.get_content(), view=self)
+
+    async def search_callback(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(CampaignSearchModal(self))
+
+    async def campaign_selected(self, interaction: discord.Interaction):
+        selected_campaign = self.index.get(self.campaign_select.values[0])
+        if not selected_campaign:
+            await interaction.response.send_message("Error: Campaign not found", ephemeral=True)
+            return
+        await interaction.response.send_message(campaign_details(selected_campaign), ephemeral=True)
+        await send_ad_variations(interaction.followup, selected_campaign, self.customer_id, self.credentials, self.business_name, self.business_website)
+
 class AdVariationView(View):
-    def __init__(self, ad_variations, customer_id, credentials, campaign_name, business_website):
+    def __init__(self, ad_variations, customer_id, credentials, campaign_name, business_website, business_name=None):
         super().__init__()
-        self.ad_variations = ad_variations
+        # Near-duplicate variations are collapsed so each distinct ad is shown only once
+        self.ad_variations, self.similar_counts = ad_similarity.collapse_similar_ads(ad_variations)
+        self.hidden_count = sum(self.similar_counts.values())
         self.customer_id = customer_id
         self.credentials = credentials
         self.campaign_name = campaign_name
         self.current_index = 0
         self.selected_ads = set()
         self.business_website = business_website
+        self.business_name = business_name
+        # Every variation is checked up front so invalid ads are flagged before anything is sent
+        self.violations = ad_validation.validate_ads(self.ad_variations)
 
         self.add_item(Button(label="Previous", style=discord.ButtonStyle.gray, custom_id="previous"))
         self.add_item(Button(label="Next", style=discord.ButtonStyle.gray, custom_id="next"))
@@ -1019,7 +1350,7 @@ class AdVariationView(View):
         elif interaction.data["custom_id"] == "select":
             if self.current_index in self.selected_ads:
                 self.selected_ads.remove(self.current_index)
-            else:
+            elif self.current_index not in self.violations:
                 self.selected_ads.add(self.current_index)
         elif interaction.data["custom_id"] == "edit":
             modal = AdVariationEditModal(self.ad_variations[self.current_index], self.current_index)
@@ -1027,7 +1358,7 @@ class AdVariationView(View):
             await modal.wait()
             if modal.result:
                 index, updated_ad = modal.result
-                self.ad_variations[index] = updated_ad
+                self.set_ad(index, updated_ad)
                 self.selected_ads.add(index)
                 await self.finish_selection(interaction)
             return True
@@ -1043,8 +1374,16 @@ class AdVariationView(View):
         modal = AdVariationEditModal(current_ad, self.current_index)
         await interaction.response.send_modal(modal)
 
-    async def on_modal_submit(self, interaction: discord.Interaction, index: int, updated_ad: dict):
+    def set_ad(self, index, updated_ad):
         self.ad_variations[index] = updated_ad
+        violations = ad_validation.validate_ad(updated_ad, index)
+        if violations:
+            self.violations[index] = violations
+        else:
+            self.violations.pop(index, None)
+
+    async def on_modal_submit(self, interaction: discord.Interaction, index: int, updated_ad: dict):
+        self.set_ad(index, updated_ad)
         self.selected_ads.add(index)
         await interaction.response.send_message(f"Ad Variation {index + 1} updated and selected.", ephemeral=True)
         await self.finish_selection(interaction)
@@ -1060,7 +1399,19 @@ class AdVariationView(View):
         embed.add_field(name="Headlines", value="\n".join(ad["headlines"]), inline=False)
         embed.add_field(name="Descriptions", value="\n".join(ad["descriptions"]), inline=False)
         embed.add_field(name="Keywords", value=", ".join(ad["keywords"]), inline=False)
-        embed.set_footer(text=f"Ad {self.current_index + 1} of {len(self.ad_variations)} | {'Selected' if self.current_index in self.selected_ads else 'Not Selected'}")
+        violations = self.violations.get(self.current_index)
+        if violations:
+            issues = "\n".join(violation.message for violation in violations)
+            embed.add_field(name="Issues (use Edit to fix before selecting)", value=issues[:1024], inline=False)
+            embed.color = discord.Color.red()
+        similar = self.similar_counts.get(self.current_index)
+        if similar:
+            embed.add_field(name="Similar Variations", value=f"{similar} near-duplicate variation{'s' if similar != 1 else ''} of this ad hidden", inline=False)
+        status = 'Selected' if self.current_index in self.selected_ads else ('Invalid' if violations else 'Not Selected')
+        footer = f"Ad {self.current_index + 1} of {len(self.ad_variations)} | {status} | {len(self.violations)} of {len(self.ad_variations)} ads need fixes"
+        if self.hidden_count:
+            footer += f" | {self.hidden_count} similar hidden"
+        embed.set_footer(text=footer)
         return embed
 
     async def finish_selection(self, interaction: discord.Interaction):
@@ -1069,7 +1420,7 @@ class AdVariationView(View):
             return
 
         selected_variations = [self.ad_variations[i] for i in self.selected_ads]
-        view = ConfirmSelectedAdsView(selected_variations, self.customer_id, self.credentials, self.campaign_name, self.business_website)
+        view = ConfirmSelectedAdsView(selected_variations, self.customer_id, self.credentials, self.campaign_name, self.business_website, business_name=self.business_name)
         embeds = view.get_embeds()
         await interaction.followup.send("Here are your selected ads:", embeds=embeds, view=view, ephemeral=True)
         self.stop()
@@ -1109,14 +1460,8 @@ class AdVariationEditModal(discord.ui.Modal):
         self.add_item(self.keywords)
 
     def get_warning_text(self, headlines, descriptions):
-        warnings = []
-        for i, headline in enumerate(headlines):
-            if len(headline) > 30:
-                warnings.append(f"Headline {i+1} exceeds limit by {len(headline) - 30} characters")
-        for i, description in enumerate(descriptions):
-            if len(description) > 90:
-                warnings.append(f"Description {i+1} exceeds limit by {len(description) - 90} characters")
-        return " | ".join(warnings) if warnings else "No warnings"
+        violations = ad_validation.validate_ad({"headlines": headlines, "descriptions": descriptions}, self.index)
+        return ad_validation.format_violations(violations)
 
     async def on_submit(self, interaction: discord.Interaction):
         new_headlines = [h.strip() for h in self.headlines.value.split(",")]
@@ -1138,15 +1483,16 @@ class AdVariationEditModal(discord.ui.Modal):
         await interaction.response.defer(ephemeral=True)
 
 class ConfirmSelectedAdsView(discord.ui.View):
-    def __init__(self, selected_ads, customer_id, credentials, campaign_name, business_website):
+    def __init__(self, selected_ads, customer_id, credentials, campaign_name, business_website, business_name=None):
         super().__init__()
         self.selected_ads = selected_ads
         self.customer_id = customer_id
         self.credentials = credentials
         self.campaign_name = campaign_name
         self.business_website = business_website
+        self.business_name = business_name
+        self.confirmed = False
 
-        self.add_item(discord.ui.Button(label="Confirm", style=discord.ButtonStyle.green, custom_id="confirm"))
         self.add_item(discord.ui.Button(label="Confirm", style=discord.ButtonStyle.green, custom_id="confirm"))
         self.add_item(discord.ui.Select(
             placeholder="Select an ad to delete",
@@ -1166,6 +1512,10 @@ class ConfirmSelectedAdsView(discord.ui.View):
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
             if interaction.data["custom_id"] == "confirm":
+                if self.confirmed:
+                    await interaction.response.send_message("These ads were already submitted.", ephemeral=True)
+                    return True
+                self.confirmed = True
                 await interaction.response.send_message("Ads confirmed and will be used for the campaign!", ephemeral=True)
                 await self.create_ads(interaction)
                 self.stop()
@@ -1181,30 +1531,173 @@ class ConfirmSelectedAdsView(discord.ui.View):
             return True
 
     async def create_ads(self, interaction: discord.Interaction):
-        await interaction.followup.send("Creating ads, please wait...", ephemeral=True)
-        success_count = 0
-        for ad in self.selected_ads:
-            success = await self.create_ad(ad)
-            if success:
-                success_count += 1
-        await interaction.followup.send(f"{success_count} out of {len(self.selected_ads)} ads were created successfully!", ephemeral=True)
-
-    async def create_ad(self, ad):
-        cleaned_campaign_name = self.campaign_name.strip().lstrip('-').strip()
-        ad_data = {
+        # Ads that would fail Google's checks are rejected here instead of after a round trip
+        violations = ad_validation.validate_ads(self.selected_ads)
+        if violations:
+            details = "\n".join(f"Ad {index + 1}: {ad_validation.format_violations(ad_violations)}" for index, ad_violations in violations.items())
+            await interaction.followup.send(f"These ads were not sent because they break Google Ads limits:\n{details}"[:2000], ephemeral=True)
+
+        valid_ads = [ad for index, ad in enumerate(self.selected_ads) if index not in violations]
+        # Google treats near-identical ads in one campaign as redundant, so only one of each group is sent
+        valid_ads, similar_counts = ad_similarity.collapse_similar_ads(valid_ads)
+        skipped = sum(similar_counts.values())
+        if skipped:
+            await interaction.followup.send(f"Skipped {skipped} ad{'s' if skipped != 1 else ''} too similar to another selected ad.", ephemeral=True)
+        if not valid_ads:
+            return
+        payload = {
             "customer_id": self.customer_id,
+            "credentials_ref": helperfuncs.credentials_ref(self.business_name, self.customer_id),
+            "campaign_name": self.campaign_name,
             "business_website": self.business_website,
-            "campaign_name": cleaned_campaign_name,
-            "headlines": ad["headlines"],
-            "descriptions": ad["descriptions"],
-            "keywords": ad["keywords"],
-            "credentials": self.credentials
+            "ads": valid_ads,
+            "total": len(self.selected_ads)
         }
-        async with aiohttp.ClientSession() as session:
-            print('ad_data', ad_data)
-            async with session.post('https://googleadsapicalls.onrender.com/create_ad', json=ad_data) as response:
-                if response.status == 200:
-                    return True
+        await job_queue.submit(interaction, 'create_ads', payload, f"Creating {len(valid_ads)} ad{'s' if len(valid_ads) != 1 else ''}",
+                               secrets={"credentials": self.credentials})
+
+    async def create_ad(self, ad):
+        status = await create_ad_request(self.customer_id, self.credentials, self.campaign_name, self.business_website, ad)
+        return status == 200
+
+def _ad_request_base(customer_id, credentials, campaign_name, business_website):
+    return {
+        "customer_id": customer_id,
+        "business_website": business_website,
+        "campaign_name": campaign_name.strip().lstrip('-').strip(),
+        "credentials": credentials
+    }
+
+async def create_ad_request(customer_id, credentials, campaign_name, business_website, ad, idempotency_key=None):
+    """
+    Posts one ad to the Google Ads service, passing the idempotency key along when given.
+
+    Returns:
+    - int: the HTTP status of the response
+    """
+    ad_data = {
+        **_ad_request_base(customer_id, credentials, campaign_name, business_website),
+        "headlines": ad["headlines"],
+        "descriptions": ad["descriptions"],
+        "keywords": ad["keywords"]
+    }
+    async with metrics.client_session() as session:
+        print('ad_data', ad_data)
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        async with session.post(f'{GOOGLE_ADS_API_URL}/create_ad', json=ad_data, headers=headers) as response:
+            if response.status != 200:
+                print(f"Failed to create ad: {await response.text()}")
+            return response.status
+
+async def create_ads_batch_request(customer_id, credentials, campaign_name, business_website, items):
+    """
+    Posts several ads for one campaign in a single request, sending the credentials once.
+    Each ad carries its idempotency key as its id, and the service answers with one result
+    per id.
+
+    Args:
+    - items: list of (idempotency key, ad) pairs
+
+    Returns:
+    - list: one HTTP-style status per item, in the same order, or None when the service has
+      no batch endpoint
+    """
+    batch_data = {
+        **_ad_request_base(customer_id, credentials, campaign_name, business_website),
+        "ads": [
+            {"id": key, "headlines": ad["headlines"], "descriptions": ad["descriptions"], "keywords": ad["keywords"]}
+            for key, ad in items
+        ]
+    }
+    async with metrics.client_session() as session:
+        async with session.post(f'{GOOGLE_ADS_API_URL}/create_ads', json=batch_data) as response:
+            if response.status in (404, 405):
+                return None
+            if response.status != 200:
+                print(f"Failed to create ads: {await response.text()}")
+                return [response.status] * len(items)
+            results = (await response.json()).get("results", [])
+
+    status_by_id = {result.get("id"): result.get("status", 500) for result in results}
+    for result in results:
+        if result.get("status") != 200:
+            print(f"Failed to create ad {result.get('id')}: {result.get('error')}")
+    # An ad missing from the response has an unknown outcome; its key makes a retry safe
+    return [status_by_id.get(key, 500) for key, _ in items]
+
+@job_queue.job_handler('create_ads')
+async def run_create_ads_job(context):
+    """
+    Creates the job's ads, ADS_BATCH_SIZE per request when batching is on, otherwise one
+    request per ad. Ads already created or rejected are checkpointed, so a retry after a
+    server error only sends the ads that are still outstanding. Each ad is also claimed in
+    the idempotency ledger, so an ad another submission already created is counted from the
+    ledger rather than sent again.
+    """
+    payload = context.payload
+    ads = payload["ads"]
+    ledger = idempotency.get_ledger(context.client)
+    created = set(context.checkpoint.get("created", []))
+    rejected = set(context.checkpoint.get("rejected", []))
+    server_errors = 0
+    already_created = 0
+    in_progress = 0
+
+    pending = []
+    for index, ad in enumerate(ads):
+        if index in created or index in rejected:
+            continue
+        key = idempotency.ad_key(payload["customer_id"], payload["campaign_name"], ad)
+        existing = ledger.begin(key, 'ad', owner=context.job_id) if ledger else None
+        if existing is None:
+            pending.append((index, key, ad))
+        elif existing['state'] == idempotency.LEDGER_SUCCEEDED:
+            created.add(index)
+            already_created += 1
+        else:
+            in_progress += 1
+
+    batch_size = ADS_BATCH_SIZE if ADS_BATCH_SIZE > 1 else 1
+    request_args = (payload["customer_id"], await helperfuncs.job_credentials(context), payload["campaign_name"], payload["business_website"])
+    sent = 0
+    try:
+        while sent < len(pending):
+            chunk = pending[sent:sent + batch_size]
+            statuses = None
+            if batch_size > 1:
+                statuses = await create_ads_batch_request(*request_args, [(key, ad) for _, key, ad in chunk])
+                if statuses is None:
+                    print("Batch ad creation is not available; sending ads one at a time.")
+                    batch_size = 1
+                    continue
+            else:
+                statuses = [await create_ad_request(*request_args, chunk[0][2], idempotency_key=chunk[0][1])]
+            sent += len(chunk)
+
+            for (index, key, _), status in zip(chunk, statuses):
+                if status == 200:
+                    created.add(index)
+                    if ledger:
+                        ledger.complete(key, {'status': status})
+                    continue
+                if status >= 500:
+                    server_errors += 1
                 else:
-                    print(f"Failed to create ad: {await response.text()}")
-                    return False
\ No newline at end of file
+                    rejected.add(index)
+                if ledger:
+                    ledger.abandon(key, f"HTTP {status}")
+            await context.progress(f"Created {len(created)} of {len(ads)} ads...", created=sorted(created), rejected=sorted(rejected))
+    except Exception as e:
+        if ledger:
+            for _, key, _ in pending[sent:]:
+                ledger.abandon(key, str(e))
+        raise
+
+    if server_errors:
+        raise RuntimeError(f"{server_errors} ad{'s' if server_errors != 1 else ''} hit a server error")
+    message = f"{len(created)} out of {payload.get('total', len(ads))} ads were created successfully!"
+    if already_created:
+        message += f" {already_created} of them had already been created and were not sent again."
+    if in_progress:
+        message += f" {in_progress} {'are' if in_progress != 1 else 'is'} still being created by an earlier submission."
+    return message
\ No newline at end of file
@@ -1,6 +1,11 @@
-import aiohttp
+import asyncio
+import os
 import discord
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
 import Helpers.helperClasses as helperClasses
+import Helpers.job_queue as job_queue
+import Helpers.campaign_index as campaign_index
+import Helpers.metrics as metrics
 
 def website_exists_in_db(db, website_link):
     if db is None:
@@ -45,7 +50,7 @@ async def fetch_ad_variations(business_name):
     url = 'https://emms21--ad-selector-agent-fetch-and-process.modal.run/'
     params = {'business_name': business_name}
     
-    async with aiohttp.ClientSession() as session:
+    async with metrics.client_session() as session:
         async with session.post(url, params=params) as response:
             print('Response status:', response.status)
             if response.status == 200:
@@ -54,7 +59,78 @@ async def fetch_ad_variations(business_name):
                 print('Error response:', await response.text())
                 return None
 
-async def get_campaigns(interaction: discord.Interaction, customer_id: str, credentials: dict, business_name: str, business_website: str):
+GOOGLE_ADS_SCOPES = ['https://www.googleapis.com/auth/adwords']
+
+def credentials_ref(business_name, customer_id):
+    """
+    What a job payload stores in place of Google Ads credentials.
+    """
+    return {"business_name": business_name, "customer_id": customer_id}
+
+def load_credentials(business_name):
+    """
+    Reads a business's stored Google Ads credentials in the shape the Google Ads service
+    expects. Blocking.
+
+    Returns:
+    - dict: the credentials, or None if the business has none stored
+    """
+    if not business_name:
+        return None
+    collection = connect_to_mongo_and_get_collection(os.getenv("CONNECTION_STRING"), "credentials", business_name)
+    document = collection.find_one() if collection is not None else None
+    if not document or 'credentials' not in document:
+        return None
+    stored = document['credentials']
+    client = stored.get('web') or stored
+    return {
+        "refresh_token": client.get("refresh_token") or stored.get("refresh_token"),
+        "token_uri": client.get("token_uri", "https://oauth2.googleapis.com/token"),
+        "client_id": client.get("client_id"),
+        "client_secret": client.get("client_secret"),
+        "developer_token": stored.get("developer_token"),
+        "scopes": GOOGLE_ADS_SCOPES
+    }
+
+async def job_credentials(context):
+    """
+    The Google Ads credentials for a job: the ones its submitter held in memory when the job
+    runs in the same process, otherwise the business's stored credentials named by the
+    payload's credentials_ref.
+
+    Raises:
+    - JobFailed: the business no longer has credentials stored
+    """
+    credentials = context.secrets.get("credentials")
+    if credentials is not None:
+        return credentials
+    business_name = (context.payload.get("credentials_ref") or {}).get("business_name")
+    credentials = await asyncio.to_thread(load_credentials, business_name)
+    if not credentials:
+        raise job_queue.JobFailed("No Google Ads credentials are stored for this business. Please use /uploadcredentials.")
+    return credentials
+
+async def get_campaigns(interaction: discord.Interaction, customer_id: str, credentials: dict, business_name: str, business_website: str, selected_campaign_id: str = None):
+    payload = {
+        "customer_id": customer_id,
+        "credentials_ref": credentials_ref(business_name, customer_id),
+        "business_name": business_name,
+        "business_website": business_website,
+        "selected_campaign_id": selected_campaign_id
+    }
+    await job_queue.submit(interaction, 'get_campaigns', payload, "Fetching your campaigns", secrets={"credentials": credentials})
+
+@job_queue.job_handler('get_campaigns')
+async def run_get_campaigns_job(context):
+    """
+    Fetches the customer's campaigns and sends the campaign picker on the interaction's
+    follow-up webhook.
+    """
+    payload = context.payload
+    customer_id = payload["customer_id"]
+    credentials = await job_credentials(context)
+    business_name = payload["business_name"]
+    business_website = payload["business_website"]
     request_data = {
         "customer_id": customer_id,
         "credentials": {
@@ -63,79 +139,34 @@ async def get_campaigns(interaction: discord.Interaction, customer_id: str, cred
             "client_id": credentials.get("client_id"),
             "client_secret": credentials.get("client_secret"),
             "developer_token": credentials.get("developer_token"),
-            "scopes": credentials.get("scopes", ['https://www.googleapis.com/auth/adwords'])
+            "scopes": credentials.get("scopes", GOOGLE_ADS_SCOPES)
         }
     }
-    async with aiohttp.ClientSession() as session:
-            async with session.post('https://googleadsapicalls.onrender.com/get_campaigns', json=request_data) as response:
-                if response.status == 200:
-                    campaigns_data = await response.json()
-                    if campaigns_data:
-                        all_campaigns = []
-                        for account_id, account_data in campaigns_data.items():
-                            account_name = account_data.get('Account Name', 'Unknown Account')
-                            for campaign in account_data.get('Campaigns', []):
-                                all_campaigns.append({
-                                    'name': f"{account_name} - {campaign['Campaign Name']}",
-                                    'id': campaign['Campaign ID'],
-                                    'budget': campaign['Budget']
-                                })
-                        
-                        if all_campaigns:
-                            options = [
-                                discord.SelectOption(
-                                    label=f"{campaign['name']} (Budget: ${campaign['budget']:.2f})",
-                                    value=str(campaign['id']),
-                                    description=f"Campaign ID: {campaign['id']}"
-                                ) for campaign in all_campaigns[:25] 
-                            ]
-                            select_menu = discord.ui.Select(
-                                placeholder="Choose a campaign",
-                                options=options
-                            )
-                            async def campaign_selected(interaction: discord.Interaction):
-                                selected_campaign_id = select_menu.values[0]
-                                selected_campaign = next((c for c in all_campaigns if str(c['id']) == selected_campaign_id), None)
-                                if selected_campaign:
-                                    await interaction.response.send_message(
-                                        f"You selected: {selected_campaign['name']}\n"
-                                        f"Campaign ID: {selected_campaign['id']}\n"
-                                        f"Budget: ${selected_campaign['budget']:.2f}",
-                                        ephemeral=True
-                                    )
-                                    ad_variations = await fetch_ad_variations(business_name)
-                                    if ad_variations and 'ad_variation' in ad_variations:
-                                        view = helperClasses.AdVariationView(
-                                            ad_variations['ad_variation'],
-                                            customer_id,
-                                            credentials,
-                                            selected_campaign['name'],
-                                            business_website
-                                            )
-                                        embed = view.get_embed()
-                                        await interaction.followup.send(
-                                            "Please review and select the ad variations for this campaign:",
-                                            embed=embed,
-                                            view=view,
-                                            ephemeral=True
-                                        )
-                                    else:
-                                        await interaction.followup.send(
-                                            "Failed to fetch ad variations. Please try again later.",
-                                            ephemeral=True
-                                            )
-                                else:
-                                    await interaction.response.send_message("Error: Campaign not found", ephemeral=True)
-
-                            select_menu.callback = campaign_selected
-                            view = discord.ui.View()
-                            view.add_item(select_menu)
-
-                            await interaction.followup.send("Please select a campaign to post your ad to:", view=view, ephemeral=True)
-                        else:
-                            await interaction.followup.send("No campaigns found in the accounts.", ephemeral=True)
-                    else:
-                        await interaction.followup.send("No campaign data returned from the server.", ephemeral=True)
-                else:
-                    error_details = await response.text()
-                    await interaction.followup.send(f"Failed to retrieve campaigns. Error: {error_details}", ephemeral=True)
\ No newline at end of file
+    async with metrics.client_session() as session:
+        async with session.post('https://googleadsapicalls.onrender.com/get_campaigns', json=request_data) as response:
+            if response.status != 200:
+                error_details = await response.text()
+                if response.status >= 500:
+                    raise RuntimeError(f"Failed to retrieve campaigns. Error: {error_details}")
+                raise job_queue.JobFailed(f"Failed to retrieve campaigns. Error: {error_details}")
+            campaigns_data = await response.json()
+
+    if not campaigns_data:
+        return "No campaign data returned from the server."
+    index = campaign_index.CampaignIndex.from_response(campaigns_data)
+    if not len(index):
+        return "No campaigns found in the accounts."
+    # Kept for /createad's campaign autocomplete and the next picker this user opens
+    campaign_index.remember(context.owner_id, index)
+    if context.followup is None:
+        return f"Found {len(index)} campaigns. Run /createad again to choose one."
+
+    selected_campaign = index.get(payload.get("selected_campaign_id"))
+    if selected_campaign:
+        await context.followup.send(helperClasses.campaign_details(selected_campaign), ephemeral=True)
+        await helperClasses.send_ad_variations(context.followup, selected_campaign, customer_id, credentials, business_name, business_website)
+        return f"Using campaign {selected_campaign['name']}."
+
+    view = helperClasses.CampaignSelectView(index, customer_id, credentials, business_name, business_website)
+    await context.followup.send(view.get_content(), view=view, ephemeral=True)
+    return f"Found {len(index)} campaigns."
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+
+LEDGER_PENDING = 'pending'
+LEDGER_SUCCEEDED = 'succeeded'
+LEDGER_FAILED = 'failed'
+# A pending entry older than this is assumed to belong to a call that died and can be taken over
+PENDING_TIMEOUT_SECONDS = 600
+# Entries are only needed to catch repeated submissions and retries, which happen within
+# days; MongoDB deletes entries not updated for this long
+ENTRY_TTL_SECONDS = 30 * 24 * 3600
+
+def _normalize_text(text):
+    return " ".join(str(text).split())
+
+def _normalize_campaign_name(campaign_name):
+    return campaign_name.strip().lstrip('-').strip()
+
+def idempotency_key(kind, business, campaign, content):
+    """
+    Builds a deterministic key for one remote creation from the business it is for, the
+    campaign it belongs to and a hash of its content.
+
+    Returns:
+    - str: "<kind>:<sha256 hex>"
+    """
+    payload = json.dumps([kind, str(business), _normalize_campaign_name(campaign), content], sort_keys=True, separators=(',', ':'))
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+def ad_key(customer_id, campaign_name, ad):
+    content = {field: [_normalize_text(text) for text in ad.get(field) or []] for field in ('headlines', 'descriptions', 'keywords')}
+    return idempotency_key('ad', customer_id, campaign_name, content)
+
+def campaign_key(campaign_data):
+    content = {field: campaign_data.get(field) for field in ('daily_budget', 'start_date', 'end_date')}
+    return idempotency_key('campaign', campaign_data.get('customer_id'), campaign_data.get('campaign_name', ''), content)
+
+class IdempotencyLedger:
+    """
+    Records remote creations by idempotency key in a MongoDB collection with a unique index
+    on the key, so a repeated submission gets the original result instead of a second call.
+
+    A caller takes a key with begin(), makes the remote call, then records the outcome with
+    complete() or abandon(). Abandoned keys can be taken again by a later attempt.
+
+    Args:
+    - collection: MongoDB collection holding the ledger entries
+    """
+    def __init__(self, collection, pending_timeout=PENDING_TIMEOUT_SECONDS, entry_ttl=ENTRY_TTL_SECONDS):
+        self.collection = collection
+        self.pending_timeout = pending_timeout
+        self.entry_ttl = entry_ttl
+
+    def ensure_indexes(self):
+        self.collection.create_index('key', unique=True)
+        self.collection.create_index('updated_at', expireAfterSeconds=self.entry_ttl)
+
+    def begin(self, key, kind, owner=None):
+        """
+        Claims a key before the remote call.
+
+        Args:
+        - key: idempotency key of the creation
+        - kind: what is being created, e.g. 'ad' or 'campaign'
+        - owner: id of the job making the call; a retry of the same job may resume its own claim
+
+        Returns:
+        - dict: None if the caller now holds the key, otherwise the existing entry, which has
+          either succeeded (with its original result) or is still pending elsewhere
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.insert_one({
+                'key': key, 'kind': kind, 'state': LEDGER_PENDING, 'owner': owner,
+                'result': None, 'error': None, 'created_at': now, 'updated_at': now
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        takeover = [{'state': LEDGER_FAILED}, {'state': LEDGER_PENDING, 'updated_at': {'$lt': now - timedelta(seconds=self.pending_timeout)}}]
+        if owner is not None:
+            takeover.append({'state': LEDGER_PENDING, 'owner': owner})
+        result = self.collection.update_one(
+            {'key': key, '$or': takeover},
+            {'$set': {'state': LEDGER_PENDING, 'owner': owner, 'error': None, 'updated_at': now}}
+        )
+        if result.matched_count:
+            return None
+        return self.collection.find_one({'key': key})
+
+    def complete(self, key, result):
+        self.collection.update_one(
+            {'key': key},
+            {'$set': {'state': LEDGER_SUCCEEDED, 'result': result, 'updated_at': datetime.now(timezone.utc)}}
+        )
+
+    def abandon(self, key, error):
+        self.collection.update_one(
+            {'key': key, 'state': LEDGER_PENDING},
+            {'$set': {'state': LEDGER_FAILED, 'error': error, 'updated_at': datetime.now(timezone.utc)}}
+        )
+
+def get_ledger(client):
+    ledger = getattr(client, 'idempotency_ledger', None)
+    return ledger if isinstance(ledger, IdempotencyLedger) else None
@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import datetime
+import time
+import discord
+
+_scope = contextvars.ContextVar("interaction_scope", default=None)
+
+class InteractionScope:
+    """
+    One slash command, view callback or modal submit while it runs. Instrumentation keeps its
+    per-interaction state in `data` and registers finishers to run when the handler's task ends.
+    """
+    def __init__(self, name, interaction=None, origin=None):
+        self.name = name
+        self.interaction_id = getattr(interaction, 'id', None)
+        self.user_id = getattr(getattr(interaction, 'user', None), 'id', None)
+        created_at = getattr(interaction, 'created_at', None)
+        # When Discord created the interaction, which is before the bot received it
+        self.created_at = created_at if isinstance(created_at, datetime.datetime) else None
+        # The view or modal whose callback handles the interaction
+        self.origin = origin
+        self.started_at = time.monotonic()
+        self.data = {}
+        self._finishers = []
+        self.finished = False
+
+    def on_finish(self, callback):
+        self._finishers.append(callback)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        for callback in self._finishers:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error finishing interaction scope {self.name}: {e}")
+
+def _callback_name(callback):
+    # Decorated buttons wrap the function; assigned callbacks are bound methods
+    function = getattr(callback, 'callback', callback)
+    return getattr(function, '__qualname__', None) or type(function).__name__
+
+def describe_task(task):
+    """
+    Recognizes the tasks discord.py runs handlers in: the command tree's invoker and the
+    dispatch tasks of views and modals.
+
+    Returns:
+    - tuple: (interaction, handler name, view or modal handling it), or Nones for any other task
+    """
+    coroutine = task.get_coro()
+    frame = getattr(coroutine, 'cr_frame', None)
+    if frame is None:
+        return None, None, None
+    interaction = frame.f_locals.get('interaction')
+    if not isinstance(interaction, discord.Interaction):
+        return None, None, None
+    owner = frame.f_locals.get('self')
+    if isinstance(owner, discord.ui.Modal):
+        return interaction, f"{type(owner).__name__}.on_submit", owner
+    item = frame.f_locals.get('item')
+    if isinstance(owner, discord.ui.View) and item is not None:
+        return interaction, _callback_name(item.callback).replace("<locals>.", ""), owner
+    command = interaction.command
+    if command is not None:
+        return interaction, f"/{command.qualified_name}", None
+    return interaction, (interaction.data or {}).get('custom_id') or "interaction", None
+
+def current():
+    """
+    Returns the scope of the interaction being handled, binding one to the handler's task on
+    first use. Threads started with asyncio.to_thread after that see the same scope.
+
+    Returns:
+    - InteractionScope: or None outside interaction handlers
+    """
+    scope = _scope.get()
+    if scope is not None:
+        return scope
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return None
+    if task is None:
+        return None
+    interaction, name, origin = describe_task(task)
+    if interaction is None:
+        return None
+    scope = InteractionScope(name, interaction, origin)
+    # Called synchronously inside the task, so this sets the task's own context
+    _scope.set(scope)
+    task.add_done_callback(lambda _: scope.finish())
+    return scope
+
+def _bind_on_dispatch(cls, name):
+    original = getattr(cls, '_scheduled_task', None)
+    if original is None or getattr(original, '_binds_scope', False):
+        return
+    # describe_task reads the dispatch task's frame, so the wrapper keeps discord.py's argument names
+    if name == 'modal':
+        async def _scheduled_task(self, interaction, *args):
+            current()
+            return await original(self, interaction, *args)
+    else:
+        async def _scheduled_task(self, item, interaction):
+            current()
+            return await original(self, item, interaction)
+    _scheduled_task._binds_scope = True
+    cls._scheduled_task = _scheduled_task
+
+def install(tree=None):
+    """
+    Binds the scope as soon as discord.py starts a handler: in the command tree's
+    interaction_check and at the start of every view and modal dispatch. A handler whose
+    first Mongo call runs in asyncio.to_thread would otherwise have no scope in that thread.
+
+    Args:
+    - tree: app_commands.CommandTree whose commands should be bound
+    """
+    _bind_on_dispatch(getattr(discord.ui.view, 'BaseView', discord.ui.View), 'view')
+    _bind_on_dispatch(discord.ui.Modal, 'modal')
+    if tree is None or getattr(tree.interaction_check, '_binds_scope', False) is True:
+        return
+    check = tree.interaction_check
+
+    async def interaction_check(interaction):
+        current()
+        return await check(interaction)
+
+    interaction_check._binds_scope = True
+    tree.interaction_check = interaction_check
+
+def begin(name, interaction=None):
+    """
+    Starts a scope explicitly, for work outside discord.py's handler tasks such as benchmarks.
+
+    Returns:
+    - tuple: (scope, token to pass to end())
+    """
+    scope = InteractionScope(name, interaction)
+    return scope, _scope.set(scope)
+
+def end(scope, token):
+    _scope.reset(token)
+    scope.finish()
@@ -0,0 +1,401 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+import aiohttp
+import discord
+from pymongo import ReturnDocument
+import Helpers.outbound as outbound
+import Helpers.metrics as metrics
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 5
+# A running job whose lease runs out is treated as abandoned (e.g. the bot restarted) and claimed again
+LEASE_SECONDS = 300
+RETRY_BASE_SECONDS = 5
+# Discord interaction tokens last 15 minutes; stop using them a little before that
+INTERACTION_TOKEN_SECONDS = 14 * 60
+
+_handlers = {}
+# Job types whose handlers never send views, so a worker process without the gateway's client can run them
+_isolated = set()
+
+class JobFailed(Exception):
+    """Raised by a job handler for errors that retrying will not fix."""
+
+def job_handler(job_type, isolated=False):
+    """
+    Registers an async handler for a job type. The handler receives a JobContext and
+    returns the message shown to the user when the job succeeds.
+
+    Args:
+    - isolated: the handler only needs the payload, Mongo and the follow-up webhook, so the
+      job may run in a worker process (see Helpers/worker_pool.py)
+    """
+    def register(handler):
+        _handlers[job_type] = handler
+        if isolated:
+            _isolated.add(job_type)
+        return handler
+    return register
+
+def isolated_job_types():
+    return sorted(_isolated)
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+def _as_utc(value):
+    # pymongo returns naive datetimes unless the client is tz_aware; they are UTC either way
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def new_job_document(job_type, payload, notify=None, job_id=None, owner_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS, cluster_id=None):
+    now = utcnow()
+    return {
+        '_id': job_id or new_job_id(),
+        'type': job_type,
+        # The shard cluster that received the interaction; see JobQueue.cluster_id
+        'cluster_id': cluster_id,
+        'payload': payload,
+        'state': JOB_QUEUED,
+        'attempts': 0,
+        'max_attempts': max_attempts,
+        'owner_id': owner_id,
+        'notify': notify or {},
+        'checkpoint': {},
+        'progress': None,
+        'result': None,
+        'error': None,
+        'created_at': now,
+        'updated_at': now,
+        'available_at': now,
+        'lease_until': None
+    }
+
+class JobContext:
+    """
+    What a job handler sees while it runs.
+
+    Args:
+    - job: the job document
+    - followup: webhook for the interaction that started the job, or None once it has expired
+    - queue: JobQueue persisting progress, or None when the job runs inline
+    - client: discord.Client the job runs under; defaults to the queue's client
+    - secrets: values the submitter passed in memory only, e.g. credentials; empty when the job
+      runs in another process or after a restart, so handlers must be able to load them again
+    """
+    def __init__(self, job, followup=None, queue=None, client=None, secrets=None):
+        self.job_id = job['_id']
+        self.payload = job['payload']
+        self.attempt = job.get('attempts', 1)
+        self.checkpoint = dict(job.get('checkpoint') or {})
+        self.followup = followup
+        self.queue = queue
+        self.client = client if client is not None else (queue.client if queue is not None else None)
+        self.notify_target = job.get('notify') or {}
+        self.owner_id = job.get('owner_id')
+        self.secrets = secrets or {}
+
+    async def progress(self, message, **checkpoint):
+        """
+        Reports progress to the user and saves any checkpoint values, so a retried job can
+        skip the work it already finished.
+        """
+        self.checkpoint.update(checkpoint)
+        if self.queue is not None:
+            self.queue.record_progress(self.job_id, message, self.checkpoint)
+        await self.notify(message)
+
+    async def notify(self, message, final=False):
+        """
+        Edits the job's status message. If the interaction has expired, final messages are
+        posted through the business's webhook_url instead.
+        """
+        content = f"Job `{self.job_id}`: {message}"[:2000]
+        message_id = self.notify_target.get('message_id')
+        if self.followup is not None and message_id:
+            try:
+                await self.followup.edit_message(message_id, content=content)
+                return
+            except discord.HTTPException as e:
+                print(f"Could not edit status message for job {self.job_id}: {e}")
+                self.followup = None
+        if final and self.queue is not None:
+            webhook_url = self.queue.webhook_url_for(self.owner_id)
+            if webhook_url:
+                try:
+                    async with metrics.client_session() as session:
+                        await outbound.send(discord.Webhook.from_url(webhook_url, session=session), content, priority=outbound.PRIORITY_BACKGROUND)
+                except (discord.HTTPException, aiohttp.ClientError) as e:
+                    print(f"Could not post job {self.job_id} result to webhook: {e}")
+
+class JobQueue:
+    """
+    Durable job queue stored in a MongoDB collection and worked by a pool of asyncio tasks.
+
+    Jobs move from queued to running to succeeded or failed. Failed attempts are retried
+    with exponential backoff up to the job's max_attempts. Jobs left running by a process
+    that stopped are claimed again once their lease runs out.
+
+    Args:
+    - collection: MongoDB collection holding the job documents
+    - client: discord.Client, used to build follow-up webhooks that can carry views
+    - mappings_collection: mappings collection used to look up webhook_url for notifications
+    - concurrency: number of worker tasks, i.e. jobs run at the same time
+    - job_types: only claim these job types; None claims every type
+    - exclude_types: do not claim these job types, e.g. ones a worker pool runs
+    - exclude_grace_seconds: claim excluded jobs anyway once they have been due this long, so
+      they still run when whatever should run them is down; None never claims them
+    - session: aiohttp session for follow-up webhooks when there is no client
+    - notifier: called with (job_id, job_type) after each enqueue, e.g. to wake a worker pool
+    - cluster_id: this process's shard cluster. Its jobs are stamped with it, and only jobs
+      from the same cluster are claimed unless their type is isolated: a job that sends views
+      must run where the guild's shard is connected, or the views' interactions never arrive.
+      None (unsharded, or a worker process) claims regardless of cluster
+    """
+    def __init__(self, collection, client=None, mappings_collection=None, concurrency=DEFAULT_CONCURRENCY,
+                 poll_interval=POLL_INTERVAL, lease_seconds=LEASE_SECONDS, retry_base_seconds=RETRY_BASE_SECONDS,
+                 job_types=None, exclude_types=None, exclude_grace_seconds=None, session=None, notifier=None,
+                 cluster_id=None):
+        self.collection = collection
+        self.client = client
+        self.mappings_collection = mappings_collection
+        self.concurrency = max(1, int(concurrency))
+        self.job_types = list(job_types) if job_types is not None else None
+        self.exclude_types = list(exclude_types or [])
+        self.exclude_grace_seconds = exclude_grace_seconds
+        self.session = session
+        self.notifier = notifier
+        self.cluster_id = cluster_id
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        # Never written to the collection; see JobContext.secrets
+        self._secrets = {}
+        self._wake = asyncio.Event()
+        self._workers = []
+        self._stopping = False
+
+    def ensure_indexes(self):
+        self.collection.create_index([('state', 1), ('available_at', 1)])
+        self.collection.create_index([('owner_id', 1), ('created_at', -1)])
+
+    def enqueue(self, job_type, payload, notify=None, job_id=None, owner_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS, secrets=None):
+        """
+        Stores a new job and wakes an idle worker. `secrets` stay in this process's memory and
+        are handed to the job if it runs here.
+
+        Returns:
+        - str: the job id
+        """
+        if job_type not in _handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+        job = new_job_document(job_type, payload, notify, job_id, owner_id, max_attempts, self.cluster_id)
+        if secrets:
+            self._secrets[job['_id']] = secrets
+        self.collection.insert_one(job)
+        self._wake.set()
+        if self.notifier is not None:
+            self.notifier(job['_id'], job_type)
+        return job['_id']
+
+    def get(self, job_id):
+        return self.collection.find_one({'_id': job_id})
+
+    def claim(self):
+        """
+        Atomically takes the oldest job that is due, or a running job whose lease expired,
+        among the jobs this queue may run.
+
+        Returns:
+        - dict: the claimed job document, or None when nothing is ready
+        """
+        now = utcnow()
+        conditions = [{'$or': [
+            {'state': JOB_QUEUED, 'available_at': {'$lte': now}},
+            {'state': JOB_RUNNING, 'lease_until': {'$lt': now}}
+        ]}]
+        if self.job_types is not None:
+            conditions.append({'type': {'$in': self.job_types}})
+        elif self.exclude_types and self.exclude_grace_seconds is not None:
+            conditions.append({'$or': [
+                {'type': {'$nin': self.exclude_types}},
+                {'available_at': {'$lte': now - timedelta(seconds=self.exclude_grace_seconds)}}
+            ]})
+        elif self.exclude_types:
+            conditions.append({'type': {'$nin': self.exclude_types}})
+        if self.cluster_id is not None:
+            # Jobs enqueued before clusters were recorded have none and run anywhere, as they used to
+            conditions.append({'$or': [
+                {'cluster_id': self.cluster_id},
+                {'cluster_id': None},
+                {'type': {'$in': isolated_job_types()}}
+            ]})
+        query = conditions[0] if len(conditions) == 1 else {'$and': conditions}
+        return self.collection.find_one_and_update(
+            query,
+            {
+                '$set': {'state': JOB_RUNNING, 'lease_until': now + timedelta(seconds=self.lease_seconds), 'updated_at': now},
+                '$inc': {'attempts': 1}
+            },
+            sort=[('available_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def record_progress(self, job_id, message, checkpoint):
+        now = utcnow()
+        self.collection.update_one(
+            {'_id': job_id, 'state': JOB_RUNNING},
+            {'$set': {
+                'progress': message,
+                'checkpoint': checkpoint,
+                'updated_at': now,
+                'lease_until': now + timedelta(seconds=self.lease_seconds)
+            }}
+        )
+
+    def webhook_url_for(self, owner_id):
+        if self.mappings_collection is None or owner_id is None:
+            return None
+        record = self.mappings_collection.find_one({"owner_ids": owner_id})
+        return record.get("webhook_url") if record else None
+
+    def _followup_for(self, job):
+        notify = job.get('notify') or {}
+        expires_at = _as_utc(notify.get('token_expires_at'))
+        if (self.client is None and self.session is None) or not notify.get('token') or not expires_at or expires_at <= utcnow():
+            return None
+        if self.client is None:
+            return discord.Webhook.partial(notify['application_id'], notify['token'], session=self.session)
+        return discord.Webhook.partial(notify['application_id'], notify['token'], client=self.client)
+
+    def _finish(self, job, state, result=None, error=None):
+        # Neither the payload nor the interaction token is needed once a job is done
+        self._secrets.pop(job['_id'], None)
+        self.collection.update_one(
+            {'_id': job['_id']},
+            {'$set': {'state': state, 'result': result, 'error': error, 'payload': None,
+                      'updated_at': utcnow(), 'lease_until': None},
+             '$unset': {'notify.token': ''}}
+        )
+
+    def _retry(self, job, error):
+        delay = self.retry_base_seconds * (2 ** (job['attempts'] - 1))
+        now = utcnow()
+        self.collection.update_one(
+            {'_id': job['_id']},
+            {'$set': {'state': JOB_QUEUED, 'error': error, 'updated_at': now,
+                      'available_at': now + timedelta(seconds=delay), 'lease_until': None}}
+        )
+        return delay
+
+    async def run_job(self, job):
+        context = JobContext(job, self._followup_for(job), self, secrets=self._secrets.get(job['_id']))
+        handler = _handlers.get(job['type'])
+        if handler is None:
+            self._finish(job, JOB_FAILED, error=f"No handler registered for job type '{job['type']}'")
+            return
+        if job['attempts'] > job['max_attempts']:
+            # The previous attempt was cut off without recording an outcome
+            self._finish(job, JOB_FAILED, error=job.get('error') or "Interrupted too many times")
+            await context.notify(f"Failed after {job['max_attempts']} attempts.", final=True)
+            return
+
+        try:
+            result = await handler(context)
+        except JobFailed as e:
+            self._finish(job, JOB_FAILED, error=str(e))
+            await context.notify(f"Failed: {e}", final=True)
+        except Exception as e:
+            if job['attempts'] < job['max_attempts']:
+                delay = self._retry(job, str(e))
+                await context.notify(f"Attempt {job['attempts']} failed ({e}). Retrying in {delay} seconds.")
+                self._wake.set()
+            else:
+                self._finish(job, JOB_FAILED, error=str(e))
+                await context.notify(f"Failed after {job['attempts']} attempts: {e}", final=True)
+        else:
+            self._finish(job, JOB_SUCCEEDED, result=result)
+            await context.notify(result or "Done.", final=True)
+
+    async def _worker(self):
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                job = self.claim()
+            except Exception as e:
+                print(f"Failed to claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Another job may be waiting, so let an idle worker look too
+            self._wake.set()
+            await self.run_job(job)
+
+    def start(self):
+        if self._workers:
+            return
+        self._stopping = False
+        self.ensure_indexes()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        self._stopping = True
+        self._wake.set()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+async def submit(interaction: discord.Interaction, job_type, payload, description, secrets=None):
+    """
+    Starts a job for an interaction whose response has already been deferred. The payload is
+    stored with the job, so anything sensitive goes in `secrets` instead, with a reference in
+    the payload the handler can load it from (see helperfuncs.job_credentials).
+
+    With a JobQueue on interaction.client the job is stored and the user immediately gets a
+    status message with the job id, which the job keeps updated. Without one, the job runs
+    inline in the callback with the same status message and no retries.
+
+    Returns:
+    - str: the job id
+    """
+    job_id = new_job_id()
+    message = await outbound.send(
+        interaction.followup,
+        f"Job `{job_id}`: {description} is queued. This message will update as it runs.",
+        priority=outbound.PRIORITY_INTERACTION,
+        ephemeral=True
+    )
+    notify = {
+        'application_id': interaction.application_id,
+        'token': interaction.token,
+        'message_id': message.id,
+        'token_expires_at': utcnow() + timedelta(seconds=INTERACTION_TOKEN_SECONDS)
+    }
+    queue = getattr(interaction.client, 'job_queue', None)
+    if isinstance(queue, JobQueue):
+        queue.enqueue(job_type, payload, notify=notify, job_id=job_id, owner_id=interaction.user.id, secrets=secrets)
+        return job_id
+
+    context = JobContext(new_job_document(job_type, payload, notify, job_id, interaction.user.id), interaction.followup, client=interaction.client, secrets=secrets)
+    try:
+        result = await _handlers[job_type](context)
+    except Exception as e:
+        await context.notify(f"Failed: {e}", final=True)
+    else:
+        await context.notify(result or "Done.", final=True)
+    return job_id
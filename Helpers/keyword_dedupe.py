@@ -0,0 +1,219 @@
+import re
+import zlib
+from functools import lru_cache
+from array import array
+from collections import OrderedDict
+import numpy as np
+from Helpers.keyword_table import MISSING_SEARCHES
+import Helpers.metrics as metrics
+
+SIMILARITY_THRESHOLD = 0.8
+NUM_PERMUTATIONS = 32
+NUM_BANDS = 8
+CLUSTER_CACHE_SIZE = 128
+# Below this many distinct sets every pair is compared directly, which is exact and cheap
+EXACT_PAIRWISE_LIMIT = 128
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(2024)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_BAND_MIX = _rng.randint(1, 1 << 62, size=NUM_PERMUTATIONS // NUM_BANDS, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_cluster_cache = OrderedDict()
+
+@lru_cache(maxsize=65536)
+def singularize(token):
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+def normalize_tokens(text):
+    """
+    Reduces a keyword to its canonical token set: lowercased, punctuation dropped, plurals
+    folded to singular and word order ignored.
+
+    Returns:
+    - frozenset: normalized tokens, or the stripped lowercase text when it has no word tokens
+    """
+    lowered = text.lower()
+    tokens = frozenset(map(singularize, TOKEN_PATTERN.findall(lowered)))
+    return tokens or frozenset([lowered.strip()])
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class _UnionFind:
+    __slots__ = ('parent',)
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+def minhash_signatures(token_sets):
+    """
+    Computes MinHash signatures for a list of token sets in one vectorized pass per
+    permutation.
+
+    Returns:
+    - numpy.ndarray: uint64 array of shape (NUM_PERMUTATIONS, len(token_sets))
+    """
+    vocabulary = {}
+    flat = []
+    offsets = []
+    for tokens in token_sets:
+        offsets.append(len(flat))
+        # An empty set still needs one value so every segment of reduceat is non-empty
+        for token in tokens or ('',):
+            token_id = vocabulary.get(token)
+            if token_id is None:
+                token_id = vocabulary[token] = zlib.crc32(token.encode('utf-8')) & _MERSENNE_PRIME
+            flat.append(token_id)
+
+    values = np.asarray(flat, dtype=np.uint64)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    signatures = np.empty((NUM_PERMUTATIONS, len(token_sets)), dtype=np.uint64)
+    for i in range(NUM_PERMUTATIONS):
+        hashed = (values * _PERM_A[i] + _PERM_B[i]) % np.uint64(_MERSENNE_PRIME)
+        signatures[i] = np.minimum.reduceat(hashed, offsets)
+    return signatures
+
+def cluster_token_sets(token_sets, threshold=SIMILARITY_THRESHOLD, exact_pairwise_limit=EXACT_PAIRWISE_LIMIT):
+    """
+    Groups token sets whose Jaccard similarity reaches the threshold.
+
+    Identical token sets are merged exactly. Up to `exact_pairwise_limit` distinct sets,
+    every pair is compared. Larger inputs are bucketed with MinHash LSH (NUM_BANDS bands of
+    NUM_PERMUTATIONS // NUM_BANDS rows), and only pairs sharing a bucket are compared, so
+    the cost grows with the number of candidates rather than with every pair of keywords.
+    The banding is tuned for SIMILARITY_THRESHOLD; callers with a much lower threshold
+    should pass exact_pairwise_limit=None, which always compares every pair.
+
+    Returns:
+    - list: the cluster root index for every input position
+    """
+    union_find = _UnionFind(len(token_sets))
+
+    first_by_tokens = {}
+    distinct = []
+    for i, tokens in enumerate(token_sets):
+        first = first_by_tokens.setdefault(tokens, i)
+        if first == i:
+            distinct.append(i)
+        else:
+            union_find.union(first, i)
+
+    if 1 < len(distinct) and (exact_pairwise_limit is None or len(distinct) <= exact_pairwise_limit):
+        for position, i in enumerate(distinct):
+            for j in distinct[position + 1:]:
+                if jaccard(token_sets[i], token_sets[j]) >= threshold:
+                    union_find.union(i, j)
+    elif len(distinct) > 1:
+        signatures = minhash_signatures([token_sets[i] for i in distinct])
+        rows_per_band = NUM_PERMUTATIONS // NUM_BANDS
+        candidates = set()
+        for band in range(NUM_BANDS):
+            band_rows = signatures[band * rows_per_band:(band + 1) * rows_per_band]
+            bucket_keys = (band_rows * _BAND_MIX[:, None]).sum(axis=0)
+            _, first_in_bucket, bucket_of = np.unique(bucket_keys, return_index=True, return_inverse=True)
+            leaders = first_in_bucket[bucket_of.ravel()]
+            for position in np.nonzero(leaders != np.arange(len(distinct)))[0]:
+                candidates.add((int(leaders[position]), int(position)))
+
+        for leader, position in candidates:
+            i, j = distinct[leader], distinct[position]
+            if jaccard(token_sets[i], token_sets[j]) >= threshold:
+                union_find.union(i, j)
+
+    return [union_find.find(i) for i in range(len(token_sets))]
+
+class KeywordClusters:
+    """
+    Near-duplicate keyword groups for one KeywordTable.
+
+    Each cluster is identified by its representative row, the member with the highest
+    monthly searches. Only clusters with more than one member keep a member list.
+
+    Args:
+    - table: KeywordTable the rows belong to
+    - roots: cluster root per row, where a root is the lowest row of its cluster
+    """
+    __slots__ = ('representatives', 'cluster_of', '_members', '_combined_searches')
+
+    def __init__(self, table, roots):
+        searches = table.searches
+        roots_np = np.asarray(roots, dtype=np.uint32)
+        sizes = np.bincount(roots_np, minlength=len(roots_np)) if len(roots_np) else np.zeros(0, dtype=np.intp)
+        cluster_of = roots_np.copy()
+        self._members = {}
+        self._combined_searches = {}
+
+        groups = {}
+        for row in np.nonzero(sizes[roots_np] > 1)[0].tolist():
+            groups.setdefault(int(roots_np[row]), []).append(row)
+        for root, rows in groups.items():
+            representative = max(rows, key=lambda row: (searches[row], -row))
+            cluster_of[rows] = representative
+            self._members[representative] = array('I', rows)
+            known = [searches[row] for row in rows if searches[row] != MISSING_SEARCHES]
+            self._combined_searches[representative] = sum(known) if known else MISSING_SEARCHES
+
+        # Clusters are listed in order of their first row; roots are exactly those rows
+        first_rows = np.nonzero(roots_np == np.arange(len(roots_np), dtype=np.uint32))[0]
+        self.representatives = array('I')
+        self.representatives.frombytes(cluster_of[first_rows].astype(np.uint32).tobytes())
+        self.cluster_of = array('I')
+        self.cluster_of.frombytes(cluster_of.tobytes())
+
+    def members(self, representative):
+        return self._members.get(representative, (representative,))
+
+    def combined_searches(self, representative, table):
+        return self._combined_searches.get(representative, table.searches[representative])
+
+    def duplicate_count(self):
+        return sum(len(rows) - 1 for rows in self._members.values())
+
+def find_keyword_clusters(table, threshold=SIMILARITY_THRESHOLD):
+    token_sets = [normalize_tokens(text) for text in table.texts()]
+    return KeywordClusters(table, cluster_token_sets(token_sets, threshold))
+
+def get_keyword_clusters(business_name, table):
+    """
+    Returns the near-duplicate clusters for a business's keyword table, computing them once
+    per business and table content. Clusters hold row indices, so they are keyed on the rows
+    themselves rather than the document's last_update, which a submit leaves unchanged.
+    Nothing is cached when business_name is None.
+    """
+    if business_name is None:
+        return find_keyword_clusters(table)
+    key = (business_name, table.fingerprint())
+    metrics.cache_lookup("keyword_clusters", key in _cluster_cache)
+    if key in _cluster_cache:
+        _cluster_cache.move_to_end(key)
+        return _cluster_cache[key]
+
+    clusters = find_keyword_clusters(table)
+    _cluster_cache[key] = clusters
+    if len(_cluster_cache) > CLUSTER_CACHE_SIZE:
+        _cluster_cache.popitem(last=False)
+    return clusters
+
+def clear_cluster_cache():
+    _cluster_cache.clear()
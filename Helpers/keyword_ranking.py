@@ -0,0 +1,100 @@
+from array import array
+from collections import OrderedDict
+import numpy as np
+from Helpers.keyword_table import Competition
+
+DEFAULT_WEIGHTS = {'volume': 1.0, 'competition': 0.5}
+RANKING_CACHE_SIZE = 128
+
+# How much each competition level counts against a keyword, from 0 (best) to 1 (worst)
+COMPETITION_PENALTY = np.zeros(max(Competition) + 1, dtype=np.float64)
+COMPETITION_PENALTY[Competition.NA] = 0.5
+COMPETITION_PENALTY[Competition.LOW] = 0.0
+COMPETITION_PENALTY[Competition.MEDIUM] = 0.5
+COMPETITION_PENALTY[Competition.HIGH] = 1.0
+COMPETITION_PENALTY[Competition.UNSPECIFIED] = 0.5
+COMPETITION_PENALTY[Competition.UNKNOWN] = 0.5
+
+_ranking_cache = OrderedDict()
+
+def resolve_weights(weights=None):
+    resolved = dict(DEFAULT_WEIGHTS)
+    if weights:
+        for key in DEFAULT_WEIGHTS:
+            if key in weights:
+                resolved[key] = float(weights[key])
+    return resolved
+
+def score_keywords(table, weights=None):
+    """
+    Scores every keyword of a KeywordTable in one vectorized pass.
+
+    Monthly searches are log-scaled against the largest volume in the table, so the volume
+    term falls between 0 and 1, and the competition penalty is looked up per row from the
+    stored Competition codes. Keywords with no search data get no volume credit.
+
+    Args:
+    - table: KeywordTable to score
+    - weights: optional dict with 'volume' and/or 'competition' weights
+
+    Returns:
+    - numpy.ndarray: one float64 score per table row
+    """
+    weights = resolve_weights(weights)
+    searches = np.frombuffer(table.searches, dtype=np.int64) if len(table) else np.zeros(0, dtype=np.int64)
+    competition = np.frombuffer(table.competition, dtype=np.uint8)
+
+    volume = np.log1p(np.clip(searches, 0, None).astype(np.float64))
+    peak = volume.max() if volume.size else 0.0
+    if peak > 0:
+        volume /= peak
+
+    return weights['volume'] * volume - weights['competition'] * COMPETITION_PENALTY[competition]
+
+def rank_rows(scores, rows):
+    """
+    Orders a category's row indices by descending score, keeping stored order for ties.
+
+    Returns:
+    - array('I'): the same rows, best first
+    """
+    rows_np = np.frombuffer(rows, dtype=np.uint32) if len(rows) else np.zeros(0, dtype=np.uint32)
+    order = np.argsort(-scores[rows_np], kind='stable')
+    ranked = array('I')
+    ranked.frombytes(rows_np[order].astype(np.uint32).tobytes())
+    return ranked
+
+def get_ranked_rows(business_name, table, row_lists, weights=None):
+    """
+    Returns the scores and ranked row lists for a business, reusing the cached result for
+    the same business, table content, row lists and weights. Keying on the content rather
+    than the document's last_update keeps cached row indices valid when only the selection
+    changes, e.g. after a submit.
+
+    Args:
+    - business_name: name of the business the keywords belong to; None skips the cache
+    - table: KeywordTable holding the keywords
+    - row_lists: row index arrays to rank, e.g. (selected_rows, new_rows)
+    - weights: optional user weights
+
+    Returns:
+    - tuple: (numpy.ndarray scores, list of ranked array('I') rows)
+    """
+    resolved = resolve_weights(weights)
+    if business_name is None:
+        scores = score_keywords(table, resolved)
+        return scores, [rank_rows(scores, rows) for rows in row_lists]
+    key = (business_name, table.fingerprint(row_lists), tuple(sorted(resolved.items())))
+    if key in _ranking_cache:
+        _ranking_cache.move_to_end(key)
+        return _ranking_cache[key]
+
+    scores = score_keywords(table, resolved)
+    result = (scores, [rank_rows(scores, rows) for rows in row_lists])
+    _ranking_cache[key] = result
+    if len(_ranking_cache) > RANKING_CACHE_SIZE:
+        _ranking_cache.popitem(last=False)
+    return result
+
+def clear_ranking_cache():
+    _ranking_cache.clear()
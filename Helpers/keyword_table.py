@@ -0,0 +1,190 @@
+import hashlib
+from array import array
+from enum import IntEnum
+
+MISSING_SEARCHES = -1
+
+class Competition(IntEnum):
+    NA = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    UNSPECIFIED = 4
+    UNKNOWN = 5
+
+    @classmethod
+    def from_value(cls, value):
+        if value is None or value == 'N/A':
+            return cls.NA
+        if isinstance(value, str):
+            return cls.__members__.get(value.strip().upper(), cls.UNKNOWN)
+        return cls.UNKNOWN
+
+    @property
+    def label(self):
+        return 'N/A' if self is Competition.NA else self.name
+
+def parse_searches(value):
+    """
+    Converts an avg_monthly_searches value from the research pipeline to an int,
+    returning MISSING_SEARCHES when it is absent or not numeric.
+    """
+    if isinstance(value, bool) or value is None:
+        return MISSING_SEARCHES
+    if isinstance(value, int):
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return MISSING_SEARCHES
+
+class KeywordTable:
+    """
+    Column-oriented keyword storage for the keyword views.
+
+    Keyword text, monthly searches and competition are kept in parallel arrays and
+    addressed by row index. Texts are packed into one UTF-8 buffer with an offsets array,
+    competition is stored as one Competition code per row and selection as a bitset, so a
+    view holding thousands of keywords keeps a handful of flat buffers instead of a dict
+    per keyword. Competition values the enum does not know, and searches that are not plain
+    ints (e.g. "1,200" or 950.5), are kept as given in sparse dicts, so they are written back
+    unchanged.
+    """
+    __slots__ = ('_text_data', '_text_offsets', 'searches', '_raw_searches', 'competition', '_unknown_competition', '_selected')
+
+    def __init__(self):
+        self._text_data = bytearray()
+        self._text_offsets = array('I', [0])
+        self.searches = array('q')
+        self._raw_searches = {}
+        self.competition = bytearray()
+        self._unknown_competition = {}
+        self._selected = bytearray()
+
+    @classmethod
+    def from_keywords(cls, *keyword_lists):
+        """
+        Builds one table from several normalized keyword lists, storing each distinct
+        keyword text once.
+
+        Args:
+        - keyword_lists: lists of keyword dicts with at least a 'text' key
+
+        Returns:
+        - tuple: (KeywordTable, list of array('I') row indices, one per input list)
+        """
+        table = cls()
+        row_by_text = {}
+        row_lists = []
+        for keywords in keyword_lists:
+            rows = array('I')
+            for keyword in keywords:
+                text = keyword['text']
+                row = row_by_text.get(text)
+                if row is None:
+                    row = table.add(text, keyword.get('avg_monthly_searches'), keyword.get('competition'))
+                    row_by_text[text] = row
+                rows.append(row)
+            row_lists.append(rows)
+        return table, row_lists
+
+    def add(self, text, avg_monthly_searches=None, competition=None):
+        row = len(self.searches)
+        self._text_data += text.encode('utf-8')
+        self._text_offsets.append(len(self._text_data))
+        self.searches.append(parse_searches(avg_monthly_searches))
+        if avg_monthly_searches is not None and type(avg_monthly_searches) is not int:
+            self._raw_searches[row] = avg_monthly_searches
+        code = Competition.from_value(competition)
+        if code is Competition.UNKNOWN:
+            self._unknown_competition[row] = competition
+        self.competition.append(code)
+        if row % 8 == 0:
+            self._selected.append(0)
+        return row
+
+    def __len__(self):
+        return len(self.searches)
+
+    def text(self, row):
+        return self._text_data[self._text_offsets[row]:self._text_offsets[row + 1]].decode('utf-8')
+
+    def texts(self):
+        for row in range(len(self)):
+            yield self.text(row)
+
+    def searches_value(self, row):
+        """
+        Returns:
+        - the searches value to store: the original value unless it was a plain int, or 'N/A'
+          if there was none
+        """
+        if row in self._raw_searches:
+            return self._raw_searches[row]
+        searches = self.searches[row]
+        return 'N/A' if searches == MISSING_SEARCHES else searches
+
+    def searches_label(self, row):
+        return self.searches_value(row)
+
+    def competition_value(self, row):
+        """
+        Returns:
+        - the competition value to store: the enum label, or the original value if it was unknown
+        """
+        if row in self._unknown_competition:
+            return self._unknown_competition[row]
+        return Competition(self.competition[row]).label
+
+    def competition_label(self, row):
+        return str(self.competition_value(row))
+
+    def is_selected(self, row):
+        return bool(self._selected[row >> 3] & (1 << (row & 7)))
+
+    def set_selected(self, row, selected):
+        if selected:
+            self._selected[row >> 3] |= 1 << (row & 7)
+        else:
+            self._selected[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def toggle(self, row):
+        self._selected[row >> 3] ^= 1 << (row & 7)
+
+    def selected_count(self):
+        return bin(int.from_bytes(self._selected, 'little')).count('1')
+
+    def selected_rows(self):
+        for byte_index, byte in enumerate(self._selected):
+            while byte:
+                low_bit = byte & -byte
+                yield (byte_index << 3) + low_bit.bit_length() - 1
+                byte ^= low_bit
+
+    def fingerprint(self, row_lists=()):
+        """
+        Identifies the table's content, and optionally a set of row lists into it, for cache
+        keys of anything that holds row indices. Two tables built from the same keywords in the
+        same order share a fingerprint; any change to which rows exist or their order does not.
+
+        Returns:
+        - str: hex digest
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for column in (self._text_data, self._text_offsets, self.searches, self.competition):
+            digest.update(len(column).to_bytes(8, 'little'))
+            digest.update(column)
+        for rows in row_lists:
+            digest.update(len(rows).to_bytes(8, 'little'))
+            digest.update(rows)
+        return digest.hexdigest()
+
+    def to_document(self, row):
+        return {
+            'text': self.text(row),
+            'avg_monthly_searches': self.searches_value(row),
+            'competition': self.competition_value(row)
+        }
+
+    def selected_documents(self):
+        return [self.to_document(row) for row in self.selected_rows()]
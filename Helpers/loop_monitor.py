@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+import discord
+import Helpers.interaction_scope as interaction_scope
+
+SAMPLE_SECONDS = 0.1
+# A callback holding the loop this long is reported with its stack
+SLOW_CALLBACK_SECONDS = 0.25
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REPORT_HISTORY = 50
+LOG_PATH = os.path.join("logs", "loop_monitor.log")
+LOG_BYTES = 1_000_000
+LOG_BACKUPS = 5
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The bot's wrappers around discord.py's dispatch sit under every view callback, so they never
+# name a stall
+DISPATCH_FILES = (os.path.abspath(interaction_scope.__file__),)
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the shape Prometheus expects.
+    """
+    def __init__(self, buckets=LAG_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            cumulative.append((bound, running))
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+def _is_repo_frame(frame):
+    filename = os.path.abspath(frame.f_code.co_filename)
+    return filename.startswith(REPO_ROOT) and "site-packages" not in filename and filename not in DISPATCH_FILES
+
+def _qualname(frame):
+    code = frame.f_code
+    if hasattr(code, 'co_qualname'):
+        return code.co_qualname
+    # Python < 3.11: rebuild Class.method from the bound instance
+    owner = frame.f_locals.get('self')
+    return f"{type(owner).__name__}.{code.co_name}" if owner is not None else code.co_name
+
+def describe_stack(frame):
+    """
+    Names what the loop is running from its thread's current frame: the slash command when an
+    interaction for one is in scope, otherwise the first of the bot's own functions the running
+    callback entered, e.g. KeywordPaginationView.submit_callback.
+
+    Returns:
+    - tuple: (label, formatted stack of the running callback)
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # Everything before the event loop's Handle._run is the loop machinery itself
+    start = 0
+    for index, candidate in enumerate(frames):
+        if candidate.f_code.co_name == '_run' and candidate.f_code.co_filename.endswith(os.path.join("asyncio", "events.py")):
+            start = index + 1
+    callback_frames = frames[start:] or frames
+
+    label = None
+    for candidate in callback_frames:
+        interaction = candidate.f_locals.get('interaction')
+        if isinstance(interaction, discord.Interaction) and interaction.command is not None:
+            label = f"/{interaction.command.qualified_name}"
+            break
+    if label is None:
+        own = [candidate for candidate in callback_frames if _is_repo_frame(candidate)]
+        label = _qualname(own[0] if own else callback_frames[-1])
+    stack = "".join(traceback.format_list(traceback.StackSummary.extract((candidate, candidate.f_lineno) for candidate in callback_frames)))
+    return label, stack
+
+def file_logger(path=LOG_PATH):
+    logger = logging.getLogger("loop_monitor")
+    if not any(isinstance(handler, RotatingFileHandler) for handler in logger.handlers):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+class LoopMonitor:
+    """
+    Samples event-loop lag into a histogram and watches for callbacks that block the loop.
+
+    A task on the loop wakes every `sample_seconds` and records how late it woke. A watchdog
+    thread checks that those wake-ups keep coming; when one is more than `threshold` late it
+    captures the loop thread's stack while the blocking call is still running. The report is
+    completed with the measured stall once the loop recovers, logged to a rotating file and
+    counted per label.
+
+    Args:
+    - sample_seconds: how often lag is sampled
+    - threshold: stall length that triggers a slow-callback report
+    - logger: where reports are written; a rotating file under logs/ by default
+    """
+    def __init__(self, sample_seconds=SAMPLE_SECONDS, threshold=SLOW_CALLBACK_SECONDS, logger=None):
+        self.sample_seconds = sample_seconds
+        self.threshold = threshold
+        self.logger = logger
+        self.lag = Histogram()
+        self.max_lag = 0.0
+        self.slow_callbacks = {}
+        self.reports = deque(maxlen=REPORT_HISTORY)
+        self._beat = time.monotonic()
+        self._pending = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        if self.logger is None:
+            self.logger = file_logger()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sample(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.sample_seconds)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.sample_seconds)
+            previous, self._beat = self._beat, now
+            self.lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            pending, self._pending = self._pending, None
+            # A report captured against an older wake-up belongs to a stall that already ended
+            if pending is not None and pending['since'] == previous:
+                self._finish_report(pending, lag)
+
+    def _watch(self):
+        while not self._stopping.wait(self.threshold / 4):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.sample_seconds
+            if stalled < self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            label, stack = describe_stack(frame)
+            # Published for the sampler, which completes the report once the loop runs again
+            self._pending = {'label': label, 'stack': stack, 'since': beat, 'detected_at': time.time()}
+
+    def _finish_report(self, report, lag):
+        del report['since']
+        report['blocked_seconds'] = round(lag, 3)
+        self.reports.append(report)
+        self.slow_callbacks[report['label']] = self.slow_callbacks.get(report['label'], 0) + 1
+        self.logger.warning("Event loop blocked for %.3fs by %s\n%s", lag, report['label'], report['stack'])
+
+    def metrics(self):
+        return {
+            'loop_lag_seconds': self.lag.snapshot(),
+            'loop_lag_max_seconds': self.max_lag,
+            'slow_callbacks_total': dict(self.slow_callbacks),
+        }
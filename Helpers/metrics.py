@@ -0,0 +1,241 @@
+import math
+import threading
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from pymongo import monitoring
+from Helpers.loop_monitor import Histogram
+import Helpers.tracing as tracing
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Registry:
+    """
+    Counters and histograms keyed by metric name and label values, rendered in the Prometheus
+    text format. Updated from the event loop and from Mongo threads, so writes take a lock.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def value(self, name, **labels):
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def counter_series(self, name):
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: histogram.snapshot() for key, histogram in series.items()} for name, series in self._histograms.items()}
+        for name in sorted(counters):
+            lines.extend(self._header(name, "counter"))
+            for key, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_labels(key)} {_number(value)}")
+        for name in sorted(histograms):
+            lines.extend(render_histogram(name, histograms[name], self._help.get(name)))
+        return lines
+
+    def _header(self, name, kind):
+        header = [f"# HELP {name} {self._help[name]}"] if name in self._help else []
+        return header + [f"# TYPE {name} {kind}"]
+
+def render_histogram(name, series, help_text=None):
+    """
+    Args:
+    - series: {label tuple: Histogram.snapshot()}
+    """
+    lines = [f"# HELP {name} {help_text}"] if help_text else []
+    lines.append(f"# TYPE {name} histogram")
+    for key, snapshot in sorted(series.items()):
+        for bound, count in snapshot['buckets']:
+            lines.append(f"{name}_bucket{_labels(key + (('le', _number(float(bound))),))} {count}")
+        lines.append(f"{name}_sum{_labels(key)} {_number(float(snapshot['sum']))}")
+        lines.append(f"{name}_count{_labels(key)} {snapshot['count']}")
+    return lines
+
+def render_gauges(name, values, help_text=None, kind="gauge"):
+    """
+    Renders values kept outside the registry, e.g. counters another component owns.
+
+    Args:
+    - values: a number, or {label tuple: number}
+    """
+    lines = [f"# HELP {name} {help_text}"] if help_text else []
+    lines.append(f"# TYPE {name} {kind}")
+    if not isinstance(values, dict):
+        values = {(): values}
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(key)} {_number(value)}")
+    return lines
+
+REGISTRY = Registry()
+REGISTRY.describe("bot_command_seconds", "Time from interaction creation to the command handler finishing.")
+REGISTRY.describe("bot_commands_total", "Slash commands handled, by outcome.")
+REGISTRY.describe("mongo_commands_total", "MongoDB commands sent, by command and outcome.")
+REGISTRY.describe("mongo_command_seconds", "MongoDB command round trips.")
+REGISTRY.describe("http_requests_total", "Outgoing HTTP requests, by host and status.")
+REGISTRY.describe("http_request_seconds", "Outgoing HTTP request durations.")
+REGISTRY.describe("cache_lookups_total", "In-memory cache lookups, by cache and result.")
+REGISTRY.describe("mongo_commands_per_interaction", "MongoDB round trips made while handling one interaction.")
+
+def observe_command(name, seconds, outcome="ok"):
+    REGISTRY.inc("bot_commands_total", command=name, outcome=outcome)
+    REGISTRY.observe("bot_command_seconds", seconds, command=name)
+
+def cache_lookup(cache, hit):
+    REGISTRY.inc("cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+
+def cache_hit_ratios():
+    """
+    Returns:
+    - dict: {(('cache', name),): share of lookups that hit}
+    """
+    totals = {}
+    for key, count in REGISTRY.counter_series("cache_lookups_total").items():
+        labels = dict(key)
+        hits, lookups = totals.get(labels['cache'], (0, 0))
+        totals[labels['cache']] = (hits + (count if labels['result'] == 'hit' else 0), lookups + count)
+    return {(('cache', cache),): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Counts every command pymongo sends and times its round trip. Registered globally, so it
+    covers every MongoClient the bot creates afterwards.
+    """
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        REGISTRY.inc("mongo_commands_total", command=event.command_name, outcome="ok")
+        REGISTRY.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        REGISTRY.inc("mongo_commands_total", command=event.command_name, outcome="error")
+        REGISTRY.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name)
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks checked-out connections and pools that are cleared after network errors, for the
+    metrics and readiness endpoints.
+    """
+    def __init__(self):
+        self.checked_out = 0
+        self.pools_cleared = 0
+        self._lock = threading.Lock()
+
+    def _add(self, amount):
+        with self._lock:
+            self.checked_out += amount
+
+    def connection_checked_out(self, event):
+        self._add(1)
+
+    def connection_checked_in(self, event):
+        self._add(-1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    # The remaining pool events carry nothing the endpoints report
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+mongo_pool = MongoPoolListener()
+_installed = False
+
+def install_mongo_listeners():
+    """
+    Registers the Mongo listeners; MongoClients created before this call are not covered.
+    """
+    global _installed
+    if not _installed:
+        monitoring.register(MongoCommandListener())
+        monitoring.register(mongo_pool)
+        _installed = True
+
+async def _request_start(session, context, params):
+    context.started = time.monotonic()
+
+async def _request_end(session, context, params):
+    host = urlsplit(str(params.url)).hostname or ""
+    REGISTRY.inc("http_requests_total", host=host, status=str(params.response.status))
+    REGISTRY.observe("http_request_seconds", time.monotonic() - context.started, host=host)
+
+async def _request_exception(session, context, params):
+    host = urlsplit(str(params.url)).hostname or ""
+    REGISTRY.inc("http_requests_total", host=host, status="error")
+    REGISTRY.observe("http_request_seconds", time.monotonic() - context.started, host=host)
+
+def http_trace_config():
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_request_start)
+    trace_config.on_request_end.append(_request_end)
+    trace_config.on_request_exception.append(_request_exception)
+    return tracing.add_http_hooks(trace_config)
+
+def client_session(**kwargs):
+    """
+    aiohttp.ClientSession whose requests are counted, timed and traced.
+    """
+    return aiohttp.ClientSession(trace_configs=[http_trace_config()], **kwargs)
@@ -0,0 +1,153 @@
+import asyncio
+import re
+import time
+import aiohttp
+import discord
+from Helpers.change_streams import ChangeStreamFollower
+import Helpers.outbound as outbound
+import Helpers.metrics as metrics
+
+WATCHER_ID = "notifications"
+WATCHED_DATABASES = ("marketing_agent", "judge_data")
+# One pipeline run writes to both databases; results arriving this close together share a message
+BATCH_SECONDS = 15
+# At most one message per webhook in this window; anything arriving meanwhile joins the next one
+WEBHOOK_INTERVAL_SECONDS = 60
+WEBHOOK_CACHE_SECONDS = 300
+
+def _count(value):
+    if isinstance(value, (list, dict)):
+        return len(value)
+    return 1 if value else 0
+
+def describe_document(database, document):
+    """
+    Summarizes a newly inserted pipeline document as notification lines.
+
+    Returns:
+    - list: one line per kind of result the document holds, empty if there is nothing to report
+    """
+    document = document or {}
+    if database == 'judge_data':
+        fields = (
+            ('keywords', "new keywords to review with /keywords"),
+            ('ad_variations', "ad variations to review with /adtext"),
+        )
+    else:
+        fields = (
+            ('list_of_paths_taken', "research paths, see /research_paths"),
+            ('user_personas', "user personas, see /user_personas"),
+        )
+    return [f"{_count(document[field])} {label}" for field, label in fields if _count(document.get(field))]
+
+class NotificationDispatcher:
+    """
+    Batches new-result notifications per webhook and rate limits each webhook. Runs on the bot's
+    event loop; the change-stream thread hands work over with submit_threadsafe().
+
+    Args:
+    - batch_seconds: how long a first result waits for others before the message goes out
+    - interval_seconds: minimum time between two messages to the same webhook
+    """
+    def __init__(self, batch_seconds=BATCH_SECONDS, interval_seconds=WEBHOOK_INTERVAL_SECONDS):
+        self.batch_seconds = batch_seconds
+        self.interval_seconds = interval_seconds
+        self.loop = None
+        self.pending = {}
+        self.next_send = {}
+        self._tasks = {}
+        self.sent = 0
+        self.failed = 0
+
+    def start(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+
+    async def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def submit_threadsafe(self, webhook_url, business_name, database, lines):
+        self.loop.call_soon_threadsafe(self.add, webhook_url, business_name, database, lines)
+
+    def add(self, webhook_url, business_name, database, lines):
+        batch = self.pending.setdefault(webhook_url, {'business_name': business_name, 'updates': {}})
+        # A newer document from the same database supersedes the one still waiting
+        batch['updates'][database] = lines
+        if webhook_url not in self._tasks:
+            self._schedule(webhook_url)
+
+    def _schedule(self, webhook_url):
+        wait_for_limit = self.next_send.get(webhook_url, 0) - time.monotonic()
+        delay = max(self.batch_seconds, wait_for_limit)
+        self._tasks[webhook_url] = self.loop.create_task(self._flush_later(webhook_url, delay))
+
+    async def _flush_later(self, webhook_url, delay):
+        try:
+            await asyncio.sleep(delay)
+            batch = self.pending.pop(webhook_url, None)
+            if batch:
+                self.next_send[webhook_url] = time.monotonic() + self.interval_seconds
+                await self.send(webhook_url, batch['business_name'], batch['updates'])
+        finally:
+            self._tasks.pop(webhook_url, None)
+        # Results that arrived while sending go out once the webhook's interval has passed
+        if webhook_url in self.pending:
+            self._schedule(webhook_url)
+
+    def format_message(self, business_name, updates):
+        lines = [line for database in WATCHED_DATABASES for line in updates.get(database, [])]
+        return f"New results are ready for {business_name}:\n" + "\n".join(f"- {line}" for line in lines)
+
+    async def send(self, webhook_url, business_name, updates):
+        try:
+            async with metrics.client_session() as session:
+                webhook = discord.Webhook.from_url(webhook_url, session=session)
+                await outbound.send(webhook, self.format_message(business_name, updates), priority=outbound.PRIORITY_BACKGROUND)
+            self.sent += 1
+        except (discord.HTTPException, aiohttp.ClientError, ValueError) as e:
+            self.failed += 1
+            print(f"Could not deliver notification for {business_name}: {e}")
+
+class NotificationWatcher(ChangeStreamFollower):
+    """
+    Watches for new documents from the agent pipeline and passes a summary of each to the
+    dispatcher for the owning business's webhook. Starts from now when it has no resume token,
+    so a first start does not replay old results.
+    """
+    def __init__(self, client, dispatcher, mappings_collection):
+        super().__init__(client, WATCHER_ID, [{'$match': {
+            'operationType': 'insert',
+            'ns.db': {'$in': list(WATCHED_DATABASES)}
+        }}])
+        self.dispatcher = dispatcher
+        self.mappings_collection = mappings_collection
+        self._webhooks = {}
+
+    def webhook_for(self, collection_name):
+        """
+        Returns:
+        - tuple: (webhook_url, business_name) for the business stored in `collection_name`
+        """
+        key = collection_name.lower()
+        cached = self._webhooks.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        record = self.mappings_collection.find_one(
+            {"business_name": {"$regex": f"^{re.escape(collection_name)}$", "$options": "i"}},
+            {"business_name": 1, "webhook_url": 1}
+        )
+        webhook_url = record.get("webhook_url") if record else None
+        business_name = record["business_name"] if record else collection_name
+        self._webhooks[key] = (time.monotonic() + WEBHOOK_CACHE_SECONDS, webhook_url, business_name)
+        return webhook_url, business_name
+
+    def apply(self, change):
+        namespace = change.get('ns', {})
+        lines = describe_document(namespace.get('db'), change.get('fullDocument'))
+        if not lines or not namespace.get('coll'):
+            return
+        webhook_url, business_name = self.webhook_for(namespace['coll'])
+        if webhook_url:
+            self.dispatcher.submit_threadsafe(webhook_url, business_name, namespace['db'], lines)
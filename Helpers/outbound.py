@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+import discord
+
+PRIORITY_INTERACTION = 0
+PRIORITY_CONVERSATION = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTION: "interaction", PRIORITY_CONVERSATION: "conversation", PRIORITY_BACKGROUND: "background"}
+
+# Discord allows about 5 messages per 5 seconds per channel or webhook and 50 requests per
+# second per bot; staying under both means 429s are the exception
+DESTINATION_LIMIT = (5, 5.0)
+GLOBAL_LIMIT = (50, 1.0)
+MESSAGE_LENGTH = 2000
+COALESCE_SEPARATOR = "\n\n"
+RATE_WINDOW_SECONDS = 60
+# Counters are logged this often while messages are flowing
+METRICS_LOG_SECONDS = 300
+
+scheduler = None
+
+class TokenBucket:
+    """
+    Allows `capacity` sends per `period` seconds, refilled continuously.
+    """
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at', 'blocked_until')
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def block(self, seconds):
+        self.blocked_until = time.monotonic() + seconds
+        self.tokens = 0.0
+
+class OutboundMessage:
+    __slots__ = ('content', 'kwargs', 'priority', 'sequence', 'future')
+
+    def __init__(self, content, kwargs, priority, sequence, future):
+        self.content = content
+        self.kwargs = kwargs
+        self.priority = priority
+        self.sequence = sequence
+        self.future = future
+
+    @property
+    def plain(self):
+        return not self.kwargs and isinstance(self.content, str)
+
+def destination_key(destination):
+    # Webhook objects for the same URL are recreated per send but share one bucket
+    return (type(destination).__name__, getattr(destination, 'id', None) or id(destination), getattr(destination, 'token', None))
+
+class MessageScheduler:
+    """
+    Single outbound path for bot messages. Each channel or webhook has its own queue and token
+    bucket under a shared global bucket. The dispatcher always serves the most urgent queue that
+    its buckets allow, and consecutive plain-text messages to one destination go out as one
+    message.
+
+    Args:
+    - destination_limit: (messages, seconds) allowed per channel or webhook
+    - global_limit: (messages, seconds) allowed across the bot
+    """
+    def __init__(self, destination_limit=DESTINATION_LIMIT, global_limit=GLOBAL_LIMIT):
+        self.destination_limit = destination_limit
+        self.global_bucket = TokenBucket(*global_limit)
+        self._queues = {}
+        self._destinations = {}
+        self._buckets = {}
+        self._in_flight = set()
+        self._sequence = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+        self._sends = set()
+        self._sent_at = deque()
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self._logged_at = time.monotonic()
+        self._logged_sent = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._sends, return_exceptions=True)
+            self._task = None
+
+    def enqueue(self, destination, content=None, priority=PRIORITY_CONVERSATION, **kwargs):
+        """
+        Queues one message.
+
+        Returns:
+        - Future: resolves to the sent message, shared by messages that were coalesced
+        """
+        key = destination_key(destination)
+        future = asyncio.get_running_loop().create_future()
+        self._destinations[key] = destination
+        self._queues.setdefault(key, deque()).append(OutboundMessage(content, kwargs, priority, next(self._sequence), future))
+        self._wake.set()
+        return future
+
+    def _next_ready(self, now):
+        """
+        Returns:
+        - tuple: (key of the queue to serve now or None, seconds until one may be ready)
+        """
+        best = None
+        wait = None
+        for key, queue in self._queues.items():
+            if not queue or key in self._in_flight:
+                continue
+            bucket = self._buckets.get(key)
+            delay = bucket.delay(now) if bucket else 0.0
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            head = queue[0]
+            rank = (min(message.priority for message in queue), head.sequence)
+            if best is None or rank < best[0]:
+                best = (rank, key)
+        return (best[1] if best else None), wait
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            if now - self._logged_at >= METRICS_LOG_SECONDS and self.sent != self._logged_sent:
+                self._log_metrics(now)
+            key, wait = self._next_ready(now)
+            global_delay = self.global_bucket.delay(now)
+            if key is None or global_delay > 0:
+                self._wake.clear()
+                timeout = global_delay if key is not None else wait
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            batch = self._take_batch(self._queues[key])
+            bucket = self._buckets.setdefault(key, TokenBucket(*self.destination_limit))
+            bucket.take()
+            self.global_bucket.take()
+            self._in_flight.add(key)
+            task = asyncio.get_running_loop().create_task(self._deliver(key, batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    def _take_batch(self, queue):
+        batch = [queue.popleft()]
+        if batch[0].plain:
+            length = len(batch[0].content)
+            while queue and queue[0].plain and length + len(COALESCE_SEPARATOR) + len(queue[0].content) <= MESSAGE_LENGTH:
+                length += len(COALESCE_SEPARATOR) + len(queue[0].content)
+                batch.append(queue.popleft())
+        return batch
+
+    async def _deliver(self, key, batch):
+        destination = self._destinations[key]
+        head = batch[0]
+        content = COALESCE_SEPARATOR.join(message.content for message in batch) if len(batch) > 1 else head.content
+        try:
+            sent_message = await destination.send(content, **head.kwargs) if content is not None else await destination.send(**head.kwargs)
+        except (discord.RateLimited, discord.HTTPException) as e:
+            if isinstance(e, discord.RateLimited) or e.status == 429:
+                # Put the messages back and pause this destination for as long as Discord asked
+                self.rate_limited += 1
+                self._buckets[key].block(getattr(e, 'retry_after', None) or self.destination_limit[1])
+                self._queues.setdefault(key, deque()).extendleft(reversed(batch))
+            else:
+                self._fail(batch, e)
+        except Exception as e:
+            self._fail(batch, e)
+        else:
+            self._record_sent(len(batch))
+            for message in batch:
+                if not message.future.done():
+                    message.future.set_result(sent_message)
+        finally:
+            self._in_flight.discard(key)
+            if not self._queues.get(key):
+                self._queues.pop(key, None)
+                self._destinations.pop(key, None)
+            self._wake.set()
+
+    def _fail(self, batch, error):
+        self.failed += len(batch)
+        for message in batch:
+            if not message.future.done():
+                message.future.set_exception(error)
+
+    def _record_sent(self, count):
+        now = time.monotonic()
+        self.sent += 1
+        self.coalesced += count - 1
+        self._sent_at.append(now)
+        while self._sent_at and self._sent_at[0] < now - RATE_WINDOW_SECONDS:
+            self._sent_at.popleft()
+
+    def _log_metrics(self, now):
+        metrics = self.metrics()
+        print(
+            f"Outbound messages: {metrics['messages_sent_total']} sent "
+            f"({metrics['messages_per_second']:.2f}/s), {metrics['messages_coalesced_total']} coalesced, "
+            f"{metrics['rate_limited_total']} rate limited, {metrics['send_failures_total']} failed"
+        )
+        self._logged_at = now
+        self._logged_sent = self.sent
+
+    def metrics(self):
+        now = time.monotonic()
+        while self._sent_at and self._sent_at[0] < now - RATE_WINDOW_SECONDS:
+            self._sent_at.popleft()
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for queue in self._queues.values():
+            for message in queue:
+                queued[PRIORITY_NAMES.get(message.priority, "background")] += 1
+        return {
+            'messages_sent_total': self.sent,
+            'messages_coalesced_total': self.coalesced,
+            'messages_per_second': len(self._sent_at) / RATE_WINDOW_SECONDS,
+            'rate_limited_total': self.rate_limited,
+            'send_failures_total': self.failed,
+            'queued': queued,
+        }
+
+async def send(destination, *contents, priority=PRIORITY_CONVERSATION, **kwargs):
+    """
+    Sends one or more messages to a channel or webhook through the installed scheduler, in
+    order, and waits until they are delivered. Without a scheduler they are sent directly.
+
+    Returns:
+    - Message: the last message sent
+    """
+    if not contents:
+        contents = (None,)
+    if scheduler is None:
+        message = None
+        for content in contents:
+            message = await destination.send(content, **kwargs) if content is not None else await destination.send(**kwargs)
+        return message
+    futures = [scheduler.enqueue(destination, content, priority, **kwargs) for content in contents]
+    results = await asyncio.gather(*futures)
+    return results[-1]
@@ -0,0 +1,95 @@
+import re
+from bisect import bisect_left, insort
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def index_words(text):
+    return set(WORD_PATTERN.findall(text.lower()))
+
+def query_words(query):
+    return list(dict.fromkeys(WORD_PATTERN.findall((query or "").lower())))
+
+class PrefixIndex:
+    """
+    Word-prefix index over a set of items, kept as one sorted list of (word, key) pairs.
+
+    A query matches the items that have, for every word of the query, a word starting with
+    it. Items can be added and removed one at a time, so the index can follow a changing
+    list without being rebuilt.
+
+    Args:
+    - items: iterable of (key, text) pairs; keys must be hashable and mutually comparable
+    """
+    __slots__ = ('_entries', '_words_by_key')
+
+    def __init__(self, items=()):
+        self._words_by_key = {}
+        entries = []
+        for key, text in items:
+            words = index_words(text)
+            self._words_by_key[key] = words
+            entries.extend((word, key) for word in words)
+        entries.sort()
+        self._entries = entries
+
+    def __len__(self):
+        return len(self._words_by_key)
+
+    def __contains__(self, key):
+        return key in self._words_by_key
+
+    def keys(self):
+        return self._words_by_key.keys()
+
+    def add(self, key, text):
+        if key in self._words_by_key:
+            self.remove(key)
+        words = index_words(text)
+        self._words_by_key[key] = words
+        for word in words:
+            insort(self._entries, (word, key))
+
+    def remove(self, key):
+        entries = self._entries
+        for word in self._words_by_key.pop(key, ()):
+            i = bisect_left(entries, (word, key))
+            if i < len(entries) and entries[i] == (word, key):
+                del entries[i]
+
+    def _prefix_range(self, prefix):
+        # Every word starting with `prefix` sorts between the prefix and the prefix followed
+        # by the highest code point
+        entries = self._entries
+        return bisect_left(entries, (prefix,)), bisect_left(entries, (prefix + "\U0010ffff",))
+
+    def _has_prefix(self, key, prefix):
+        return any(word.startswith(prefix) for word in self._words_by_key[key])
+
+    def candidate_count(self, words):
+        """
+        Returns the number of index entries for the rarest of `words`, an upper bound on the
+        number of matches that costs two bisections per word.
+        """
+        return min((end - start for start, end in map(self._prefix_range, words)), default=len(self))
+
+    def matches(self, key, words):
+        return key in self._words_by_key and all(self._has_prefix(key, word) for word in words)
+
+    def search(self, query):
+        """
+        Returns:
+        - set: keys of the matching items, or None when the query has no words (matches all)
+        """
+        words = query_words(query)
+        if not words:
+            return None
+        # Only the rarest word is read from the sorted list; the candidates it yields are
+        # checked against the other words directly
+        ranges = sorted(((self._prefix_range(word), word) for word in words), key=lambda item: item[0][1] - item[0][0])
+        (start, end), _ = ranges[0]
+        matches = {key for _, key in self._entries[start:end]}
+        for _, word in ranges[1:]:
+            if not matches:
+                break
+            matches = {key for key in matches if self._has_prefix(key, word)}
+        return matches
@@ -0,0 +1,224 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+import Helpers.interaction_scope as interaction_scope
+
+SAMPLE_SECONDS = 0.005
+# An armed profiler that sees no matching invocation gives up after this long
+SESSION_SECONDS = 3600
+MAX_INVOCATIONS = 20
+PROFILE_DIR = os.path.join("logs", "profiles")
+WAITING = "[waiting]"
+
+def frame_label(frame):
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def running_stack(frame, root):
+    """
+    The loop thread's stack from the task's own coroutine down to the running frame.
+
+    Returns:
+    - list: frame labels, outermost first, or None if `root` is not on the stack
+    """
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        if frame is root:
+            labels.reverse()
+            return labels
+        frame = frame.f_back
+    return None
+
+def awaiting_stack(coroutine):
+    """
+    The chain of coroutines a suspended task is awaiting through, ending in what it waits on.
+
+    Returns:
+    - list: frame labels, outermost first
+    """
+    labels = []
+    while coroutine is not None:
+        frame = getattr(coroutine, 'cr_frame', None) or getattr(coroutine, 'gi_frame', None)
+        if frame is None:
+            break
+        labels.append(frame_label(frame))
+        coroutine = getattr(coroutine, 'cr_await', None) or getattr(coroutine, 'gi_yieldfrom', None)
+    labels.append(WAITING)
+    return labels
+
+class ProfileSession:
+    """
+    Samples collected for the next `count` invocations of one handler.
+
+    Args:
+    - target: handler name as interaction_scope names it, e.g. "/keywords" or
+      "KeywordPaginationView.submit_callback"
+    - count: invocations to profile
+    - on_complete: coroutine function called on the loop with the session once it is written
+    """
+    def __init__(self, target, count, on_complete=None):
+        self.target = target
+        self.count = count
+        self.on_complete = on_complete
+        self.remaining = count
+        self.stacks = Counter()
+        self.durations = []
+        self.started_at = time.monotonic()
+        self.path = None
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def collapsed(self):
+        """
+        Returns:
+        - str: one "frame;frame;frame count" line per stack, the format flamegraph.pl and
+          speedscope read
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit=10):
+        """
+        Returns:
+        - list: (frame label, share of samples spent in that frame itself), largest first
+        """
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            # A task waiting on I/O is charged to the coroutine that awaited
+            leaf = frames[-2] if frames[-1] == WAITING and len(frames) > 2 else frames[-1]
+            leaves[leaf + (" " + WAITING if frames[-1] == WAITING else "")] += count
+        total = self.samples or 1
+        return [(label, count / total) for label, count in leaves.most_common(limit)]
+
+    def report(self):
+        """
+        Returns:
+        - str: a short Discord message describing the profile
+        """
+        if not self.durations:
+            return f"No invocations of `{self.target}` were profiled."
+        durations = ", ".join(f"{seconds:.2f}s" for seconds in self.durations)
+        lines = [f"Profile of `{self.target}` over {len(self.durations)} invocations ({durations}), {self.samples} samples:"]
+        lines += [f"`{share:6.1%}` {label}" for label, share in self.summary()]
+        return "\n".join(lines)[:2000]
+
+    def write(self, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.target).strip("_") or "handler"
+        self.path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(self.collapsed())
+        return self.path
+
+class HandlerProfiler:
+    """
+    Wall-clock sampling profiler for individual interaction handlers. While armed, a thread
+    looks at the event loop every few milliseconds; the first time it sees a task running the
+    target handler it starts sampling that task. Running tasks are sampled from the loop
+    thread's stack, suspended ones from the coroutines they are awaiting through, so time
+    spent waiting on Mongo or HTTP shows up as well as time on the CPU.
+
+    Nothing runs while the profiler is not armed. Handlers that finish within one sample are
+    not seen, and work a handler moves to other threads appears as waiting.
+
+    Args:
+    - loop: the event loop the handlers run on
+    """
+    def __init__(self, loop, sample_seconds=SAMPLE_SECONDS, directory=PROFILE_DIR):
+        self.loop = loop
+        self.sample_seconds = sample_seconds
+        self.directory = directory
+        self.session = None
+        self._loop_thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def armed(self):
+        return self.session is not None
+
+    def arm(self, target, count=1, on_complete=None):
+        """
+        Profiles the next `count` invocations of `target`. Call from the loop's thread.
+
+        Returns:
+        - ProfileSession: filled in as invocations finish
+
+        Raises:
+        - ValueError: a session is already running, or count is out of range
+        """
+        if self.session is not None:
+            raise ValueError(f"Already profiling {self.session.target}; {self.session.remaining} invocations to go.")
+        if not 1 <= count <= MAX_INVOCATIONS:
+            raise ValueError(f"Profile between 1 and {MAX_INVOCATIONS} invocations.")
+        self.session = ProfileSession(target, count, on_complete)
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(self.session,), name="handler-profiler", daemon=True)
+        self._thread.start()
+        return self.session
+
+    def cancel(self):
+        self._stop.set()
+
+    def _run(self, session):
+        seen = weakref.WeakKeyDictionary()
+        active = {}
+        deadline = session.started_at + SESSION_SECONDS
+        while not self._stop.wait(self.sample_seconds):
+            task = asyncio.current_task(self.loop)
+            if task is not None and task not in seen:
+                seen[task] = self._matches(task, session)
+                if seen[task]:
+                    session.remaining -= 1
+                    active[task] = time.monotonic()
+            self._sample(task, active, session)
+            if session.remaining <= 0 and not active:
+                break
+            if not active and time.monotonic() > deadline:
+                break
+        self._finish(session)
+
+    def _matches(self, task, session):
+        if session.remaining <= 0:
+            return False
+        try:
+            _, name, _ = interaction_scope.describe_task(task)
+        except Exception:
+            return False
+        return name == session.target
+
+    def _sample(self, current, active, session):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        for task, started in list(active.items()):
+            if task.done():
+                session.durations.append(time.monotonic() - started)
+                del active[task]
+                continue
+            coroutine = task.get_coro()
+            labels = None
+            if task is current:
+                labels = running_stack(frame, getattr(coroutine, 'cr_frame', None))
+            if labels is None:
+                labels = awaiting_stack(coroutine)
+            session.stacks[";".join([session.target] + labels)] += 1
+
+    def _finish(self, session):
+        try:
+            if session.samples:
+                session.write(self.directory)
+                print(f"Profile of {session.target} over {len(session.durations)} invocations written to {session.path}")
+        except OSError as e:
+            print(f"Could not write the profile of {session.target}: {e}")
+        self.session = None
+        if session.on_complete is not None and not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.on_complete(session), self.loop)
@@ -0,0 +1,193 @@
+import contextlib
+import logging
+import os
+import random
+import threading
+import bson
+from pymongo import monitoring
+import Helpers.interaction_scope as interaction_scope
+import Helpers.metrics as metrics
+
+QUERY_BUDGET = int(os.getenv("MONGO_QUERY_BUDGET", 10))
+# The same command against the same collection with the same filter keys this many times in
+# one interaction is most likely a query issued per item of a loop
+N_PLUS_ONE_REPEATS = 5
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+FILTER_FIELDS = ('filter', 'q', 'query')
+# Share of replies whose size is measured. pymongo has already decoded each reply, so sizing it
+# means encoding it again; a sample scaled up by the rate is enough for per-handler means
+REPLY_SAMPLE_RATE = float(os.getenv("MONGO_REPLY_SAMPLE_RATE", 0.05))
+
+logger = logging.getLogger(__name__)
+
+def _size(document):
+    try:
+        return len(bson.encode(document))
+    except Exception:
+        return 0
+
+def query_shape(command_name, command):
+    """
+    Returns:
+    - tuple: (command, collection, sorted filter keys) identifying repeats of one query
+    """
+    collection = command.get(command_name)
+    query = next((command[field] for field in FILTER_FIELDS if isinstance(command.get(field), dict)), None)
+    for batch in ('updates', 'deletes'):
+        if query is None and command.get(batch):
+            query = command[batch][0].get('q')
+    return (command_name, collection if isinstance(collection, str) else None, tuple(sorted(query or ())))
+
+class MongoUsage:
+    """
+    Mongo commands attributed to one interaction. bytes_received is estimated from a sample
+    of replies; see REPLY_SAMPLE_RATE.
+    """
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.by_command = {}
+        self.shapes = {}
+        self.repeated = set()
+
+    def add(self, shape, seconds, bytes_sent, bytes_received):
+        self.commands += 1
+        self.seconds += seconds
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.by_command[shape[0]] = self.by_command.get(shape[0], 0) + 1
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if self.shapes[shape] == N_PLUS_ONE_REPEATS:
+            self.repeated.add(shape)
+
+class Summary:
+    """
+    Per-handler totals across interactions, for spotting regressions in round trips.
+    """
+    def __init__(self):
+        self.interactions = 0
+        self.commands = 0
+        self.max_commands = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.by_command = {}
+        self.over_budget = 0
+
+    def add(self, usage, budget):
+        self.interactions += 1
+        self.commands += usage.commands
+        self.max_commands = max(self.max_commands, usage.commands)
+        self.seconds += usage.seconds
+        self.bytes += usage.bytes_sent + usage.bytes_received
+        for command_name, count in usage.by_command.items():
+            self.by_command[command_name] = self.by_command.get(command_name, 0) + count
+        if usage.commands > budget:
+            self.over_budget += 1
+
+    def as_dict(self):
+        return {
+            'interactions': self.interactions,
+            'commands_mean': self.commands / self.interactions if self.interactions else 0.0,
+            'commands_max': self.max_commands,
+            'seconds_mean': self.seconds / self.interactions if self.interactions else 0.0,
+            'bytes_mean': self.bytes / self.interactions if self.interactions else 0.0,
+            'by_command': dict(self.by_command),
+            'over_budget': self.over_budget,
+        }
+
+_summaries = {}
+_lock = threading.Lock()
+_budget = QUERY_BUDGET
+
+def set_budget(budget):
+    global _budget
+    _budget = budget
+
+def usage_for(scope):
+    usage = scope.data.get('mongo')
+    if usage is None:
+        usage = scope.data['mongo'] = MongoUsage()
+        scope.on_finish(finish_scope)
+    return usage
+
+def finish_scope(scope):
+    usage = scope.data.get('mongo')
+    if usage is None:
+        return
+    with _lock:
+        _summaries.setdefault(scope.name, Summary()).add(usage, _budget)
+    metrics.REGISTRY.observe("mongo_commands_per_interaction", usage.commands, buckets=COUNT_BUCKETS, handler=scope.name)
+    if usage.commands > _budget:
+        logger.warning(
+            "%s made %d Mongo round trips (budget %d, %.0f ms, %d bytes): %s",
+            scope.name, usage.commands, _budget, usage.seconds * 1000,
+            usage.bytes_sent + usage.bytes_received, usage.by_command
+        )
+    for command_name, collection, keys in sorted(usage.repeated, key=str):
+        logger.warning(
+            "%s ran %s on %s with filter on %s %d times; likely an N+1 query",
+            scope.name, command_name, collection, list(keys) or "nothing", usage.shapes[(command_name, collection, keys)]
+        )
+
+def summaries():
+    """
+    Returns:
+    - dict: {handler name: totals and means of Mongo round trips per interaction}
+    """
+    with _lock:
+        return {name: summary.as_dict() for name, summary in _summaries.items()}
+
+@contextlib.contextmanager
+def measure(name):
+    """
+    Accounts the Mongo commands issued inside the block as one interaction named `name`, so a
+    benchmark against a real server can compare round trips per handler before and after a change.
+
+    Returns:
+    - MongoUsage: filled in as commands complete
+    """
+    scope, token = interaction_scope.begin(name)
+    try:
+        yield usage_for(scope)
+    finally:
+        interaction_scope.end(scope, token)
+
+def reset_summaries():
+    with _lock:
+        _summaries.clear()
+
+class QueryAccountingListener(monitoring.CommandListener):
+    """
+    Attributes each command to the interaction whose handler issued it. Started and finished
+    events arrive on the thread that ran the command, so the scope is resolved when it starts.
+    """
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        scope = interaction_scope.current()
+        if scope is None:
+            return
+        self._pending[(event.connection_id, event.request_id)] = (
+            scope, query_shape(event.command_name, event.command), _size(event.command)
+        )
+
+    def _finish(self, event, reply):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        scope, shape, bytes_sent = pending
+        bytes_received = 0
+        if reply is not None and REPLY_SAMPLE_RATE > 0 and random.random() < REPLY_SAMPLE_RATE:
+            bytes_received = round(_size(reply) / REPLY_SAMPLE_RATE)
+        usage_for(scope).add(shape, event.duration_micros / 1e6, bytes_sent, bytes_received)
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, None)
+
+command_listener = QueryAccountingListener()
@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import math
+import os
+import re
+import time
+from collections import OrderedDict, defaultdict
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
+import Helpers.helperfuncs as helperfuncs
+import Helpers.metrics as metrics
+
+SEARCH_CACHE_SIZE = 64
+# Indexes are rebuilt after this long so writes made outside the bot are picked up
+SEARCH_INDEX_TTL = 600
+SEARCH_LIMIT = 10
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TERM_PATTERN = re.compile(r"\w+")
+
+# Database and display label of each searchable field of a business's latest documents
+SOURCES = {
+    'business': ('marketing_agent', "Business Info"),
+    'user_personas': ('marketing_agent', "User Persona"),
+    'list_of_paths_taken': ('marketing_agent', "Research Path"),
+    'keywords': ('judge_data', "Keyword"),
+    'ad_variations': ('judge_data', "Ad Variation"),
+    'finalized_ad_text': ('judge_data', "Finalized Ad"),
+}
+
+_indexes = OrderedDict()
+
+def tokenize(text):
+    return TERM_PATTERN.findall(text.lower())
+
+def _item_text(item):
+    if isinstance(item, dict):
+        return "\n".join(_item_text(value) for value in item.values())
+    if isinstance(item, (list, tuple)):
+        return "\n".join(_item_text(value) for value in item)
+    return str(item)
+
+def source_texts(source, value):
+    """
+    Splits one field of a business document into the texts that are searched and shown as
+    separate results.
+
+    Returns:
+    - list: texts in stored order; a result's position in this list identifies it
+    """
+    if not value:
+        return []
+    if source == 'business':
+        # Business info is free text; each paragraph is its own result
+        text = _item_text(value)
+        return [paragraph.strip() for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+    if source == 'keywords':
+        if isinstance(value, dict):
+            return [str(text) for text in value]
+        return [item.get('text', '') if isinstance(item, dict) else str(item) for item in value]
+    if source == 'ad_variations':
+        return [_item_text([ad.get('headlines', []), ad.get('descriptions', [])]) if isinstance(ad, dict) else str(ad) for ad in value]
+    if source == 'finalized_ad_text':
+        return [f"{ad.get('headline', '')}\n{ad.get('description', '')}" if isinstance(ad, dict) else str(ad) for ad in value]
+    if not isinstance(value, list):
+        value = [value]
+    return [_item_text(item) for item in value]
+
+class SearchIndex:
+    """
+    BM25-scored inverted index over everything stored for one business.
+
+    Each result is a (source, position) key pointing at one item of a document field. Fields
+    can be replaced one at a time and only items whose text changed are re-indexed.
+    """
+    __slots__ = ('postings', 'lengths', 'texts', 'total_length', 'built_at', '_norms')
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.texts = {}
+        self.total_length = 0
+        self.built_at = time.monotonic()
+        self._norms = None
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, key, text):
+        if key in self.lengths:
+            self.remove(key)
+        terms = tokenize(text)
+        if not terms:
+            return
+        for term in terms:
+            frequencies = self.postings[term]
+            frequencies[key] = frequencies.get(key, 0) + 1
+        self.lengths[key] = len(terms)
+        self.texts[key] = text
+        self.total_length += len(terms)
+        self._norms = None
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        self.total_length -= self.lengths.pop(key)
+        self._norms = None
+        for term in set(tokenize(text)):
+            frequencies = self.postings[term]
+            frequencies.pop(key, None)
+            if not frequencies:
+                del self.postings[term]
+
+    def set_source(self, source, value):
+        texts = source_texts(source, value)
+        stale = [key for key in self.texts if key[0] == source and (key[1] >= len(texts) or self.texts[key] != texts[key[1]])]
+        for key in stale:
+            self.remove(key)
+        for position, text in enumerate(texts):
+            if self.texts.get((source, position)) != text:
+                self.add((source, position), text)
+
+    def _length_norms(self):
+        # The length part of BM25 only changes when items do, so it is kept between searches
+        if self._norms is None:
+            average_length = self.total_length / len(self.lengths)
+            self._norms = {
+                key: BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                for key, length in self.lengths.items()
+            }
+        return self._norms
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Scores every item containing a query term with BM25.
+
+        Returns:
+        - list: (score, source, position, text) tuples, best first
+        """
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        norms = self._length_norms()
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            frequencies = self.postings.get(term)
+            if not frequencies:
+                continue
+            weight = math.log(1 + (count - len(frequencies) + 0.5) / (len(frequencies) + 0.5)) * (BM25_K1 + 1)
+            for key, frequency in frequencies.items():
+                scores[key] += weight * frequency / (frequency + norms[key])
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, key[0], key[1], self.texts[key]) for key, score in best]
+
+def build_index(business_name):
+    """
+    Reads the business's latest documents from both databases and indexes them. Blocking;
+    call it off the event loop.
+    """
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    index = SearchIndex()
+    for database in dict.fromkeys(database for database, _ in SOURCES.values()):
+        collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, database, business_name.lower())
+        document = helperfuncs.get_latest_document(collection) if collection is not None else None
+        for source, (source_database, _) in SOURCES.items():
+            if source_database == database:
+                index.set_source(source, (document or {}).get(source))
+    return index
+
+def get_index(business_name):
+    key = business_name.lower()
+    index = _indexes.get(key)
+    if index is not None and time.monotonic() - index.built_at > SEARCH_INDEX_TTL:
+        del _indexes[key]
+        index = None
+    metrics.cache_lookup("search_index", index is not None)
+    if index is None:
+        return None
+    _indexes.move_to_end(key)
+    return index
+
+def remember(business_name, index):
+    _indexes[business_name.lower()] = index
+    _indexes.move_to_end(business_name.lower())
+    while len(_indexes) > SEARCH_CACHE_SIZE:
+        _indexes.popitem(last=False)
+
+async def load_index(business_name):
+    """
+    Returns the business's index, building it on first use.
+    """
+    index = get_index(business_name)
+    if index is None:
+        index = await asyncio.to_thread(build_index, business_name)
+        remember(business_name, index)
+    return index
+
+def update_source(business_name, source, value):
+    """
+    Applies a write the bot just made to the business's index, if one is loaded. Unloaded
+    businesses pick the write up when their index is built.
+    """
+    index = _indexes.get(business_name.lower())
+    if index is not None:
+        index.set_source(source, value)
+
+def clear_search_cache():
+    _indexes.clear()
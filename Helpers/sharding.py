@@ -0,0 +1,145 @@
+import asyncio
+import os
+from dataclasses import dataclass
+import discord
+from Helpers.change_streams import utcnow
+
+STATUS_DATABASE = "mappings"
+STATUS_COLLECTION = "shard_status"
+STATUS_SECONDS = 30
+# A shard whose cluster has not reported for this long is shown as down
+STALE_SECONDS = 3 * STATUS_SECONDS
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    """
+    Which shards this process runs. Set by cluster.py through SHARD_COUNT, SHARD_IDS,
+    CLUSTER_ID and CLUSTER_COUNT; without them the bot runs unsharded.
+    """
+    cluster_id: int
+    cluster_count: int
+    shard_count: int
+    shard_ids: tuple
+
+    @property
+    def primary(self):
+        return self.cluster_id == 0
+
+def cluster_config(environ=None):
+    """
+    Returns:
+    - ClusterConfig: the shards assigned to this process, or None when sharding is off
+    """
+    environ = os.environ if environ is None else environ
+    if not environ.get("SHARD_COUNT"):
+        return None
+    shard_count = int(environ["SHARD_COUNT"])
+    shard_ids = environ.get("SHARD_IDS")
+    return ClusterConfig(
+        cluster_id=int(environ.get("CLUSTER_ID", 0)),
+        cluster_count=int(environ.get("CLUSTER_COUNT", 1)),
+        shard_count=shard_count,
+        shard_ids=tuple(int(shard_id) for shard_id in shard_ids.split(",")) if shard_ids else tuple(range(shard_count))
+    )
+
+def plan_clusters(shard_count, cluster_count):
+    """
+    Splits shards into contiguous, evenly sized groups, one per cluster process.
+
+    Returns:
+    - list: a tuple of shard ids per cluster
+    """
+    cluster_count = max(1, min(cluster_count, shard_count))
+    size, extra = divmod(shard_count, cluster_count)
+    plan, start = [], 0
+    for cluster_id in range(cluster_count):
+        end = start + size + (1 if cluster_id < extra else 0)
+        plan.append(tuple(range(start, end)))
+        start = end
+    return plan
+
+def make_client(intents, config=None, **options):
+    if config is None:
+        return discord.Client(intents=intents, **options)
+    return discord.AutoShardedClient(intents=intents, shard_count=config.shard_count, shard_ids=list(config.shard_ids), **options)
+
+def shard_latencies(client):
+    """
+    Returns:
+    - list: (shard_id, latency in seconds) for every shard this client runs
+    """
+    if isinstance(client, discord.AutoShardedClient):
+        return client.latencies
+    return [(client.shard_id or 0, client.latency)]
+
+class ShardReporter:
+    """
+    Writes this cluster's per-shard latency and guild counts to mappings.shard_status so the
+    supervisor, and any cluster, can see the whole fleet.
+
+    Args:
+    - client: the running discord client
+    - collection: the shard_status collection
+    - config: this process's ClusterConfig
+    """
+    def __init__(self, client, collection, config, interval=STATUS_SECONDS):
+        self.client = client
+        self.collection = collection
+        self.config = config
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def report(self):
+        guild_counts = {}
+        for guild in self.client.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        now = utcnow()
+        for shard_id, latency in shard_latencies(self.client):
+            # Latency is inf or nan until the shard's first heartbeat
+            self.collection.update_one({'_id': shard_id}, {'$set': {
+                'cluster_id': self.config.cluster_id,
+                'pid': os.getpid(),
+                'latency_ms': round(latency * 1000, 1) if latency == latency and latency != float('inf') else None,
+                'guilds': guild_counts.get(shard_id, 0),
+                'updated_at': now
+            }}, upsert=True)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.report)
+            except Exception as e:
+                print(f"Could not report shard status: {e}")
+            await asyncio.sleep(self.interval)
+
+def read_status(collection, now=None):
+    """
+    Returns:
+    - list: shard_status documents sorted by shard id, each with a 'stale' flag added
+    """
+    now = now or utcnow()
+    documents = []
+    for document in collection.find({}).sort('_id', 1):
+        updated_at = document.get('updated_at')
+        if updated_at is not None and updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=now.tzinfo)
+        document['stale'] = updated_at is None or (now - updated_at).total_seconds() > STALE_SECONDS
+        documents.append(document)
+    return documents
+
+def format_status(documents):
+    lines = []
+    for document in documents:
+        latency = "down" if document['stale'] else (f"{document['latency_ms']:.0f} ms" if document.get('latency_ms') is not None else "connecting")
+        lines.append(f"shard {document['_id']} (cluster {document.get('cluster_id')}): {latency}, {document.get('guilds', 0)} guilds")
+    return "\n".join(lines)
@@ -0,0 +1,495 @@
+"""
+Lightweight tracing: one trace per interaction, with a span for every MongoDB command, every
+aiohttp request (Discord API calls included) and any block wrapped in span().
+
+Configured from the environment by configure():
+- TRACE_FILE: append finished spans to this JSONL file, one span per line
+- OTEL_EXPORTER_OTLP_TRACES_ENDPOINT / OTEL_EXPORTER_OTLP_ENDPOINT: POST spans to an OTLP/HTTP
+  collector in its JSON encoding
+- TRACE_SAMPLE_RATE: share of interactions traced (default 0.1); views and modals follow the
+  decision made for the interaction that created them
+- TRACE_SLOW_SECONDS: also keep any unsampled interaction slower than this (default 2.0,
+  empty to disable)
+- OTEL_SERVICE_NAME: service name reported to the collector
+
+Tracing is off unless an exporter is configured, and then every hook returns straight away.
+"""
+import atexit
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+from pymongo import monitoring
+import discord
+import Helpers.interaction_scope as interaction_scope
+
+DEFAULT_SAMPLE_RATE = 0.1
+DEFAULT_SLOW_SECONDS = 2.0
+MAX_SPANS_PER_TRACE = 1000
+QUEUE_SIZE = 10000
+BATCH_SIZE = 512
+FLUSH_SECONDS = 5
+OTLP_TIMEOUT_SECONDS = 10
+DISCORD_HOSTS = ("discord.com", "discordapp.com")
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_active = contextvars.ContextVar("active_span", default=None)
+
+def _new_id(size):
+    return f"{random.getrandbits(size * 8):0{size * 2}x}"
+
+class Span:
+    __slots__ = ('trace', 'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes', 'status', 'status_message')
+
+    def __init__(self, trace, name, parent_id, kind=KIND_INTERNAL, attributes=None, start_ns=None):
+        self.trace = trace
+        self.trace_id = trace.trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.status_message = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.span_ended(self)
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_unix_nano': self.start_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'status': self.status,
+            'status_message': self.status_message,
+        }
+
+class Trace:
+    """
+    The spans recorded for one interaction. Unsampled interactions are still recorded while a
+    slow threshold is set, and dropped when they finish quickly.
+    """
+    def __init__(self, tracer, scope, trace_id, parent_id, sampled):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+        self.dropped = 0
+        self.kept = None
+        self._lock = threading.Lock()
+        start_ns = None
+        if scope.created_at is not None:
+            start_ns = int(scope.created_at.timestamp() * 1e9)
+        self.root = Span(self, scope.name, parent_id, KIND_SERVER, {
+            'discord.interaction_id': scope.interaction_id,
+            'discord.user_id': scope.user_id,
+        }, start_ns=start_ns)
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+    def span_ended(self, span):
+        # Spans from tasks that outlive the handler are exported as they end
+        if span is not self.root and self.kept:
+            self.tracer.processor.submit([span])
+
+    def finish(self, scope):
+        self.root.end()
+        seconds = (self.root.end_ns - self.root.start_ns) / 1e9
+        slow = self.tracer.slow_seconds
+        self.kept = self.sampled or (slow is not None and seconds >= slow)
+        if not self.kept:
+            return
+        if self.dropped:
+            self.root.set_attribute('trace.dropped_spans', self.dropped)
+        with self._lock:
+            finished = [span for span in self.spans if span.end_ns is not None]
+        self.tracer.processor.submit([self.root] + finished)
+
+class JsonlExporter:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans, service_name):
+        with open(self.path, "a", encoding="utf-8") as file:
+            for span in spans:
+                file.write(json.dumps(dict(span.as_dict(), service=service_name), default=str) + "\n")
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+def otlp_payload(spans, service_name):
+    """
+    Returns:
+    - dict: the spans as an OTLP ExportTraceServiceRequest in its JSON encoding
+    """
+    encoded = []
+    for span in spans:
+        item = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': span.kind,
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': _otlp_attributes(span.attributes),
+            'status': {'code': span.status},
+        }
+        if span.parent_id:
+            item['parentSpanId'] = span.parent_id
+        if span.status_message:
+            item['status']['message'] = span.status_message
+        encoded.append(item)
+    return {'resourceSpans': [{
+        'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': encoded}],
+    }]}
+
+class OtlpHttpExporter:
+    """
+    Args:
+    - endpoint: collector URL; /v1/traces is appended unless already present
+    - headers: extra request headers, e.g. for collector authentication
+    """
+    def __init__(self, endpoint, headers=None):
+        self.url = endpoint if endpoint.rstrip("/").endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+        self.headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+
+    def export(self, spans, service_name):
+        body = json.dumps(otlp_payload(spans, service_name)).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        with urllib.request.urlopen(request, timeout=OTLP_TIMEOUT_SECONDS) as response:
+            response.read()
+
+class BatchProcessor:
+    """
+    Hands finished spans to the exporters from a background thread, so file writes and collector
+    requests never run on the event loop. Spans are dropped rather than queued without bound
+    when the exporters fall behind.
+    """
+    def __init__(self, exporters, service_name):
+        self.exporters = exporters
+        self.service_name = service_name
+        self.dropped = 0
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans):
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            if batch:
+                self._export(batch)
+
+    def _take(self):
+        batch = []
+        deadline = time.monotonic() + FLUSH_SECONDS
+        while len(batch) < BATCH_SIZE:
+            try:
+                span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if span is None:
+                self._export(batch)
+                return None
+            batch.append(span)
+        return batch
+
+    def _export(self, batch):
+        for exporter in self.exporters:
+            try:
+                exporter.export(batch, self.service_name)
+            except Exception as e:
+                print(f"Error exporting {len(batch)} spans with {type(exporter).__name__}: {e}")
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(FLUSH_SECONDS)
+
+class Tracer:
+    """
+    Args:
+    - exporters: objects with export(spans, service_name)
+    - sample_rate: share of interactions traced
+    - slow_seconds: also keep unsampled interactions at least this slow, or None
+    """
+    def __init__(self, exporters, sample_rate=DEFAULT_SAMPLE_RATE, slow_seconds=DEFAULT_SLOW_SECONDS, service_name="discord-bot"):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.processor = BatchProcessor(exporters, service_name)
+
+    def trace_for(self, scope):
+        """
+        Returns:
+        - Trace: the scope's trace, started on first use, or None if it is not being recorded
+        """
+        if 'trace' in scope.data:
+            return scope.data['trace']
+        parent = getattr(scope.origin, '_trace_parent', None)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = _new_id(16), None, random.random() < self.sample_rate
+        trace = None
+        if sampled or self.slow_seconds is not None:
+            trace = Trace(self, scope, trace_id, parent_id, sampled)
+            scope.on_finish(trace.finish)
+        scope.data['trace'] = trace
+        return trace
+
+    def start_span(self, name, kind=KIND_INTERNAL, attributes=None):
+        scope = interaction_scope.current()
+        if scope is None:
+            return None
+        trace = self.trace_for(scope)
+        if trace is None:
+            return None
+        parent = _active.get()
+        parent_id = parent.span_id if parent is not None and parent.trace is trace else trace.root.span_id
+        span = Span(trace, name, parent_id, kind, attributes)
+        return span if trace.add(span) else None
+
+_tracer = None
+
+def enabled():
+    return _tracer is not None
+
+def start_span(name, kind=KIND_INTERNAL, attributes=None):
+    """
+    Starts a span under the current interaction's trace. The caller ends it.
+
+    Returns:
+    - Span: or None when tracing is off or the interaction is not recorded
+    """
+    if _tracer is None:
+        return None
+    return _tracer.start_span(name, kind, attributes)
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Traces the block as a child of the current span; Mongo and HTTP spans started inside it,
+    including from asyncio.to_thread, become its children.
+    """
+    current = start_span(name, attributes=attributes)
+    if current is None:
+        yield None
+        return
+    token = _active.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _active.reset(token)
+        current.end()
+
+def record_error(error):
+    """
+    Marks the current interaction's trace as failed.
+    """
+    if _tracer is None:
+        return
+    scope = interaction_scope.current()
+    trace = _tracer.trace_for(scope) if scope is not None else None
+    if trace is not None:
+        trace.root.record_error(error)
+
+def _parent_context():
+    scope = interaction_scope.current()
+    trace = _tracer.trace_for(scope) if scope is not None else None
+    if trace is None:
+        return None
+    parent = _active.get()
+    parent = parent if parent is not None and parent.trace is trace else trace.root
+    return (trace.trace_id, parent.span_id, trace.sampled)
+
+def _instrument_views():
+    # Views and modals remember the span that created them, so the interactions they receive
+    # continue the same trace
+    original = discord.ui.view.BaseView.__init__
+    if getattr(original, '_traced', False):
+        return
+
+    @functools.wraps(original)
+    def __init__(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        self._trace_parent = _parent_context() if _tracer is not None else None
+
+    __init__._traced = True
+    discord.ui.view.BaseView.__init__ = __init__
+
+def configure(environ=None):
+    """
+    Turns tracing on when an exporter is configured; see the module docstring.
+
+    Returns:
+    - Tracer: or None if tracing stays off
+    """
+    global _tracer
+    environ = os.environ if environ is None else environ
+    exporters = []
+    if environ.get("TRACE_FILE"):
+        exporters.append(JsonlExporter(environ["TRACE_FILE"]))
+    endpoint = environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") or environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if endpoint:
+        exporters.append(OtlpHttpExporter(endpoint))
+    if not exporters:
+        return None
+    slow = environ.get("TRACE_SLOW_SECONDS", str(DEFAULT_SLOW_SECONDS))
+    _tracer = Tracer(
+        exporters,
+        sample_rate=float(environ.get("TRACE_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)),
+        slow_seconds=float(slow) if slow else None,
+        service_name=environ.get("OTEL_SERVICE_NAME", "discord-bot"),
+    )
+    _instrument_views()
+    atexit.register(_tracer.processor.shutdown)
+    return _tracer
+
+def shutdown():
+    global _tracer
+    if _tracer is not None:
+        _tracer.processor.shutdown()
+        _tracer = None
+
+class TracingCommandListener(monitoring.CommandListener):
+    """
+    pymongo command listener that records each command as a client span of the interaction
+    that issued it.
+    """
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if _tracer is None:
+            return
+        collection = event.command.get(event.command_name)
+        current = _tracer.start_span(f"mongo.{event.command_name}", KIND_CLIENT, {
+            'db.system': 'mongodb',
+            'db.name': event.database_name,
+            'db.operation': event.command_name,
+            'db.mongodb.collection': collection if isinstance(collection, str) else None,
+        })
+        if current is not None:
+            self._pending[(event.connection_id, event.request_id)] = current
+
+    def succeeded(self, event):
+        current = self._pending.pop((event.connection_id, event.request_id), None)
+        if current is not None:
+            current.status = STATUS_OK
+            current.end()
+
+    def failed(self, event):
+        current = self._pending.pop((event.connection_id, event.request_id), None)
+        if current is not None:
+            current.record_error(event.failure.get('errmsg', 'command failed') if isinstance(event.failure, dict) else event.failure)
+            current.end()
+
+_SNOWFLAKE = re.compile(r"^\d{15,21}$")
+
+def route(url):
+    """
+    A low-cardinality name for a request path: ids become {id}, and long opaque segments such
+    as interaction and webhook tokens become {token} so they never reach the exporters.
+    """
+    segments = []
+    for segment in urlsplit(url).path.split("/"):
+        if _SNOWFLAKE.match(segment):
+            segment = "{id}"
+        elif len(segment) >= 32:
+            segment = "{token}"
+        segments.append(segment)
+    return "/".join(segments)
+
+async def _request_start(session, context, params):
+    if _tracer is None:
+        return
+    url = str(params.url)
+    host = urlsplit(url).hostname or ""
+    prefix = "discord" if host.endswith(DISCORD_HOSTS) else "http"
+    path = route(url)
+    context.span = _tracer.start_span(f"{prefix} {params.method} {path}", KIND_CLIENT, {
+        'http.method': params.method,
+        'server.address': host,
+        'url.path': path,
+    })
+
+async def _request_end(session, context, params):
+    current = getattr(context, 'span', None)
+    if current is not None:
+        current.set_attribute('http.status_code', params.response.status)
+        if params.response.status >= 400:
+            current.record_error(f"HTTP {params.response.status}")
+        current.end()
+
+async def _request_exception(session, context, params):
+    current = getattr(context, 'span', None)
+    if current is not None:
+        current.record_error(params.exception)
+        current.end()
+
+def add_http_hooks(trace_config):
+    trace_config.on_request_start.append(_request_start)
+    trace_config.on_request_end.append(_request_end)
+    trace_config.on_request_exception.append(_request_exception)
+    return trace_config
+
+command_listener = TracingCommandListener()
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from queue import Empty, SimpleQueue
+import Helpers.job_queue as job_queue
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
+import Helpers.metrics as metrics
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+DEFAULT_CONCURRENCY = 4
+# Modules whose job handlers a worker process registers on start
+HANDLER_MODULES = ("Helpers.helperfuncs", "Helpers.helperClasses", "EventHandlers.ad_interactions")
+RESTART_DELAY_SECONDS = 5
+POLL_SECONDS = 1
+# How often the gateway tries to reconnect to a pool it lost
+RECONNECT_SECONDS = 10
+# Isolated jobs still queued after this long are run by the gateway, e.g. while worker.py is down
+GRACE_SECONDS = 60
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+def configured_address():
+    """
+    Returns:
+    - tuple: (host, port) of the worker pool from WORKER_ADDRESS, or None when jobs run in the
+      gateway process
+    """
+    value = os.getenv("WORKER_ADDRESS")
+    return parse_address(value) if value else None
+
+def authkey():
+    # Both sides have the bot token, so neither needs a second secret configured
+    secret = os.getenv("WORKER_AUTHKEY") or os.getenv("DISCORD_TOKEN") or ""
+    return hashlib.sha256(secret.encode()).digest()
+
+class JobNotifier:
+    """
+    Gateway side of the pool: tells the workers a job was queued so one claims it right away.
+    The job itself is already in Mongo, so a lost notification only delays it until the next
+    poll.
+
+    Connecting and sending happen on a background thread, so enqueueing never waits on the
+    socket. The thread keeps `reachable` current and, while the pool is unreachable, tries to
+    reconnect every RECONNECT_SECONDS.
+    """
+    def __init__(self, address, key=None, reconnect_seconds=RECONNECT_SECONDS):
+        self.address = address
+        self.key = key if key is not None else authkey()
+        self.reconnect_seconds = reconnect_seconds
+        self.reachable = False
+        self._connection = None
+        self._warned = False
+        self._pending = SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="job-notifier", daemon=True)
+        self._thread.start()
+
+    def __call__(self, job_id, job_type):
+        if job_type in job_queue.isolated_job_types():
+            self._pending.put((job_id, job_type))
+
+    def _run(self):
+        self._connect()
+        while True:
+            try:
+                message = self._pending.get(timeout=None if self.reachable else self.reconnect_seconds)
+            except Empty:
+                self._connect()
+                continue
+            if message is None:
+                self._disconnect()
+                return
+            self._send(message)
+
+    def _connect(self):
+        try:
+            if self._connection is None:
+                self._connection = Client(self.address, authkey=self.key)
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+            self._unreachable(e)
+            return False
+        self.reachable = True
+        self._warned = False
+        return True
+
+    def _send(self, message):
+        for _ in range(2):
+            if not self._connect():
+                return
+            try:
+                self._connection.send(message)
+                return
+            except (OSError, EOFError) as e:
+                self._disconnect()
+                error = e
+        self._unreachable(error)
+
+    def _unreachable(self, error):
+        self._disconnect()
+        self.reachable = False
+        if not self._warned:
+            print(f"Worker pool at {self.address[0]}:{self.address[1]} is unreachable ({error}); "
+                  f"the gateway runs its jobs after {GRACE_SECONDS}s.")
+            self._warned = True
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except OSError:
+                pass
+            self._connection = None
+
+    def close(self):
+        self._pending.put(None)
+        self._thread.join(timeout=5)
+
+def available(client):
+    """
+    Returns:
+    - bool: isolated jobs submitted now will be picked up by a worker pool that is connected
+    """
+    queue = getattr(client, 'job_queue', None)
+    return isinstance(queue, job_queue.JobQueue) and isinstance(queue.notifier, JobNotifier) and queue.notifier.reachable
+
+async def serve(wakeups, concurrency=DEFAULT_CONCURRENCY, stop=None):
+    """
+    Runs isolated jobs in this process until `stop` is set. Each item on `wakeups` wakes an idle
+    worker; None ends the process.
+    """
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    jobs_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "jobs", "queue", create_if_missing=True)
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    if jobs_collection is None:
+        print("Job queue unavailable; worker exiting.")
+        return
+    loop = asyncio.get_running_loop()
+    stop = stop or asyncio.Event()
+
+    async with metrics.client_session() as session:
+        queue = job_queue.JobQueue(
+            jobs_collection,
+            mappings_collection=mappings_collection,
+            concurrency=concurrency,
+            job_types=job_queue.isolated_job_types(),
+            session=session
+        )
+
+        def relay():
+            while True:
+                item = wakeups.get()
+                if item is None:
+                    loop.call_soon_threadsafe(stop.set)
+                    return
+                loop.call_soon_threadsafe(queue._wake.set)
+
+        threading.Thread(target=relay, daemon=True).start()
+        queue.start()
+        await stop.wait()
+        await queue.stop()
+
+def _worker_main(wakeups, concurrency):
+    # The pool stops workers through the wakeup queue, so a Ctrl-C meant for the pool is ignored here
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(serve(wakeups, concurrency))
+
+class WorkerPool:
+    """
+    Receives job notifications from the gateway over a local socket and fans them out to a pool
+    of worker processes through a multiprocessing queue. Workers claim jobs from Mongo, so each
+    job runs once however many workers wake for it. Workers that die are restarted.
+
+    Args:
+    - processes: number of worker processes
+    - concurrency: jobs each worker runs at the same time
+    - address: (host, port) the gateway connects to
+    """
+    def __init__(self, processes, concurrency=DEFAULT_CONCURRENCY, address=None, key=None, context=None):
+        self.context = context or multiprocessing.get_context("spawn")
+        self.processes = max(1, int(processes))
+        self.concurrency = concurrency
+        self.address = address or parse_address(DEFAULT_ADDRESS)
+        self.key = key if key is not None else authkey()
+        self.wakeups = self.context.Queue()
+        self.workers = [None] * self.processes
+        self.restart_at = [0.0] * self.processes
+        self.received = 0
+        self.stopping = False
+        self._listener = None
+
+    def start_worker(self, index):
+        worker = self.context.Process(target=_worker_main, args=(self.wakeups, self.concurrency), daemon=True)
+        worker.start()
+        self.workers[index] = worker
+
+    def check(self, now=None):
+        now = time.monotonic() if now is None else now
+        for index, worker in enumerate(self.workers):
+            if worker is not None and worker.is_alive():
+                continue
+            if worker is not None:
+                print(f"Worker {index} exited with code {worker.exitcode}; restarting in {RESTART_DELAY_SECONDS}s")
+                self.workers[index] = None
+                self.restart_at[index] = now + RESTART_DELAY_SECONDS
+            elif now >= self.restart_at[index]:
+                self.start_worker(index)
+
+    def listen(self):
+        self._listener = Listener(self.address, authkey=self.key)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self.stopping:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                # Failed handshakes (e.g. a wrong authkey) only drop that connection
+                if self.stopping:
+                    return
+                continue
+            threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+
+    def _receive(self, connection):
+        with connection:
+            while not self.stopping:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+                self.received += 1
+                self.wakeups.put(message)
+
+    def stop(self, *_):
+        self.stopping = True
+        for _ in self.workers:
+            self.wakeups.put(None)
+        for worker in self.workers:
+            if worker is not None:
+                worker.join(timeout=30)
+                if worker.is_alive():
+                    worker.terminate()
+        if self._listener is not None:
+            self._listener.close()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.listen()
+        print(f"Worker pool listening on {self.address[0]}:{self.address[1]} with {self.processes} processes")
+        while not self.stopping:
+            self.check()
+            time.sleep(POLL_SECONDS)
@@ -1,8 +1,10 @@
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
+import Helpers.query_accounting as query_accounting
+import Helpers.tracing as tracing
 
-def connect_to_mongo_and_get_collection(connection_string, db_name, collection_name):
+def connect_to_mongo_and_get_collection(connection_string, db_name, collection_name, create_if_missing=False):
     """
     Establishes a connection to the MongoDB server and retrieves the specified collection
     in a case-insensitive manner.
@@ -11,12 +13,19 @@ def connect_to_mongo_and_get_collection(connection_string, db_name, collection_n
     - connection_string (str): The MongoDB connection string.
     - db_name (str): The name of the database.
     - collection_name (str): The name of the collection to retrieve.
+    - create_if_missing (bool): Return the collection even if it does not exist yet, so
+      MongoDB creates it on first write.
 
     Returns:
     - Collection: The requested MongoDB collection, or None if authentication failed.
     """
+    with tracing.span("connect_to_mongo_and_get_collection", db=db_name, collection=collection_name):
+        return _connect(connection_string, db_name, collection_name, create_if_missing)
+
+def _connect(connection_string, db_name, collection_name, create_if_missing):
     try:
-        client = MongoClient(connection_string)
+        # Attributes every command on this client to the interaction that issued it
+        client = MongoClient(connection_string, event_listeners=[query_accounting.command_listener, tracing.command_listener])
         client.admin.command('ismaster')
         print("MongoDB connection successful.")
                 
@@ -35,6 +44,9 @@ def connect_to_mongo_and_get_collection(connection_string, db_name, collection_n
             collection = db[matching_collection_name]
             print(f"Successfully authenticated to the database '{db_name}' and accessed collection '{matching_collection_name}'.")
             return collection
+        elif create_if_missing:
+            print(f"Collection '{collection_name}' does not exist yet in '{db_name}'; it will be created on first write.")
+            return db[collection_name]
         else:
             print(f"No collection found matching the name '{collection_name}' (case-insensitive).")
             return None
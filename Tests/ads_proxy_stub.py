@@ -0,0 +1,67 @@
+"""
+Local stand-in for the Google Ads proxy's ad creation endpoints.
+
+It accepts /create_ad (one ad per request) and /create_ads (a batch of ads with per-item
+results), and counts the requests and request body bytes it receives. An ad whose first
+headline contains "REJECT" is refused with status 400.
+"""
+from aiohttp import web
+
+class AdsProxyStub:
+    def __init__(self, batch_enabled=True):
+        self.batch_enabled = batch_enabled
+        self.requests = 0
+        self.bytes_received = 0
+        self.created_ads = []
+        self.credentials_seen = 0
+        self._runner = None
+        self.url = None
+
+    def _rejects(self, ad):
+        return "REJECT" in (ad.get("headlines") or [""])[0]
+
+    async def _read(self, request):
+        body = await request.read()
+        self.requests += 1
+        self.bytes_received += len(body)
+        data = await request.json()
+        if data.get("credentials") is not None:
+            self.credentials_seen += 1
+        return data
+
+    async def create_ad(self, request):
+        data = await self._read(request)
+        if self._rejects(data):
+            return web.json_response({"error": "Ad rejected"}, status=400)
+        self.created_ads.append(data)
+        return web.json_response({"status": "created"})
+
+    async def create_ads(self, request):
+        if not self.batch_enabled:
+            return web.json_response({"error": "Not found"}, status=404)
+        data = await self._read(request)
+        results = []
+        for ad in data.get("ads", []):
+            if self._rejects(ad):
+                results.append({"id": ad["id"], "status": 400, "error": "Ad rejected"})
+            else:
+                self.created_ads.append(ad)
+                results.append({"id": ad["id"], "status": 200})
+        return web.json_response({"results": results})
+
+    async def start(self):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post('/create_ad', self.create_ad)
+        app.router.add_post('/create_ads', self.create_ads)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,51 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+from Helpers.helperClasses import ConfirmSelectedAdsView
+from Tests.ads_proxy_stub import AdsProxyStub
+
+CREDENTIALS = {"refresh_token": "token", "client_id": "client", "client_secret": "secret", "developer_token": "dev"}
+
+def make_ads(count, rejected=()):
+    return [
+        {
+            "headlines": [f"{'REJECT ' if i in rejected else ''}Course {i}", f"Learn Topic {i}", "Start Today"],
+            "descriptions": [f"Lesson plan number {i}.", "Study at your own pace."],
+            "keywords": [f"course {i}"]
+        }
+        for i in range(count)
+    ]
+
+@pytest_asyncio.fixture
+async def proxy(monkeypatch):
+    stub = await AdsProxyStub().start()
+    monkeypatch.setattr("Helpers.helperClasses.GOOGLE_ADS_API_URL", stub.url)
+    yield stub
+    await stub.stop()
+
+async def create(ads):
+    view = ConfirmSelectedAdsView(ads, "123", CREDENTIALS, "Campaign", "https://example.com")
+    interaction = AsyncMock()
+    interaction.client.job_queue = None
+    interaction.client.idempotency_ledger = None
+    await view.create_ads(interaction)
+    return interaction.followup.edit_message.call_args.kwargs["content"]
+
+@pytest.mark.asyncio
+async def test_batches_send_credentials_once_per_chunk(monkeypatch, proxy):
+    monkeypatch.setattr("Helpers.helperClasses.ADS_BATCH_SIZE", 4)
+    result = await create(make_ads(10, rejected={6}))
+
+    assert proxy.requests == 3
+    assert proxy.credentials_seen == 3
+    assert len(proxy.created_ads) == 9
+    assert "9 out of 10 ads were created successfully!" in result
+
+@pytest.mark.asyncio
+async def test_falls_back_to_single_requests_without_batch_endpoint(monkeypatch, proxy):
+    proxy.batch_enabled = False
+    monkeypatch.setattr("Helpers.helperClasses.ADS_BATCH_SIZE", 4)
+    result = await create(make_ads(3))
+
+    assert proxy.requests == 3
+    assert "3 out of 3 ads were created successfully!" in result
@@ -63,6 +63,7 @@ async def test_keywords_command(bot, mock_collection_fixture, connect_to_mongo_a
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.ad_interactions.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -86,6 +87,7 @@ async def test_adtext_command(bot, mock_collection_fixture, connect_to_mongo_and
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.ad_interactions.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -116,6 +118,7 @@ async def test_upload_credentials_command(bot, mock_collection_fixture, connect_
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.ad_interactions.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -153,6 +156,7 @@ async def test_create_ad_command(bot, mock_collection_fixture, connect_to_mongo_
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.ad_interactions.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import AsyncMock
+import Helpers.ad_similarity as ad_similarity
+from Helpers.helperClasses import ConfirmSelectedAdsView, AdVariationView
+
+BASE_AD = {
+    "headlines": ["Learn Python Online", "Python For Beginners", "Start Coding Today"],
+    "descriptions": ["Hands-on lessons with real projects.", "Study at your own pace."],
+    "keywords": ["python course"]
+}
+REWORDED_AD = {
+    "headlines": ["Learn Python Online", "Python For Beginners", "Start Coding Now"],
+    "descriptions": ["Hands-on lessons with real projects.", "Study at your own pace."],
+    "keywords": ["python classes"]
+}
+DIFFERENT_AD = {
+    "headlines": ["Fresh Bread Daily", "Local Bakery Near You", "Order Cakes Online"],
+    "descriptions": ["Baked every morning from scratch.", "Free delivery over $20."],
+    "keywords": ["bakery"]
+}
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    ad_similarity.clear_ad_group_cache()
+    yield
+    ad_similarity.clear_ad_group_cache()
+
+def test_near_duplicates_share_a_group():
+    assert ad_similarity.group_similar_ads([BASE_AD, DIFFERENT_AD, REWORDED_AD]) == [0, 1, 0]
+
+def test_collapse_keeps_first_of_each_group_and_counts_dropped():
+    kept, dropped = ad_similarity.collapse_similar_ads([BASE_AD, DIFFERENT_AD, REWORDED_AD, dict(BASE_AD)])
+    assert kept == [BASE_AD, DIFFERENT_AD]
+    assert dropped == {0: 2}
+
+def test_groups_are_cached_per_fetch(monkeypatch):
+    calls = []
+    original = ad_similarity.cluster_token_sets
+    monkeypatch.setattr(ad_similarity, "cluster_token_sets", lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+
+    ad_similarity.group_similar_ads([BASE_AD, REWORDED_AD])
+    ad_similarity.group_similar_ads([dict(BASE_AD), dict(REWORDED_AD)])
+    assert len(calls) == 1
+
+def test_pairs_at_the_threshold_are_found_in_large_fetches():
+    def ad(words):
+        # Single-word headlines are each one shingle
+        return {"headlines": words, "descriptions": []}
+    ads = []
+    for pair in range(20):
+        shared = [f"shared{pair}n{i}x" for i in range(6)]
+        # 6 shingles in common out of 10: Jaccard similarity of exactly 0.6, which MinHash
+        # banding tuned for 0.8 finds only about two times in three
+        ads += [ad(shared + [f"first{pair}ax", f"first{pair}bx"]), ad(shared + [f"second{pair}ax", f"second{pair}bx"])]
+
+    fillers = [ad([f"filler{i}x", f"other{i}x"]) for i in range(150)]
+
+    roots = ad_similarity.group_similar_ads(ads + fillers)
+    assert roots[:len(ads)] == [i - i % 2 for i in range(len(ads))]
+    assert roots[len(ads):] == list(range(len(ads), len(ads) + len(fillers)))
+
+def test_variation_view_hides_near_duplicates():
+    view = AdVariationView([BASE_AD, REWORDED_AD, DIFFERENT_AD], "123", {}, "Campaign", "https://example.com")
+    assert view.ad_variations == [BASE_AD, DIFFERENT_AD]
+
+    embed = view.get_embed()
+    assert embed.fields[-1].value == "1 near-duplicate variation of this ad hidden"
+    assert embed.footer.text.endswith("1 similar hidden")
+
+@pytest.mark.asyncio
+async def test_create_ads_skips_near_duplicates(monkeypatch):
+    view = ConfirmSelectedAdsView([BASE_AD, REWORDED_AD, DIFFERENT_AD], "123", {}, "Campaign", "https://example.com")
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+    interaction = AsyncMock()
+
+    await view.create_ads(interaction)
+
+    assert [call.args[-1] for call in create_ad_request.await_args_list] == [BASE_AD, DIFFERENT_AD]
+    assert "Skipped 1 ad too similar" in interaction.followup.send.call_args_list[0].args[0]
@@ -0,0 +1,79 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import Helpers.ad_text_store as ad_text_store
+from Helpers.helperClasses import AdTextView, AdEditModal
+
+@pytest_asyncio.fixture
+def ad_collection_fixture():
+    collection = MongoClient().judge_data.test_business
+    collection.insert_one({
+        "ad_variations": [
+            {"headlines": ["Learn Python"], "descriptions": ["Start coding today"], "keywords": ["python"]},
+            {"headlines": ["Code Bootcamp"], "descriptions": ["Become a developer"], "keywords": ["bootcamp"]}
+        ],
+        "finalized_ad_text": [{"index": 1, "headline": "Bootcamp", "description": "Join now"}],
+        "last_update": "2024-01-01"
+    })
+    return collection
+
+def test_ensure_ad_ids_migrates_index_addressed_entries(ad_collection_fixture):
+    document = ad_collection_fixture.find_one()
+    variations, finalized, version = ad_text_store.ensure_ad_ids(ad_collection_fixture, document)
+
+    assert version == 1
+    assert all("id" in variation for variation in variations)
+    assert finalized[0]["id"] == variations[1]["id"]
+    stored = ad_collection_fixture.find_one()
+    assert stored["ad_text_version"] == 1
+    assert stored["ad_variations"][0]["id"] == variations[0]["id"]
+
+def test_save_finalized_ad_updates_in_place_and_appends(ad_collection_fixture):
+    document = ad_collection_fixture.find_one()
+    variations, _, version = ad_text_store.ensure_ad_ids(ad_collection_fixture, document)
+
+    version = ad_text_store.save_finalized_ad(ad_collection_fixture, document["_id"], version, variations[1]["id"], "New Bootcamp", "Apply")
+    version = ad_text_store.save_finalized_ad(ad_collection_fixture, document["_id"], version, variations[0]["id"], "Python", "Learn")
+
+    stored = ad_collection_fixture.find_one()
+    assert version == 3
+    assert [(fad["id"], fad["headline"]) for fad in stored["finalized_ad_text"]] == [(variations[1]["id"], "New Bootcamp"), (variations[0]["id"], "Python")]
+
+def test_stale_version_raises_conflict(ad_collection_fixture):
+    document = ad_collection_fixture.find_one()
+    variations, _, version = ad_text_store.ensure_ad_ids(ad_collection_fixture, document)
+    ad_text_store.save_finalized_ad(ad_collection_fixture, document["_id"], version, variations[0]["id"], "First", "Edit")
+
+    with pytest.raises(ad_text_store.AdTextConflict):
+        ad_text_store.save_finalized_ad(ad_collection_fixture, document["_id"], version, variations[0]["id"], "Second", "Edit")
+    with pytest.raises(ad_text_store.AdTextConflict):
+        ad_text_store.delete_ad(ad_collection_fixture, document["_id"], version, variations[0]["id"])
+    assert ad_collection_fixture.find_one()["finalized_ad_text"][-1]["headline"] == "First"
+
+def test_delete_ad_removes_variation_and_its_finalized_text(ad_collection_fixture):
+    document = ad_collection_fixture.find_one()
+    variations, _, version = ad_text_store.ensure_ad_ids(ad_collection_fixture, document)
+
+    ad_text_store.delete_ad(ad_collection_fixture, document["_id"], version, variations[1]["id"])
+
+    stored = ad_collection_fixture.find_one()
+    assert [variation["id"] for variation in stored["ad_variations"]] == [variations[0]["id"]]
+    assert stored["finalized_ad_text"] == []
+
+@pytest.mark.asyncio
+async def test_edit_modal_reports_conflict(ad_collection_fixture):
+    document = ad_collection_fixture.find_one()
+    variations, finalized, version = ad_text_store.ensure_ad_ids(ad_collection_fixture, document)
+    view = AdTextView(variations, finalized, ad_collection_fixture, "2024-01-01", document_id=document["_id"], version=version)
+    ad_collection_fixture.update_one({"_id": document["_id"]}, {"$inc": {"ad_text_version": 1}})
+
+    modal = AdEditModal("Learn Python", "Start coding today", 0, ad_collection_fixture, view, ad_id=variations[0]["id"])
+    modal.headline._value = "Learn Python Fast"
+    modal.description._value = "Start coding today"
+    interaction = AsyncMock()
+    await modal.on_submit(interaction)
+
+    message = interaction.followup.send.call_args.args[0]
+    assert "changed by someone else" in message
+    assert ad_collection_fixture.find_one()["finalized_ad_text"][0]["headline"] == "Bootcamp"
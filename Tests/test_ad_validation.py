@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import AsyncMock
+import Helpers.ad_validation as ad_validation
+from Helpers.helperClasses import ConfirmSelectedAdsView, AdVariationView
+
+VALID_AD = {
+    "headlines": ["Learn Python Online", "Python For Beginners", "Start Coding Today"],
+    "descriptions": ["Hands-on lessons with real projects.", "Study at your own pace."],
+    "keywords": ["python course"]
+}
+
+def codes(violations):
+    return [(violation.field, violation.item_index, violation.code) for violation in violations]
+
+def test_valid_ad_has_no_violations():
+    assert ad_validation.validate_ads([VALID_AD]) == {}
+
+def test_batch_reports_structured_violations_per_ad():
+    invalid = {
+        "headlines": ["A headline that is clearly longer than thirty", "Sale!", "sale!"],
+        "descriptions": ["Only one description ★"],
+    }
+    results = ad_validation.validate_ads([VALID_AD, invalid])
+
+    assert list(results) == [1]
+    assert codes(results[1]) == [
+        ("headlines", 0, "too_long"),
+        ("headlines", 1, "disallowed_characters"),
+        ("headlines", 2, "disallowed_characters"),
+        ("headlines", 2, "duplicate"),
+        ("descriptions", None, "too_few"),
+        ("descriptions", 0, "disallowed_characters"),
+    ]
+    assert results[1][0].message == "Headline 1 exceeds limit by 15 characters"
+
+def test_single_text_checks_skip_counts():
+    assert ad_validation.validate_text("Fine headline", "headlines") == []
+    assert codes(ad_validation.validate_text("Too many!!", "descriptions")) == [("descriptions", 0, "repeated_punctuation")]
+
+@pytest.mark.asyncio
+async def test_create_ads_never_sends_invalid_ads(monkeypatch):
+    invalid = dict(VALID_AD, headlines=["Only one headline"])
+    view = ConfirmSelectedAdsView([invalid, VALID_AD], "123", {}, "Campaign", "https://example.com")
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+    interaction = AsyncMock()
+
+    await view.create_ads(interaction)
+
+    create_ad_request.assert_awaited_once()
+    assert create_ad_request.call_args.args == ("123", {}, "Campaign", "https://example.com", VALID_AD)
+    assert "Ad 1: Needs at least 3 headlines" in interaction.followup.send.call_args_list[0].args[0]
+
+@pytest.mark.asyncio
+async def test_variation_view_flags_invalid_ads_on_load():
+    invalid = dict(VALID_AD, descriptions=["x" * 95, "ok"])
+    view = AdVariationView([VALID_AD, invalid], "123", {}, "Campaign", "https://example.com")
+    assert list(view.violations) == [1]
+
+    view.current_index = 1
+    embed = view.get_embed()
+    assert "Description 1 exceeds limit by 5 characters" in embed.fields[-1].value
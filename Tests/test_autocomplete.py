@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import Helpers.autocomplete as autocomplete
+from Helpers.helperClasses import ResearchPathsView, UserPersonaView
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    autocomplete.clear_autocomplete_cache()
+    yield
+    autocomplete.clear_autocomplete_cache()
+
+def test_suggest_orders_whole_prefix_matches_first():
+    autocomplete.remember_business(1, "Acme")
+    autocomplete.refresh("Acme", 'keywords', {
+        "selected_keywords": [{"text": "python course"}],
+        "keywords": {"learn python": {}, "python bootcamp": {}, "java course": {}}
+    })
+
+    assert autocomplete.suggest(1, 'keywords', "pyth") == [
+        ("python bootcamp", "python bootcamp"),
+        ("python course", "python course"),
+        ("learn python", "learn python"),
+    ]
+    assert [value for _, value in autocomplete.suggest(1, 'keywords', "COURSE")] == ["java course", "python course"]
+    assert len(autocomplete.suggest(1, 'keywords', "")) == 4
+
+def test_set_items_updates_the_existing_index_in_place():
+    index = autocomplete.set_items("Acme", 'user_personas', [{"title": "Career Switcher"}, "Night Owl"])
+    assert autocomplete.set_items("ACME", 'user_personas', [{"title": "Career Switcher"}, {"title": "Weekend Learner"}]) is index
+    assert sorted(index.keys()) == ["Career Switcher", "Weekend Learner"]
+    assert index.search("night") == set()
+
+@pytest.mark.asyncio
+async def test_cold_index_loads_in_background(monkeypatch):
+    loop_thread = threading.get_ident()
+    load_threads = []
+    refresh_threads = []
+    def fake_load(user_id, kind, business_name):
+        load_threads.append(threading.get_ident())
+        return "Acme", {"list_of_paths_taken": ["Explore SEO", "Explore ads"]}
+    refresh = autocomplete.refresh
+    def recording_refresh(*args):
+        refresh_threads.append(threading.get_ident())
+        return refresh(*args)
+    monkeypatch.setattr(autocomplete, "load", fake_load)
+    monkeypatch.setattr(autocomplete, "refresh", recording_refresh)
+
+    assert autocomplete.suggest(5, 'research_paths', "explore") == []
+    await asyncio.wait_for(asyncio.gather(*autocomplete._load_tasks), 1)
+    assert [value for _, value in autocomplete.suggest(5, 'research_paths', "seo")] == ["Explore SEO"]
+    # Mongo is read in a worker thread; the index is only changed on the loop
+    assert load_threads and loop_thread not in load_threads
+    assert refresh_threads == [loop_thread]
+
+def test_remembered_businesses_are_bounded(monkeypatch):
+    monkeypatch.setattr(autocomplete, "BUSINESS_CACHE_SIZE", 2)
+    autocomplete.remember_business(1, "Acme")
+    autocomplete.remember_business(2, "Globex")
+    assert autocomplete.business_for(1) == "Acme"
+    autocomplete.remember_business(3, "Initech")
+    assert autocomplete.business_for(2) is None
+    assert autocomplete.business_for(1) == "Acme" and autocomplete.business_for(3) == "Initech"
+
+@pytest.mark.asyncio
+async def test_views_open_on_chosen_item_and_keep_index_current(monkeypatch):
+    paths = [f"Path {i}" for i in range(12)]
+    view = ResearchPathsView(paths, "Acme")
+    view.go_to(autocomplete.find_item('research_paths', paths, "Path 11"))
+    assert view.current_page == 2
+
+    collection = MagicMock()
+    collection.update_one.return_value.modified_count = 1
+    monkeypatch.setattr("Helpers.helperClasses.connect_to_mongo_and_get_collection", lambda *args: collection)
+    autocomplete.remember_business(9, "Acme")
+    personas = UserPersonaView([{"title": "Career Switcher"}], "Acme")
+    await personas.add_persona(AsyncMock(), {"title": "Weekend Learner"})
+    assert [value for _, value in autocomplete.suggest(9, 'user_personas', "week")] == ["Weekend Learner"]
+
+    personas.go_to(autocomplete.find_item('user_personas', personas.personas, "Career Switcher"))
+    assert personas.current_page == 0 and personas.previous_button.disabled and not personas.next_button.disabled
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import AsyncMock
+import Helpers.campaign_index as campaign_index
+from Helpers.helperClasses import CampaignSelectView
+
+def make_response(accounts, per_account):
+    return {
+        f"acct{a}": {
+            "Account Name": f"Agency Client {a}",
+            "Campaigns": [
+                {"Campaign Name": f"{'Spring' if c % 2 else 'Winter'} Sale {c}", "Campaign ID": a * 1000 + c, "Budget": 10.0 + c}
+                for c in range(per_account)
+            ]
+        }
+        for a in range(accounts)
+    }
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    campaign_index.clear_campaign_cache()
+    yield
+    campaign_index.clear_campaign_cache()
+
+def test_index_looks_up_by_id_and_searches_word_prefixes():
+    index = campaign_index.CampaignIndex.from_response(make_response(3, 40))
+    assert len(index) == 120
+    assert index.get(2017)['name'] == "Agency Client 2 - Spring Sale 17"
+    assert index.get("2017") is index.get(2017)
+    assert index.get("missing") is None
+
+    assert len(index.search("agency spr")) == 60
+    assert [c['id'] for c in index.search("SPRING 17")] == [17, 1017, 2017]
+    assert index.search("1005")[0]['id'] == 1005
+    assert index.search("autumn") == []
+    assert len(index.search("", limit=25)) == 25
+
+def test_cache_expires(monkeypatch):
+    index = campaign_index.CampaignIndex.from_response(make_response(1, 2))
+    campaign_index.remember(7, index)
+    assert campaign_index.get_cached(7) is index
+
+    monkeypatch.setattr(campaign_index, "CAMPAIGN_CACHE_TTL", -1)
+    campaign_index.remember(7, index)
+    assert campaign_index.get_cached(7) is None
+
+@pytest.mark.asyncio
+async def test_select_view_pages_and_searches_past_25_campaigns(monkeypatch):
+    index = campaign_index.CampaignIndex.from_response(make_response(4, 50))
+    view = CampaignSelectView(index, "123", {}, "Business", "https://example.com")
+    assert len(view.campaign_select.options) == 25
+    assert "page 1 of 8, 200 campaigns" in view.get_content()
+
+    interaction = AsyncMock()
+    for _ in range(7):
+        await view.next_callback(interaction)
+    assert view.next_button.disabled
+    assert view.campaign_select.options[-1].value == "3049"
+
+    view.set_query("client 3 winter 48")
+    assert [option.value for option in view.campaign_select.options] == ["3048"]
+
+    send_ad_variations = AsyncMock()
+    monkeypatch.setattr("Helpers.helperClasses.send_ad_variations", send_ad_variations)
+    view.campaign_select._values = ["3048"]
+    await view.campaign_selected(interaction)
+    assert send_ad_variations.call_args.args[1] is index.get(3048)
@@ -0,0 +1,181 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import Helpers.dashboard as dashboard
+from EventHandlers.first_agent_interations import handle_overview
+import EventHandlers.ad_interactions as ad_interactions
+
+class FakeStream:
+    def __init__(self, client, changes, start_token):
+        self.client = client
+        self.changes = list(changes)
+        self.resume_token = start_token or {'_data': 'start'}
+        self.alive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        if not self.changes:
+            self.client.updater._stop.set()
+            return None
+        change = self.changes.pop(0)
+        self.resume_token = change['_id']
+        return change
+
+class ChangeStreamClient:
+    """mongomock has no change streams; this hands out scripted ones."""
+    def __init__(self):
+        self.mongo = MongoClient()
+        self.changes = []
+        self.resumed_from = []
+        self.updater = None
+
+    def __getitem__(self, name):
+        return self.mongo[name]
+
+    def watch(self, pipeline, full_document=None, resume_after=None, max_await_time_ms=None):
+        self.resumed_from.append(resume_after)
+        return FakeStream(self, self.changes, resume_after)
+
+@pytest.fixture
+def client():
+    client = ChangeStreamClient()
+    client['mappings']['companies'].insert_one({"owner_ids": [1], "business_name": "Acme", "onboarded": True})
+    client['marketing_agent']['acme'].insert_one({"business": "We teach Python.", "user_personas": ["a", "b"], "list_of_paths_taken": ["p"]})
+    client['judge_data']['Acme'].insert_one({
+        "keywords": {"learn python": {"avg_monthly_searches": "500"}, "python course": {"avg_monthly_searches": 900}, "obscure": {}},
+        "selected_keywords": [{"text": "python course", "avg_monthly_searches": 900}],
+        "ad_variations": [{}, {}, {}],
+        "last_update": "2024-05-01"
+    })
+    return client
+
+def run_updater(client, changes):
+    store = dashboard.DashboardStore(client)
+    client.changes = changes
+    client.updater = dashboard.DashboardUpdater(store)
+    client.updater.run()
+    return store
+
+def test_first_run_rebuilds_everything_and_stores_a_token(client):
+    store = run_updater(client, [])
+    summary = store.for_owner(1)
+    assert summary['_id'] == "acme" and summary['onboarded']
+    assert summary['business_blurb'] == "We teach Python."
+    assert (summary['persona_count'], summary['selected_keyword_count'], summary['new_keyword_count']) == (2, 1, 3)
+    assert [k['text'] for k in summary['top_keywords']] == ["python course", "learn python"]
+    assert summary['ad_variation_count'] == 3 and summary['last_update'] == "2024-05-01"
+    assert client.updater.load_token() == {'_data': 'start'}
+
+def test_changes_update_one_half_and_resume_after_restart(client):
+    run_updater(client, [])
+    client['judge_data']['Acme'].insert_one({"keywords": ["fresh keyword"], "finalized_ad_text": [{}], "last_update": "2024-06-01"})
+    store = run_updater(client, [{
+        '_id': {'_data': 'token-1'},
+        'operationType': 'insert',
+        'ns': {'db': 'judge_data', 'coll': 'Acme'}
+    }])
+    assert client.resumed_from == [None, {'_data': 'start'}]
+    summary = store.for_owner(1)
+    assert (summary['new_keyword_count'], summary['finalized_ad_count'], summary['last_update']) == (1, 1, "2024-06-01")
+    assert summary['persona_count'] == 2
+    assert client.updater.load_token() == {'_data': 'token-1'}
+
+    client['mappings']['companies'].update_one({}, {"$push": {"owner_ids": 2}})
+    run_updater(client, [{
+        '_id': {'_data': 'token-2'},
+        'operationType': 'update',
+        'ns': {'db': 'mappings', 'coll': 'companies'},
+        'fullDocument': client['mappings']['companies'].find_one()
+    }])
+    assert store.for_owner(2)['_id'] == "acme"
+    assert client.resumed_from[-1] == {'_data': 'token-1'}
+
+def test_moved_and_deleted_owners_lose_their_dashboard(client):
+    store = run_updater(client, [])
+    companies = client['mappings']['companies']
+    # Owner 1 moves to a new business; the old one's change may arrive later or not at all
+    companies.insert_one({"owner_ids": [1], "business_name": "Globex", "onboarded": True})
+    run_updater(client, [{
+        '_id': {'_data': 'token-1'}, 'operationType': 'insert', 'ns': {'db': 'mappings', 'coll': 'companies'},
+        'fullDocument': companies.find_one({"business_name": "Globex"})
+    }])
+    assert store.for_owner(1)['_id'] == "globex"
+    assert store.dashboards.find_one({'_id': 'acme'})['owner_ids'] == []
+
+    companies.update_one({"business_name": "Acme"}, {"$set": {"owner_ids": [2]}})
+    acme = companies.find_one({"business_name": "Acme"})
+    run_updater(client, [{
+        '_id': {'_data': 'token-2'}, 'operationType': 'update', 'ns': {'db': 'mappings', 'coll': 'companies'}, 'fullDocument': acme
+    }])
+    assert store.for_owner(2)['_id'] == "acme"
+
+    companies.delete_one({'_id': acme['_id']})
+    run_updater(client, [{
+        '_id': {'_data': 'token-3'}, 'operationType': 'delete', 'ns': {'db': 'mappings', 'coll': 'companies'},
+        'documentKey': {'_id': acme['_id']}
+    }])
+    assert store.for_owner(2) is None
+    assert 'onboarded' not in store.dashboards.find_one({'_id': 'acme'})
+
+@pytest.mark.asyncio
+async def test_overview_reads_the_dashboard(client):
+    store = run_updater(client, [])
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.client.dashboards = store
+    interaction.response = AsyncMock()
+
+    await handle_overview(interaction)
+    embed = interaction.response.send_message.call_args.kwargs['embed']
+    assert embed.title == "Acme Overview"
+    assert {field.name: field.value for field in embed.fields}["Keywords"] == "1 selected, 3 new"
+
+@pytest.mark.asyncio
+async def test_business_commands_start_from_the_dashboard(client, monkeypatch):
+    store = run_updater(client, [])
+    check_onboarded_status = AsyncMock(return_value=True)
+    def connect(connection_string, database, name):
+        return client[database][next(n for n in client[database].list_collection_names() if n.lower() == name.lower())]
+    monkeypatch.setattr(ad_interactions, "connect_to_mongo_and_get_collection", connect)
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.client.dashboards = store
+    interaction.response = AsyncMock()
+    interaction.followup = AsyncMock()
+
+    # The dashboard answers who the business is and whether its owner is onboarded
+    await ad_interactions.handle_keywords(interaction, check_onboarded_status)
+    assert interaction.followup.send.call_args.kwargs['view'].business_name == "Acme"
+    check_onboarded_status.assert_not_awaited()
+
+    # and empty states, without loading the business's documents
+    store.dashboards.update_one({'_id': 'acme'}, {'$set': {'ad_variation_count': 0}})
+    monkeypatch.setattr(ad_interactions, "connect_to_mongo_and_get_collection", MagicMock(side_effect=AssertionError))
+    await ad_interactions.handle_adtext(interaction, check_onboarded_status)
+    assert interaction.response.send_message.call_args.args[0] == "No ad variations found for your business in the latest document."
+
+@pytest.mark.asyncio
+async def test_without_change_streams_dashboards_are_not_rebuilt_on_every_read(client, monkeypatch):
+    store = run_updater(client, [])
+    store.live = False
+    rebuild = MagicMock(wraps=store.rebuild)
+    monkeypatch.setattr(store, "rebuild", rebuild)
+    store.summary_for(1)
+    store.summary_for(1)
+    assert rebuild.call_count == 1
+
+    # Per-business commands go back to the onboarding check and the mappings record
+    check_onboarded_status = AsyncMock(return_value=True)
+    monkeypatch.setattr(dashboard, "connect_to_mongo_and_get_collection", lambda *args: client['mappings']['companies'])
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.client.dashboards = store
+    onboarded, record = await dashboard.business_record(interaction, check_onboarded_status)
+    assert onboarded and record['business_name'] == "Acme" and 'ad_variation_count' not in record
+    check_onboarded_status.assert_awaited_once_with(1)
+    assert rebuild.call_count == 1
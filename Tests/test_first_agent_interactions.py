@@ -64,6 +64,7 @@ async def test_business_command(bot, mock_collection_fixture, connect_to_mongo_a
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.first_agent_interations.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -89,6 +90,7 @@ async def test_research_paths_command(bot, mock_collection_fixture, connect_to_m
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.first_agent_interations.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -117,6 +119,7 @@ async def test_user_personas_command(bot, mock_collection_fixture, connect_to_mo
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.first_agent_interations.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Mock the check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -144,6 +147,7 @@ async def test_command_not_onboarded(bot, mock_collection_fixture, connect_to_mo
     # Mock the MongoDB connection
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
     monkeypatch.setattr("EventHandlers.first_agent_interations.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
+    monkeypatch.setattr("Helpers.dashboard.connect_to_mongo_and_get_collection", connect_to_mongo_and_get_collection_fixture)
 
     # Override the mock_check_onboarded_status function
     async def mock_check_onboarded_status(owner_id):
@@ -0,0 +1,17 @@
+import discord
+import pytest
+import Helpers.gateway_profile as gateway_profile
+
+def test_lean_profile_drops_member_and_message_caches():
+    options = gateway_profile.client_options(gateway_profile.PROFILE_LEAN)
+    intents = options['intents']
+    assert intents.guilds and intents.guild_messages and intents.message_content
+    assert not intents.members and not intents.presences and not intents.dm_messages
+    client = discord.Client(**options)
+    assert client._connection.max_messages is None
+    assert client._connection.member_cache_flags.value == 0
+    assert not client._connection._chunk_guilds
+
+    assert gateway_profile.client_options(gateway_profile.PROFILE_FULL)['intents'].members
+    with pytest.raises(ValueError):
+        gateway_profile.client_options("tiny")
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import EventHandlers.onboarding as onboarding
+
+class BulkCollection:
+    """
+    mongomock's bulk_write does not accept the UpdateOne objects of current pymongo, so the
+    operations are applied one by one.
+    """
+    def __init__(self, collection):
+        self.collection = collection
+        self.bulk_writes = []
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(operations)
+        for operation in operations:
+            self.collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+def make_guild(guild_id, owner_id, can_post=True):
+    guild = MagicMock()
+    guild.id = guild_id
+    guild.owner_id = owner_id
+    channel = AsyncMock()
+    channel.permissions_for = MagicMock(return_value=MagicMock(manage_webhooks=True, send_messages=can_post))
+    channel.create_webhook.return_value = MagicMock(url=f"https://discord.com/api/webhooks/{guild_id}/x")
+    guild.text_channels = [channel]
+    return guild
+
+@pytest.fixture
+def companies(monkeypatch):
+    collection = BulkCollection(MongoClient().mappings.companies)
+    monkeypatch.setattr(onboarding, "connect_to_mongo_and_get_collection", lambda *args: collection)
+    monkeypatch.setattr(onboarding.outbound, "scheduler", None)
+    return collection
+
+@pytest.mark.asyncio
+async def test_bootstrap_sets_up_only_guilds_joined_while_offline(companies):
+    companies.insert_one({"owner_ids": [1], "guild_ids": [10], "business_name": "Acme", "onboarded": True})
+    companies.insert_one({"owner_ids": [2], "guild_ids": [20], "business_name": "Beta", "onboarded": False})
+    known, new_owner, second_guild = make_guild(10, 1), make_guild(30, 3), make_guild(21, 2)
+    guild_onboarded_status, guild_states = {}, {}
+
+    set_up = await onboarding.bootstrap_guilds([known, new_owner, second_guild], guild_onboarded_status, guild_states, workers=2)
+
+    assert set_up == 2
+    assert len(companies.bulk_writes) == 1
+    assert guild_onboarded_status == {10: True, 30: False, 21: False}
+    assert guild_states == {30: "waiting_for_business_name"}
+    known.text_channels[0].send.assert_not_awaited()
+    assert new_owner.text_channels[0].send.await_args_list[-1].args[0] == onboarding.FIRST_QUESTION
+    assert second_guild.text_channels[0].send.await_args_list[0].args[0] == "Welcome back Beta!"
+
+    new_record = companies.find_one({"owner_ids": 3})
+    assert new_record["guild_ids"] == [30] and new_record["onboarded"] == False
+    assert new_record["webhook_url"] == "https://discord.com/api/webhooks/30/x"
+    assert companies.find_one({"owner_ids": 2})["guild_ids"] == [20, 21]
+
+@pytest.mark.asyncio
+async def test_bootstrap_backfills_legacy_records_silently(companies):
+    companies.insert_one({"owner_ids": [1], "business_name": "Acme", "onboarded": True})
+    guild = make_guild(10, 1)
+    guild_onboarded_status = {}
+
+    assert await onboarding.bootstrap_guilds([guild], guild_onboarded_status, {}) == 0
+    assert guild_onboarded_status == {10: True}
+    assert companies.find_one({"owner_ids": 1})["guild_ids"] == [10]
+    guild.text_channels[0].send.assert_not_awaited()
+    guild.text_channels[0].create_webhook.assert_not_awaited()
+
+def test_choose_channels_uses_one_pass_over_cached_permissions():
+    guild = MagicMock()
+    muted = MagicMock(permissions_for=MagicMock(return_value=MagicMock(manage_webhooks=True, send_messages=False)))
+    general = MagicMock(permissions_for=MagicMock(return_value=MagicMock(manage_webhooks=False, send_messages=True)))
+    guild.text_channels = [muted, general]
+
+    assert onboarding.choose_channels(guild) == ([muted], general)
+    assert muted.permissions_for.call_count == 1 and general.permissions_for.call_count == 1
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock
+from mongomock import MongoClient
+import Helpers.idempotency as idempotency
+from Helpers.helperClasses import ConfirmSelectedAdsView
+
+AD = {
+    "headlines": ["Learn Python Online", "Python For Beginners", "Start Coding Today"],
+    "descriptions": ["Hands-on lessons with real projects.", "Study at your own pace."],
+    "keywords": ["python course"]
+}
+
+@pytest.fixture
+def ledger():
+    ledger = idempotency.IdempotencyLedger(MongoClient().db.idempotency)
+    ledger.ensure_indexes()
+    return ledger
+
+def make_interaction(ledger):
+    interaction = AsyncMock()
+    interaction.client.job_queue = None
+    interaction.client.idempotency_ledger = ledger
+    interaction.data = {"custom_id": "confirm"}
+    return interaction
+
+def test_keys_are_deterministic_per_business_campaign_and_content():
+    spaced = dict(AD, headlines=["Learn  Python Online ", "Python For Beginners", "Start Coding Today"])
+    assert idempotency.ad_key("123", "Campaign", AD) == idempotency.ad_key("123", " - Campaign", spaced)
+    assert idempotency.ad_key("123", "Campaign", AD) != idempotency.ad_key("456", "Campaign", AD)
+    assert idempotency.ad_key("123", "Campaign", AD) != idempotency.ad_key("123", "Other", AD)
+
+def test_ledger_replays_completed_keys_and_reopens_abandoned_ones(ledger):
+    assert ledger.begin("ad:1", "ad", owner="job-a") is None
+    assert ledger.begin("ad:1", "ad", owner="job-b")['state'] == idempotency.LEDGER_PENDING
+    # A retry of the job that holds the key may carry on
+    assert ledger.begin("ad:1", "ad", owner="job-a") is None
+
+    ledger.complete("ad:1", {"status": 200})
+    assert ledger.begin("ad:1", "ad", owner="job-b")['result'] == {"status": 200}
+
+    assert ledger.begin("ad:2", "ad") is None
+    ledger.abandon("ad:2", "HTTP 503")
+    assert ledger.begin("ad:2", "ad") is None
+
+@pytest.mark.asyncio
+async def test_repeated_submissions_do_not_resend_ads(monkeypatch, ledger):
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+
+    for _ in range(2):
+        view = ConfirmSelectedAdsView([AD], "123", {}, "Campaign", "https://example.com")
+        interaction = make_interaction(ledger)
+        await view.create_ads(interaction)
+
+    create_ad_request.assert_awaited_once()
+    final = interaction.followup.edit_message.call_args.kwargs["content"]
+    assert "1 out of 1 ads were created successfully! 1 of them had already been created" in final
+
+@pytest.mark.asyncio
+async def test_confirm_view_has_one_button_and_ignores_double_clicks(monkeypatch, ledger):
+    view = ConfirmSelectedAdsView([AD], "123", {}, "Campaign", "https://example.com")
+    assert [item.custom_id for item in view.children].count("confirm") == 1
+
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+    first, second = make_interaction(ledger), make_interaction(ledger)
+    await view.interaction_check(first)
+    await view.interaction_check(second)
+
+    create_ad_request.assert_awaited_once()
+    second.response.send_message.assert_awaited_once_with("These ads were already submitted.", ephemeral=True)
+
+def test_ledger_entries_expire(ledger):
+    indexes = ledger.collection.index_information()
+    ttl = [index for index in indexes.values() if 'expireAfterSeconds' in index]
+    assert [index['key'] for index in ttl] == [[('updated_at', 1)]]
+    assert ttl[0]['expireAfterSeconds'] == idempotency.ENTRY_TTL_SECONDS > ledger.pending_timeout
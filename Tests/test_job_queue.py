@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import Helpers.job_queue as job_queue
+from Helpers.helperClasses import ConfirmSelectedAdsView
+
+AD = {
+    "headlines": ["Learn Python Online", "Python For Beginners", "Start Coding Today"],
+    "descriptions": ["Hands-on lessons with real projects.", "Study at your own pace."],
+    "keywords": ["python course"]
+}
+
+@pytest.fixture
+def collection():
+    return MongoClient().db.jobs
+
+@pytest.fixture
+def queue(collection):
+    return job_queue.JobQueue(collection, concurrency=2, poll_interval=0.01, retry_base_seconds=0)
+
+@job_queue.job_handler('test_echo')
+async def echo_job(context):
+    await context.progress("halfway", step=1)
+    return f"echo {context.payload['value']}"
+
+@job_queue.job_handler('test_flaky')
+async def flaky_job(context):
+    if context.attempt < 2:
+        raise RuntimeError("temporary outage")
+    return "recovered"
+
+@job_queue.job_handler('test_rejected')
+async def rejected_job(context):
+    raise job_queue.JobFailed("bad request")
+
+async def run_until_settled(queue, job_id):
+    queue.start()
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job['state'] in (job_queue.JOB_SUCCEEDED, job_queue.JOB_FAILED):
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    return queue.get(job_id)
+
+@pytest.mark.asyncio
+async def test_job_runs_to_success_and_drops_payload(queue):
+    job_id = queue.enqueue('test_echo', {'value': 7})
+    job = await run_until_settled(queue, job_id)
+
+    assert job['state'] == job_queue.JOB_SUCCEEDED
+    assert job['result'] == "echo 7"
+    assert job['checkpoint'] == {'step': 1}
+    assert job['payload'] is None
+
+@pytest.mark.asyncio
+async def test_failed_attempts_are_retried(queue):
+    job = await run_until_settled(queue, queue.enqueue('test_flaky', {}))
+    assert job['state'] == job_queue.JOB_SUCCEEDED
+    assert job['attempts'] == 2
+
+@pytest.mark.asyncio
+async def test_permanent_failures_are_not_retried(queue):
+    job = await run_until_settled(queue, queue.enqueue('test_rejected', {}))
+    assert job['state'] == job_queue.JOB_FAILED
+    assert job['attempts'] == 1
+    assert job['error'] == "bad request"
+
+def test_abandoned_running_job_is_claimed_again(queue, collection):
+    job_id = queue.enqueue('test_echo', {'value': 1})
+    first = queue.claim()
+    assert first['_id'] == job_id and queue.claim() is None
+
+    # Simulate a restart: the lease of the running job has run out
+    collection.update_one({'_id': job_id}, {'$set': {'lease_until': job_queue.utcnow() - timedelta(seconds=1)}})
+    again = queue.claim()
+    assert again['_id'] == job_id
+    assert again['attempts'] == 2
+
+@job_queue.job_handler('test_isolated', isolated=True)
+async def isolated_job(context):
+    return "done"
+
+def test_view_jobs_stay_on_the_cluster_that_received_them(collection):
+    cluster_0 = job_queue.JobQueue(collection, cluster_id=0)
+    cluster_1 = job_queue.JobQueue(collection, cluster_id=1)
+
+    # A job that may send views only runs on the cluster whose shard the interaction came from
+    view_job = cluster_0.enqueue('test_echo', {'value': 1})
+    assert collection.find_one({'_id': view_job})['cluster_id'] == 0
+    assert cluster_1.claim() is None
+    assert cluster_0.claim()['_id'] == view_job
+
+    # Isolated jobs send no views, so any cluster can take them
+    isolated_id = cluster_0.enqueue('test_isolated', {})
+    assert cluster_1.claim()['_id'] == isolated_id
+
+    # A worker process is not a cluster and keeps claiming isolated jobs from all of them
+    worker = job_queue.JobQueue(collection, job_types=job_queue.isolated_job_types())
+    isolated_id = cluster_1.enqueue('test_isolated', {})
+    assert worker.claim()['_id'] == isolated_id
+
+@pytest.mark.asyncio
+async def test_create_ads_returns_job_handle_and_resumes_after_checkpoint(monkeypatch, collection):
+    queue = job_queue.JobQueue(collection, poll_interval=0.01)
+    interaction = AsyncMock()
+    interaction.client = MagicMock(job_queue=queue)
+    interaction.user.id = 42
+    interaction.application_id = 1
+    interaction.token = "token"
+    interaction.followup.send.return_value = MagicMock(id=99)
+    view = ConfirmSelectedAdsView([AD, dict(AD, headlines=["Bread Baked Daily", "Local Bakery", "Order Cakes Online"])],
+                                  "123", {}, "Campaign", "https://example.com")
+
+    await view.create_ads(interaction)
+
+    job = collection.find_one()
+    assert job['state'] == job_queue.JOB_QUEUED and job['owner_id'] == 42
+    assert job['_id'] in interaction.followup.send.call_args.args[0]
+
+    # The first ad was created before an earlier attempt stopped
+    collection.update_one({'_id': job['_id']}, {'$set': {'checkpoint': {'created': [0], 'rejected': []}}})
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+    job = await run_until_settled(queue, job['_id'])
+
+    assert job['state'] == job_queue.JOB_SUCCEEDED
+    assert create_ad_request.await_count == 1
+    assert job['result'] == "2 out of 2 ads were created successfully!"
+
+@pytest.mark.asyncio
+async def test_credentials_and_tokens_are_not_stored_with_jobs(monkeypatch, collection):
+    submitter = job_queue.JobQueue(collection, poll_interval=0.01)
+    interaction = AsyncMock()
+    interaction.client = MagicMock(job_queue=submitter)
+    interaction.user.id = 42
+    interaction.application_id = 1
+    interaction.token = "interaction-token"
+    interaction.followup.send.return_value = MagicMock(id=99)
+    view = ConfirmSelectedAdsView([AD], "123", {"client_secret": "in-memory"}, "Campaign", "https://example.com", business_name="Acme")
+
+    await view.create_ads(interaction)
+
+    job = collection.find_one()
+    assert "credentials" not in job['payload']
+    assert job['payload']['credentials_ref'] == {"business_name": "Acme", "customer_id": "123"}
+    assert job['notify']['token'] == "interaction-token"
+
+    # Another process has no copy in memory, so it reads the stored credentials by reference
+    loaded = []
+    monkeypatch.setattr("Helpers.helperfuncs.load_credentials", lambda business_name: loaded.append(business_name) or {"client_secret": "stored"})
+    create_ad_request = AsyncMock(return_value=200)
+    monkeypatch.setattr("Helpers.helperClasses.create_ad_request", create_ad_request)
+    job = await run_until_settled(job_queue.JobQueue(collection, poll_interval=0.01), job['_id'])
+
+    assert job['state'] == job_queue.JOB_SUCCEEDED
+    assert loaded == ["Acme"]
+    assert create_ad_request.await_args.args[1] == {"client_secret": "stored"}
+    assert 'token' not in job['notify'] and job['notify']['message_id'] == 99
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import AsyncMock
+from mongomock import MongoClient
+from Helpers.keyword_table import KeywordTable
+from Helpers.keyword_dedupe import normalize_tokens, find_keyword_clusters, get_keyword_clusters, clear_cluster_cache
+from Helpers.helperClasses import KeywordPaginationView
+
+KEYWORDS = [
+    {"text": "Python Course", "avg_monthly_searches": 100, "competition": "LOW"},
+    {"text": "python courses", "avg_monthly_searches": 300, "competition": "LOW"},
+    {"text": "course, python", "avg_monthly_searches": "N/A", "competition": "LOW"},
+    {"text": "coding bootcamp", "avg_monthly_searches": 50, "competition": "HIGH"},
+    {"text": "best coding bootcamp london", "avg_monthly_searches": 10, "competition": "HIGH"},
+]
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_cluster_cache()
+    yield
+    clear_cluster_cache()
+
+def test_normalize_tokens_folds_case_plurals_and_order():
+    assert normalize_tokens("Python Courses") == normalize_tokens("course python")
+    assert normalize_tokens("babies clothes") == normalize_tokens("baby clothes")
+
+def test_clusters_merge_variants_and_sum_volume():
+    table, _ = KeywordTable.from_keywords(KEYWORDS)
+    clusters = find_keyword_clusters(table)
+
+    assert list(clusters.representatives) == [1, 3, 4]
+    assert sorted(clusters.members(1)) == [0, 1, 2]
+    assert clusters.combined_searches(1, table) == 400
+    assert clusters.members(4) == (4,)
+    assert clusters.duplicate_count() == 2
+
+def test_near_duplicates_found_at_scale():
+    keywords = [{"text": f"alpha{i} beta{i} gamma{i} delta{i} epsilon{i}"} for i in range(5000)]
+    keywords.append({"text": "alpha7 beta7 gamma7 delta7 epsilon7 online"})
+    table, _ = KeywordTable.from_keywords(keywords)
+    clusters = find_keyword_clusters(table)
+    assert clusters.cluster_of[5000] == clusters.cluster_of[7]
+    assert clusters.duplicate_count() == 1
+
+def test_clusters_cached_per_table_content():
+    table, _ = KeywordTable.from_keywords(KEYWORDS)
+    first = get_keyword_clusters("biz", table)
+    assert get_keyword_clusters("biz", KeywordTable.from_keywords(KEYWORDS)[0]) is first
+    assert get_keyword_clusters("biz", KeywordTable.from_keywords(KEYWORDS[::-1])[0]) is not first
+
+@pytest.mark.asyncio
+async def test_grouped_category_toggles_whole_cluster():
+    collection = MongoClient().judge_data.test_business
+    collection.insert_one({"keywords": KEYWORDS, "last_update": "2024-01-01"})
+    view = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+    view.current_keyword_type = "clusters"
+
+    embed = view.get_embed()
+    assert embed.fields[0].name.startswith("python courses (+2 variants)")
+    assert "Combined Monthly Searches: 400" in embed.fields[0].value
+
+    interaction = AsyncMock()
+    interaction.data = {"custom_id": "toggle_0"}
+    await view.interaction_check(interaction)
+    assert [doc["text"] for doc in view.table.selected_documents()] == ["Python Course", "python courses", "course, python"]
+
+@pytest.mark.asyncio
+async def test_clusters_follow_saved_selection():
+    collection = MongoClient().judge_data.test_business
+    collection.insert_one({"keywords": KEYWORDS, "selected_keywords": [], "last_update": "2024-01-01"})
+    view = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+
+    # Saving a selection keeps last_update, but the reopened view's table starts with the saved rows
+    view.table.set_selected(view.new_rows[4], True)
+    await view.submit_callback(AsyncMock())
+    reopened = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+    reopened.current_keyword_type = "clusters"
+
+    clusters = reopened.clusters
+    assert reopened.table.text(0) == "best coding bootcamp london"
+    assert sorted(reopened.table.text(row) for row in clusters.members(clusters.cluster_of[1])) == ["Python Course", "course, python", "python courses"]
+    assert reopened.get_embed().fields[0].name.startswith("best coding bootcamp london")
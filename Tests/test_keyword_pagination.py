@@ -0,0 +1,115 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+from mongomock import MongoClient
+from Helpers.helperClasses import KeywordPaginationView
+
+def make_keywords(count):
+    return [{"text": f"keyword {i}", "avg_monthly_searches": i * 10, "competition": "LOW"} for i in range(count)]
+
+@pytest_asyncio.fixture
+def keyword_collection_fixture():
+    client = MongoClient()
+    db = client.judge_data
+    db.test_business.insert_one({
+        "selected_keywords": [],
+        "keywords": make_keywords(60),
+        "last_update": "2023-01-01T00:00:00Z"
+    })
+    return db.test_business
+
+@pytest.mark.asyncio
+async def test_bulk_mode_shows_25_keyword_select(keyword_collection_fixture):
+    view = KeywordPaginationView([], make_keywords(60), keyword_collection_fixture, "Available Keywords", "N/A")
+    view.current_keyword_type = "new"
+    interaction = AsyncMock()
+
+    await view.mode_callback(interaction)
+
+    assert view.bulk_mode
+    assert view.bulk_select in view.children
+    assert len(view.bulk_select.options) == 25
+    assert view.bulk_select.max_values == 25
+    assert not any(item.custom_id and item.custom_id.startswith("toggle_") for item in view.children)
+    interaction.response.edit_message.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_bulk_select_replaces_page_selection(keyword_collection_fixture):
+    view = KeywordPaginationView([], make_keywords(60), keyword_collection_fixture, "Available Keywords", "N/A")
+    view.current_keyword_type = "new"
+    await view.mode_callback(AsyncMock())
+
+    view.table.set_selected(view.new_rows[3], True)
+    view.bulk_select._values = ["0", "1", "2"]
+    await view.bulk_select_callback(AsyncMock())
+
+    documents = view.table.selected_documents()
+    assert [doc["text"] for doc in documents] == ["keyword 0", "keyword 1", "keyword 2"]
+    assert documents[1] == {"text": "keyword 1", "avg_monthly_searches": 10, "competition": "LOW"}
+
+@pytest.mark.asyncio
+async def test_select_all_and_clear_page(keyword_collection_fixture):
+    view = KeywordPaginationView([], make_keywords(60), keyword_collection_fixture, "Available Keywords", "N/A")
+    view.current_keyword_type = "new"
+    await view.mode_callback(AsyncMock())
+
+    await view.select_all_callback(AsyncMock())
+    assert view.table.selected_count() == 60
+
+    await view.next_callback(AsyncMock())
+    await view.clear_page_callback(AsyncMock())
+    assert view.table.selected_count() == 35
+    assert view.table.is_selected(view.new_rows[24])
+    assert not view.table.is_selected(view.new_rows[25])
+
+@pytest.mark.asyncio
+async def test_toggle_mode_reuses_buttons(keyword_collection_fixture):
+    view = KeywordPaginationView([], make_keywords(7), keyword_collection_fixture, "Available Keywords", "N/A")
+    view.current_keyword_type = "new"
+    toggle_buttons = list(view.toggle_buttons)
+
+    await view.next_callback(AsyncMock())
+
+    page_buttons = [item for item in view.children if item.custom_id.startswith("toggle_")]
+    assert [button.custom_id for button in page_buttons] == ["toggle_5", "toggle_6"]
+    assert all(button in toggle_buttons for button in page_buttons)
+    assert view.next_button.disabled
+
+    interaction = AsyncMock()
+    interaction.data = {"custom_id": "toggle_6"}
+    assert await view.interaction_check(interaction) is False
+    assert view.table.is_selected(view.new_rows[6])
+
+@pytest.mark.asyncio
+async def test_keywords_share_rows_across_categories(keyword_collection_fixture):
+    keyword_collection_fixture.update_one({}, {"$set": {"selected_keywords": [{"text": "keyword 2", "avg_monthly_searches": "N/A", "competition": "N/A"}]}})
+    view = KeywordPaginationView([], make_keywords(5), keyword_collection_fixture, "Available Keywords", "N/A")
+
+    assert len(view.table) == 5
+    assert view.selected_rows[0] == view.new_rows[2]
+    assert view.table.is_selected(view.new_rows[2])
+    assert view.table.selected_documents() == [{"text": "keyword 2", "avg_monthly_searches": "N/A", "competition": "N/A"}]
+
+@pytest.mark.asyncio
+async def test_unknown_competition_is_written_back_unchanged(keyword_collection_fixture):
+    keywords = make_keywords(2)
+    keywords[1]["competition"] = "VERY_HIGH"
+    view = KeywordPaginationView([], keywords, keyword_collection_fixture, "Available Keywords", "N/A")
+
+    view.table.set_selected(view.new_rows[1], True)
+    assert view.table.competition_label(view.new_rows[1]) == "VERY_HIGH"
+    assert view.table.selected_documents() == [{"text": "keyword 1", "avg_monthly_searches": 10, "competition": "VERY_HIGH"}]
+
+@pytest.mark.asyncio
+async def test_unparsed_searches_are_written_back_unchanged(keyword_collection_fixture):
+    keywords = make_keywords(4)
+    keywords[1]["avg_monthly_searches"] = "1,200"
+    keywords[2]["avg_monthly_searches"] = 950.5
+    keywords[3]["avg_monthly_searches"] = "500"
+    view = KeywordPaginationView([], keywords, keyword_collection_fixture, "Available Keywords", "N/A")
+
+    for row in view.new_rows[1:]:
+        view.table.set_selected(row, True)
+    assert [document["avg_monthly_searches"] for document in view.table.selected_documents()] == ["1,200", 950.5, "500"]
+    # Ranking still sees them as numbers where they parse
+    assert list(view.table.searches[row] for row in view.new_rows[1:]) == [-1, 950, 500]
@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import AsyncMock
+from mongomock import MongoClient
+import Helpers.keyword_ranking as keyword_ranking
+from Helpers.keyword_table import KeywordTable
+from Helpers.helperClasses import KeywordPaginationView
+
+KEYWORDS = [
+    {"text": "no data", "avg_monthly_searches": "N/A", "competition": "N/A"},
+    {"text": "busy and crowded", "avg_monthly_searches": 50000, "competition": "HIGH"},
+    {"text": "busy and open", "avg_monthly_searches": 40000, "competition": "LOW"},
+    {"text": "quiet and open", "avg_monthly_searches": 100, "competition": "LOW"},
+]
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    keyword_ranking.clear_ranking_cache()
+    yield
+    keyword_ranking.clear_ranking_cache()
+
+def test_rank_prefers_volume_with_low_competition():
+    table, (rows,) = KeywordTable.from_keywords(KEYWORDS)
+    scores = keyword_ranking.score_keywords(table)
+    ranked = keyword_ranking.rank_rows(scores, rows)
+    assert [table.text(row) for row in ranked] == ["busy and open", "busy and crowded", "quiet and open", "no data"]
+
+def test_user_weights_change_order():
+    table, (rows,) = KeywordTable.from_keywords(KEYWORDS)
+    scores = keyword_ranking.score_keywords(table, {"volume": 0.1, "competition": 1.0})
+    ranked = keyword_ranking.rank_rows(scores, rows)
+    assert [table.text(row) for row in ranked][:2] == ["busy and open", "quiet and open"]
+
+def test_ranked_rows_are_cached_per_table_content():
+    table, rows = KeywordTable.from_keywords(KEYWORDS)
+    first = keyword_ranking.get_ranked_rows("biz", table, rows)
+    rebuilt, rebuilt_rows = KeywordTable.from_keywords(KEYWORDS)
+    assert keyword_ranking.get_ranked_rows("biz", rebuilt, rebuilt_rows) is first
+    reordered, reordered_rows = KeywordTable.from_keywords(KEYWORDS[1:2], KEYWORDS)
+    assert keyword_ranking.get_ranked_rows("biz", reordered, reordered_rows) is not first
+
+@pytest.mark.asyncio
+async def test_view_rank_button_reorders_pages():
+    collection = MongoClient().judge_data.test_business
+    collection.insert_one({"keywords": KEYWORDS, "last_update": "2024-01-01"})
+    view = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+    view.current_keyword_type = "new"
+
+    await view.rank_callback(AsyncMock())
+
+    assert view.table.text(view.current_rows()[0]) == "busy and open"
+    assert "Score:" in view.get_embed().fields[0].value
+
+@pytest.mark.asyncio
+async def test_ranking_follows_saved_selection():
+    collection = MongoClient().judge_data.test_business
+    collection.insert_one({"keywords": KEYWORDS, "selected_keywords": [], "last_update": "2024-01-01"})
+    view = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+    await view.rank_callback(AsyncMock())
+
+    # Saving a selection keeps last_update but reorders the rows the next view builds
+    view.table.set_selected(view.new_rows[3], True)
+    await view.submit_callback(AsyncMock())
+    reopened = KeywordPaginationView([], KEYWORDS, collection, "Available Keywords", "2024-01-01", business_name="test business")
+    await reopened.rank_callback(AsyncMock())
+
+    selected, new = reopened.ranked_rows[0], reopened.ranked_rows[1]
+    assert [reopened.table.text(row) for row in selected] == ["quiet and open"]
+    assert sorted(reopened.table.text(row) for row in new) == sorted(keyword["text"] for keyword in KEYWORDS)
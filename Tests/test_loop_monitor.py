@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+import pytest
+import discord
+from unittest.mock import MagicMock
+import Helpers.interaction_scope as interaction_scope
+import Helpers.loop_monitor as loop_monitor
+
+class KeywordPaginationView:
+    def _normalize_keywords(self):
+        time.sleep(0.3)
+
+    async def submit_callback(self):
+        self._normalize_keywords()
+
+@pytest.mark.asyncio
+async def test_blocking_callback_is_reported_with_its_view_callback_name():
+    logger = logging.getLogger("test_loop_monitor")
+    monitor = loop_monitor.LoopMonitor(sample_seconds=0.02, threshold=0.1, logger=logger)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await asyncio.create_task(KeywordPaginationView().submit_callback())
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert monitor.slow_callbacks == {"KeywordPaginationView.submit_callback": 1}
+    report = monitor.reports[0]
+    assert report['blocked_seconds'] >= 0.25
+    assert "_normalize_keywords" in report['stack'] and "time.sleep" in report['stack']
+    assert monitor.metrics()['loop_lag_max_seconds'] >= 0.25
+
+class ConfirmView(discord.ui.View):
+    @discord.ui.button(label="Confirm")
+    async def confirm(self, interaction, button):
+        time.sleep(0.3)
+
+@pytest.mark.asyncio
+async def test_view_stalls_are_named_after_the_callback_not_the_dispatch_wrapper():
+    interaction_scope.install()
+    monitor = loop_monitor.LoopMonitor(sample_seconds=0.02, threshold=0.1, logger=logging.getLogger("test_loop_monitor"))
+    monitor.start()
+    await asyncio.sleep(0.05)
+    view = ConfirmView()
+    interaction = MagicMock(spec=discord.Interaction)
+    interaction.command = None
+    await asyncio.create_task(view._scheduled_task(view.confirm, interaction))
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert monitor.slow_callbacks == {"ConfirmView.confirm": 1}
+
+def test_histogram_buckets_are_cumulative():
+    histogram = loop_monitor.Histogram(buckets=(0.01, 0.1))
+    for value in (0.001, 0.05, 0.05, 3.0):
+        histogram.observe(value)
+    assert histogram.snapshot() == {'buckets': [(0.01, 1), (0.1, 3), (float('inf'), 4)], 'sum': 3.101, 'count': 4}
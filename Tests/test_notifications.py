@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import Helpers.notifications as notifications
+
+WEBHOOK = "https://discord.com/api/webhooks/1/abc"
+
+def test_describe_document_reports_only_present_results():
+    assert notifications.describe_document('judge_data', {"keywords": {"a": {}, "b": {}}, "last_update": "x"}) == [
+        "2 new keywords to review with /keywords"
+    ]
+    assert notifications.describe_document('marketing_agent', {"list_of_paths_taken": ["p"], "user_personas": []}) == [
+        "1 research paths, see /research_paths"
+    ]
+    assert notifications.describe_document('judge_data', {"selected_keywords": ["a"]}) == []
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_and_rate_limits_per_webhook():
+    dispatcher = notifications.NotificationDispatcher(batch_seconds=0.02, interval_seconds=0.2)
+    dispatcher.start()
+    dispatcher.send = AsyncMock()
+
+    dispatcher.add(WEBHOOK, "Acme", 'judge_data', ["1 new keywords to review with /keywords"])
+    dispatcher.add(WEBHOOK, "Acme", 'marketing_agent', ["2 research paths, see /research_paths"])
+    dispatcher.add(WEBHOOK, "Acme", 'judge_data', ["5 new keywords to review with /keywords"])
+    dispatcher.add("https://discord.com/api/webhooks/2/def", "Other", 'judge_data', ["3 ad variations to review with /adtext"])
+    await asyncio.sleep(0.05)
+    assert dispatcher.send.await_count == 2
+    url, business_name, updates = dispatcher.send.await_args_list[0].args
+    assert dispatcher.format_message(business_name, updates) == (
+        "New results are ready for Acme:\n- 2 research paths, see /research_paths\n- 5 new keywords to review with /keywords"
+    )
+
+    # A result inside the webhook's interval waits for the interval rather than the batch window
+    dispatcher.add(WEBHOOK, "Acme", 'judge_data', ["7 new keywords to review with /keywords"])
+    await asyncio.sleep(0.08)
+    assert dispatcher.send.await_count == 2
+    await asyncio.sleep(0.15)
+    assert dispatcher.send.await_count == 3
+    await dispatcher.stop()
+
+def test_watcher_routes_inserts_to_the_business_webhook():
+    mongo = MongoClient()
+    mappings = mongo.mappings.companies
+    mappings.insert_one({"business_name": "Acme Co", "owner_ids": [1], "webhook_url": WEBHOOK})
+    dispatcher = MagicMock()
+    watcher = notifications.NotificationWatcher(mongo, dispatcher, mappings)
+
+    watcher.apply({'operationType': 'insert', 'ns': {'db': 'judge_data', 'coll': 'acme co'}, 'fullDocument': {"ad_variations": [{}]}})
+    dispatcher.submit_threadsafe.assert_called_once_with(WEBHOOK, "Acme Co", 'judge_data', ["1 ad variations to review with /adtext"])
+
+    watcher.apply({'operationType': 'insert', 'ns': {'db': 'judge_data', 'coll': 'unknown'}, 'fullDocument': {"keywords": ["a"]}})
+    watcher.apply({'operationType': 'insert', 'ns': {'db': 'judge_data', 'coll': 'acme co'}, 'fullDocument': {"last_update": "x"}})
+    assert dispatcher.submit_threadsafe.call_count == 1
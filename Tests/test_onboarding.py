@@ -28,7 +28,8 @@ async def bot():
 @pytest.mark.asyncio
 async def test_handle_guild_join(bot, mock_collection_fixture, connect_to_mongo_and_get_collection_fixture, monkeypatch):
     guild = AsyncMock()
-    guild.owner.id = 123456789
+    guild.id = 987654321
+    guild.owner_id = 123456789
     guild.text_channels = [AsyncMock()]
 
     guild.me = MagicMock()
@@ -59,6 +60,7 @@ async def test_handle_guild_join(bot, mock_collection_fixture, connect_to_mongo_
     assert user_record is not None
     assert user_record["webhook_url"] == "https://discord.com/api/webhooks/123/abc"
     assert user_record["onboarded"] == False
+    assert user_record["guild_ids"] == [987654321]
     
 @pytest.mark.asyncio
 async def test_handle_message_business_name(bot, mock_collection_fixture, connect_to_mongo_and_get_collection_fixture, monkeypatch):
@@ -66,7 +68,7 @@ async def test_handle_message_business_name(bot, mock_collection_fixture, connec
     message.author = AsyncMock()
     message.author.bot = False
     message.guild.id = 123456789
-    message.guild.owner.id = 987654321
+    message.guild.owner_id = 987654321
     message.content = "My Business"
 
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
@@ -94,7 +96,7 @@ async def test_handle_message_website_link(bot, mock_collection_fixture, connect
     message.author = AsyncMock()
     message.author.bot = False
     message.guild.id = 123456789
-    message.guild.owner.id = 987654321
+    message.guild.owner_id = 987654321
     message.content = "https://www.mybusiness.com"
 
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
@@ -124,7 +126,7 @@ async def test_handle_message_invalid_website(bot, mock_collection_fixture, conn
     message.author = AsyncMock()
     message.author.bot = False
     message.guild.id = 123456789
-    message.guild.owner.id = 987654321
+    message.guild.owner_id = 987654321
     message.content = "not_a_valid_url"
 
     monkeypatch.setenv("CONNECTION_STRING", "mongodb://localhost:27017")
@@ -0,0 +1,78 @@
+import asyncio
+import time
+import discord
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+import Helpers.outbound as outbound
+
+class FakeChannel:
+    def __init__(self, channel_id, fail_with=None):
+        self.id = channel_id
+        self.sent = []
+        self.fail_with = list(fail_with or [])
+
+    async def send(self, content=None, **kwargs):
+        if self.fail_with:
+            raise self.fail_with.pop(0)
+        self.sent.append((time.monotonic(), content, kwargs))
+        return f"message-{len(self.sent)}"
+
+@pytest_asyncio.fixture
+async def scheduler(request):
+    limits = getattr(request, 'param', {})
+    scheduler = outbound.MessageScheduler(**limits)
+    scheduler.start()
+    yield scheduler
+    await scheduler.stop()
+
+@pytest.mark.asyncio
+async def test_consecutive_plain_messages_are_coalesced(scheduler):
+    channel = FakeChannel(1)
+    futures = [scheduler.enqueue(channel, text) for text in ("Welcome back!", "You have full access.")]
+    futures.append(scheduler.enqueue(channel, "Details", embed="embed"))
+    results = await asyncio.gather(*futures)
+
+    assert [content for _, content, _ in channel.sent] == ["Welcome back!\n\nYou have full access.", "Details"]
+    assert results == ["message-1", "message-1", "message-2"]
+    metrics = scheduler.metrics()
+    assert metrics['messages_sent_total'] == 2 and metrics['messages_coalesced_total'] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('scheduler', [{'destination_limit': (2, 0.2)}], indirect=True)
+async def test_destination_bucket_spaces_sends_without_429s(scheduler):
+    channel = FakeChannel(1)
+    await asyncio.gather(*(scheduler.enqueue(channel, f"m{i}", embed=i) for i in range(4)))
+    times = [sent_at for sent_at, _, _ in channel.sent]
+    assert times[1] - times[0] < 0.05
+    assert times[2] - times[0] >= 0.09 and times[3] - times[0] >= 0.18
+    assert scheduler.rate_limited == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('scheduler', [{'global_limit': (1, 0.1)}], indirect=True)
+async def test_interactions_jump_ahead_of_background_messages(scheduler):
+    channels = [FakeChannel(i) for i in range(3)]
+    order = []
+    first = scheduler.enqueue(channels[0], "first", priority=outbound.PRIORITY_BACKGROUND)
+    await first
+    background = scheduler.enqueue(channels[1], "notification", priority=outbound.PRIORITY_BACKGROUND)
+    interaction = scheduler.enqueue(channels[2], "reply", priority=outbound.PRIORITY_INTERACTION)
+    background.add_done_callback(lambda _: order.append("background"))
+    interaction.add_done_callback(lambda _: order.append("interaction"))
+    await asyncio.gather(background, interaction)
+    assert order == ["interaction", "background"]
+
+@pytest.mark.asyncio
+async def test_429_requeues_and_pauses_the_destination(scheduler):
+    response = MagicMock(status=429, reason="Too Many Requests")
+    channel = FakeChannel(1, fail_with=[discord.HTTPException(response, "rate limited")])
+    scheduler.destination_limit = (5, 0.05)
+    assert await scheduler.enqueue(channel, "hello") == "message-1"
+    assert scheduler.metrics()['rate_limited_total'] == 1
+
+@pytest.mark.asyncio
+async def test_send_without_scheduler_sends_directly(monkeypatch):
+    monkeypatch.setattr(outbound, "scheduler", None)
+    channel = AsyncMock()
+    await outbound.send(channel, "one", "two")
+    assert [call.args[0] for call in channel.send.await_args_list] == ["one", "two"]
@@ -0,0 +1,58 @@
+import asyncio
+import time
+import pytest
+import discord
+from unittest.mock import MagicMock
+import Helpers.profiling as profiling
+
+def fake_interaction(command_name):
+    interaction = MagicMock(spec=discord.Interaction)
+    interaction.command.qualified_name = command_name
+    return interaction
+
+def rank_keywords(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+async def handler(interaction):
+    rank_keywords(0.1)
+    await asyncio.sleep(0.1)
+    rank_keywords(0.05)
+
+@pytest.mark.asyncio
+async def test_profiles_only_the_armed_handler(tmp_path):
+    profiler = profiling.HandlerProfiler(asyncio.get_running_loop(), sample_seconds=0.002, directory=str(tmp_path))
+    done = asyncio.Event()
+    reports = []
+
+    async def on_complete(session):
+        reports.append(session.report())
+        done.set()
+
+    session = profiler.arm("/keywords", 1, on_complete=on_complete)
+    with pytest.raises(ValueError):
+        profiler.arm("/search", 1)
+
+    await asyncio.create_task(handler(fake_interaction("search")))
+    await asyncio.create_task(handler(fake_interaction("keywords")))
+    # Later runs are not profiled once the requested count is reached
+    await asyncio.create_task(handler(fake_interaction("keywords")))
+    await asyncio.wait_for(done.wait(), 5)
+
+    assert not profiler.armed
+    assert len(session.durations) == 1 and session.durations[0] >= 0.2
+    assert session.path.startswith(str(tmp_path))
+    stacks = open(session.path).read().splitlines()
+    assert all(line.startswith("/keywords;handler (test_profiling.py:") for line in stacks)
+    assert any("rank_keywords (test_profiling.py:" in line for line in stacks)
+    assert any(line.rsplit(" ", 1)[0].endswith(profiling.WAITING) for line in stacks)
+    labels = [label for label, _ in session.summary()]
+    assert any(label.startswith("rank_keywords") for label in labels)
+    assert reports[0].startswith("Profile of `/keywords` over 1 invocations")
+
+def test_nothing_runs_until_armed():
+    profiler = profiling.HandlerProfiler(MagicMock())
+    assert not profiler.armed and profiler._thread is None
+    with pytest.raises(ValueError):
+        profiler.arm("/keywords", profiling.MAX_INVOCATIONS + 1)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import pytest
+import discord
+from unittest.mock import AsyncMock, MagicMock
+import Helpers.interaction_scope as interaction_scope
+import Helpers.query_accounting as query_accounting
+
+def command_events(request_id, command_name="find", collection="users", query=None):
+    started = MagicMock(request_id=request_id, connection_id=("localhost", 27017), command_name=command_name)
+    started.command = {command_name: collection, 'filter': query or {'user_id': 1}}
+    succeeded = MagicMock(request_id=request_id, connection_id=("localhost", 27017), duration_micros=2000)
+    succeeded.reply = {'ok': 1, 'cursor': {'firstBatch': [{'user_id': 1}]}}
+    return started, succeeded
+
+def fake_interaction(command_name):
+    interaction = MagicMock(spec=discord.Interaction)
+    interaction.id = 42
+    interaction.user.id = 7
+    interaction.command.qualified_name = command_name
+    return interaction
+
+@pytest.fixture(autouse=True)
+def fresh_summaries(monkeypatch):
+    monkeypatch.setattr(query_accounting, "REPLY_SAMPLE_RATE", 1.0)
+    query_accounting.reset_summaries()
+    yield
+    query_accounting.reset_summaries()
+
+@pytest.mark.asyncio
+async def test_commands_are_attributed_to_the_interaction_task():
+    listener = query_accounting.QueryAccountingListener()
+
+    async def handler(interaction):
+        for request_id in range(3):
+            started, succeeded = command_events(request_id)
+            listener.started(started)
+            # Commands issued from a worker thread land on the same interaction
+            await asyncio.to_thread(listener.succeeded, succeeded)
+        return interaction_scope.current()
+
+    scope = await asyncio.create_task(handler(fake_interaction("keywords")))
+    assert scope.name == "/keywords" and scope.interaction_id == 42 and scope.user_id == 7
+    # Done callbacks run on the next pass of the loop
+    await asyncio.sleep(0)
+    assert scope.finished
+
+    # Outside a handler nothing is recorded
+    started, succeeded = command_events(99)
+    listener.started(started)
+    listener.succeeded(succeeded)
+
+    summary = query_accounting.summaries()["/keywords"]
+    assert summary['interactions'] == 1
+    assert summary['commands_max'] == 3 and summary['by_command'] == {'find': 3}
+    assert summary['seconds_mean'] == pytest.approx(0.006)
+    assert summary['bytes_mean'] > 0
+
+def test_budget_and_repeated_queries_are_reported(caplog, monkeypatch):
+    monkeypatch.setattr(query_accounting, "_budget", 4)
+    listener = query_accounting.QueryAccountingListener()
+    with caplog.at_level(logging.WARNING, logger=query_accounting.__name__):
+        with query_accounting.measure("AdView.submit_callback") as usage:
+            for request_id in range(query_accounting.N_PLUS_ONE_REPEATS):
+                started, succeeded = command_events(request_id, query={'user_id': request_id})
+                listener.started(started)
+                listener.succeeded(succeeded)
+            started, succeeded = command_events(100, command_name="update", collection="ads")
+            listener.started(started)
+            listener.failed(succeeded)
+    assert usage.commands == query_accounting.N_PLUS_ONE_REPEATS + 1
+    assert usage.by_command == {'find': query_accounting.N_PLUS_ONE_REPEATS, 'update': 1}
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("budget 4" in message for message in messages)
+    assert any("ran find on users with filter on ['user_id'] 5 times" in message for message in messages)
+    assert query_accounting.summaries()["AdView.submit_callback"]['over_budget'] == 1
+
+class CampaignView(discord.ui.View):
+    def __init__(self, listener):
+        super().__init__()
+        self.listener = listener
+
+    @discord.ui.button(label="Load")
+    async def load(self, interaction, button):
+        started, succeeded = command_events(1)
+        await asyncio.to_thread(self.listener.started, started)
+        self.listener.succeeded(succeeded)
+
+@pytest.mark.asyncio
+async def test_scope_is_bound_before_the_first_call_goes_to_a_thread():
+    listener = query_accounting.QueryAccountingListener()
+    tree = MagicMock()
+    tree.interaction_check = AsyncMock(return_value=True)
+    interaction_scope.install(tree)
+
+    async def invoke(interaction):
+        # Stands in for discord.py's invoker, which runs the tree's check before the command
+        await tree.interaction_check(interaction)
+        started, succeeded = command_events(1)
+        await asyncio.to_thread(listener.started, started)
+        listener.succeeded(succeeded)
+
+    await asyncio.create_task(invoke(fake_interaction("adtext")))
+    view = CampaignView(listener)
+    interaction = fake_interaction("adtext")
+    interaction.command = None
+    await asyncio.create_task(view._scheduled_task(view.load, interaction))
+    await asyncio.sleep(0)
+
+    summaries = query_accounting.summaries()
+    assert summaries["/adtext"]['commands_max'] == 1
+    assert summaries["CampaignView.load"]['commands_max'] == 1
+
+def test_reply_sizes_are_sampled(monkeypatch):
+    listener = query_accounting.QueryAccountingListener()
+    sized = []
+    monkeypatch.setattr(query_accounting, "_size", lambda document: sized.append(document) or 100)
+    monkeypatch.setattr(query_accounting, "REPLY_SAMPLE_RATE", 0.0)
+    with query_accounting.measure("/keywords") as usage:
+        started, succeeded = command_events(1)
+        listener.started(started)
+        listener.succeeded(succeeded)
+    assert usage.bytes_received == 0 and sized == [started.command]
+
+    monkeypatch.setattr(query_accounting, "REPLY_SAMPLE_RATE", 0.5)
+    monkeypatch.setattr(query_accounting.random, "random", lambda: 0.1)
+    with query_accounting.measure("/keywords") as usage:
+        started, succeeded = command_events(2)
+        listener.started(started)
+        listener.succeeded(succeeded)
+    # A sampled reply stands for the ones that were not measured
+    assert usage.bytes_received == 200
@@ -0,0 +1,17 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import runBot
+
+@pytest.mark.asyncio
+async def test_uploadcredentials_command_reaches_its_handler(monkeypatch):
+    check_onboarded_status = AsyncMock(return_value=False)
+    monkeypatch.setattr(runBot, "check_onboarded_status", check_onboarded_status)
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.response = AsyncMock()
+
+    command = runBot.tree.get_command("uploadcredentials")
+    await command.callback(interaction, MagicMock(filename="credentials.json"), "123")
+
+    check_onboarded_status.assert_awaited_once_with(1)
+    assert "onboarding" in interaction.response.send_message.call_args.args[0]
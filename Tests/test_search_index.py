@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from mongomock import MongoClient
+import Helpers.search_index as search_index
+from EventHandlers.first_agent_interations import handle_search
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    search_index.clear_search_cache()
+    yield
+    search_index.clear_search_cache()
+
+@pytest.fixture
+def client(monkeypatch):
+    client = MongoClient()
+    client.mappings.companies.insert_one({"owner_ids": [1], "business_name": "Acme"})
+    client.marketing_agent.acme.insert_one({
+        "business": "We teach Python online.\n\nOur bootcamp runs for twelve weeks in London.",
+        "user_personas": [{"title": "Career Switcher", "motivation": "Leave finance for a Python job"}],
+        "list_of_paths_taken": ["Compare Python bootcamps in London", "Find free JavaScript tutorials"]
+    })
+    client.judge_data.acme.insert_one({
+        "keywords": {"python bootcamp london": {"avg_monthly_searches": 90}, "learn java": {}},
+        "ad_variations": [{"headlines": ["Python Bootcamp"], "descriptions": ["Twelve weeks to your first job"]}],
+        "finalized_ad_text": [{"headline": "Learn Python", "description": "Online and self paced"}]
+    })
+    connect = lambda connection_string, db_name, collection_name: client[db_name][collection_name.lower()]
+    monkeypatch.setattr("Helpers.search_index.connect_to_mongo_and_get_collection", connect)
+    monkeypatch.setattr("EventHandlers.first_agent_interations.connect_to_mongo_and_get_collection", connect)
+    return client
+
+def test_bm25_prefers_rare_terms_and_short_items():
+    index = search_index.SearchIndex()
+    index.set_source('list_of_paths_taken', ["python python tutorials", "python bootcamp", "a long path about many python topics and more"])
+    ranked = [position for _, _, position, _ in index.search("python bootcamp")]
+    assert ranked[0] == 1
+    assert [position for _, _, position, _ in index.search("python")] == [0, 1, 2]
+    assert index.search("ruby") == []
+
+def test_set_source_reindexes_only_changed_items():
+    index = search_index.SearchIndex()
+    index.set_source('user_personas', ["Night Owl", "Career Switcher"])
+    index.set_source('user_personas', ["Night Owl"])
+    assert len(index) == 1 and index.search("switcher") == []
+    assert "switcher" not in index.postings
+
+    index.set_source('business', "First paragraph.\n\nSecond paragraph about pricing.")
+    assert [(source, position) for _, source, position, _ in index.search("pricing")] == [('business', 1)]
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_CACHE_SIZE", 2)
+    for name in ("a", "b"):
+        search_index.remember(name, search_index.SearchIndex())
+    search_index.get_index("a")
+    search_index.remember("c", search_index.SearchIndex())
+    assert search_index.get_index("b") is None
+    assert search_index.get_index("a") is not None and search_index.get_index("C") is not None
+
+@pytest.mark.asyncio
+async def test_search_command_builds_lazily_and_follows_writes(client):
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.response = AsyncMock()
+    interaction.followup = AsyncMock()
+    onboarded = AsyncMock(return_value=True)
+
+    await handle_search(interaction, onboarded, "python bootcamp london")
+    interaction.response.defer.assert_awaited_once()
+    embed = interaction.followup.send.call_args.kwargs['embed']
+    names = [field.name for field in embed.fields]
+    assert names[0].startswith("Keyword 1") or names[0].startswith("Research Path 1")
+    assert any(name.startswith("Ad Variation 1") for name in names)
+    assert any(name.startswith("Business Info 2") for name in names)
+
+    search_index.update_source("Acme", 'list_of_paths_taken', ["Compare Python bootcamps in London", "Find free JavaScript tutorials", "Price Rust courses"])
+    await handle_search(interaction, onboarded, "rust")
+    embed = interaction.response.send_message.call_args.kwargs['embed']
+    assert [field.name.split(" (")[0] for field in embed.fields] == ["Research Path 3"]
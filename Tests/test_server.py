@@ -0,0 +1,55 @@
+import pytest
+from unittest.mock import MagicMock
+from aiohttp.test_utils import TestClient, TestServer
+import Helpers.metrics as metrics
+import Helpers.outbound as outbound
+import server
+
+def fake_client(ready=True):
+    client = MagicMock()
+    client.is_closed.return_value = False
+    client.is_ready.return_value = ready
+    client.shard_id = None
+    client.latency = 0.05
+    client.guilds = [MagicMock(), MagicMock()]
+    client.loop_monitor = None
+    return client
+
+async def request(health_server, path):
+    async with TestClient(TestServer(health_server.app)) as http:
+        response = await http.get(path)
+        return response.status, await response.text()
+
+@pytest.mark.asyncio
+async def test_readyz_reflects_gateway_and_mongo(monkeypatch):
+    health_server = server.HealthServer(fake_client(), connection_string="mongodb://unused")
+    monkeypatch.setattr(health_server, "_ping", lambda: None)
+    assert (await request(health_server, "/readyz"))[0] == 200
+    assert await request(health_server, "/healthz") == (200, "ok")
+
+    down = server.HealthServer(fake_client(ready=False), connection_string="mongodb://unused")
+    def refuse():
+        raise ConnectionError("connection refused")
+    monkeypatch.setattr(down, "_ping", refuse)
+    status, body = await request(down, "/readyz")
+    assert status == 503
+    assert '"gateway": false' in body and '"mongo": false' in body and "connection refused" in body
+
+@pytest.mark.asyncio
+async def test_metrics_are_exported_in_prometheus_format(monkeypatch):
+    monkeypatch.setattr(outbound, "scheduler", outbound.MessageScheduler())
+    metrics.observe_command("keywords", 0.2)
+    metrics.cache_lookup("test_cache", True)
+    metrics.cache_lookup("test_cache", False)
+
+    status, body = await request(server.HealthServer(fake_client(), connection_string="mongodb://unused"), "/metrics")
+    lines = body.splitlines()
+    assert status == 200
+    assert "# TYPE bot_command_seconds histogram" in lines
+    assert 'bot_command_seconds_bucket{command="keywords",le="0.25"} 1' in lines
+    assert 'bot_commands_total{command="keywords",outcome="ok"} 1' in lines
+    assert 'cache_hit_ratio{cache="test_cache"} 0.5' in lines
+    assert 'gateway_latency_seconds{shard="0"} 0.05' in lines
+    assert "bot_guilds 2" in lines and "bot_ready 1" in lines
+    assert "outbound_messages_sent_total 0" in lines
+    assert 'outbound_queued_messages{priority="interaction"} 0' in lines
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+from mongomock import MongoClient
+import discord
+import Helpers.sharding as sharding
+from Helpers.change_streams import utcnow
+import cluster as cluster_supervisor
+
+class FakeProcess:
+    def __init__(self):
+        self.exit_code = None
+        self.terminated = False
+
+    def poll(self):
+        return self.exit_code
+
+    def terminate(self):
+        self.terminated = True
+
+    def wait(self, timeout=None):
+        return self.exit_code
+
+def test_plan_clusters_splits_shards_evenly():
+    assert sharding.plan_clusters(10, 4) == [(0, 1, 2), (3, 4, 5), (6, 7), (8, 9)]
+    assert sharding.plan_clusters(2, 8) == [(0,), (1,)]
+
+def test_cluster_config_from_environment():
+    assert sharding.cluster_config({}) is None
+    config = sharding.cluster_config({"SHARD_COUNT": "8", "SHARD_IDS": "4,5", "CLUSTER_ID": "2", "CLUSTER_COUNT": "4"})
+    assert config.shard_ids == (4, 5) and not config.primary
+    client = sharding.make_client(discord.Intents.default(), config)
+    assert isinstance(client, discord.AutoShardedClient) and client.shard_ids == [4, 5]
+
+def test_supervisor_restarts_crashed_clusters_with_backoff():
+    spawned = []
+    def spawn(environment):
+        spawned.append(environment)
+        return FakeProcess()
+    supervisor = cluster_supervisor.Supervisor(4, 2, spawn=spawn, environ={})
+    supervisor.check(now=0)
+    assert [environment["SHARD_IDS"] for environment in spawned] == ["0,1", "2,3"]
+
+    supervisor.clusters[1].process.exit_code = 1
+    supervisor.check(now=1)
+    assert supervisor.clusters[1].process is None and len(spawned) == 2
+    supervisor.check(now=1 + cluster_supervisor.RESTART_DELAY_SECONDS)
+    assert len(spawned) == 3 and spawned[-1]["CLUSTER_ID"] == "1"
+    assert supervisor.clusters[1].restart_delay == 2 * cluster_supervisor.RESTART_DELAY_SECONDS
+
+def test_reporter_writes_latency_per_shard_and_flags_stale_ones():
+    collection = MongoClient().mappings.shard_status
+    client = MagicMock(spec=discord.AutoShardedClient)
+    client.latencies = [(0, 0.042), (1, float('inf'))]
+    client.guilds = [MagicMock(shard_id=0), MagicMock(shard_id=0), MagicMock(shard_id=1)]
+    config = sharding.ClusterConfig(cluster_id=0, cluster_count=1, shard_count=3, shard_ids=(0, 1))
+    sharding.ShardReporter(client, collection, config).report()
+    collection.insert_one({'_id': 2, 'cluster_id': 1, 'latency_ms': 50.0, 'guilds': 7, 'updated_at': utcnow() - timedelta(minutes=10)})
+
+    assert sharding.format_status(sharding.read_status(collection)).splitlines() == [
+        "shard 0 (cluster 0): 42 ms, 2 guilds",
+        "shard 1 (cluster 0): connecting, 1 guilds",
+        "shard 2 (cluster 1): down, 7 guilds",
+    ]
@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import json
+import pytest
+import discord
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import Helpers.tracing as tracing
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans, service_name):
+        self.spans.extend(spans)
+
+def fake_interaction(interaction_id, command_name=None):
+    interaction = MagicMock(spec=discord.Interaction)
+    interaction.id = interaction_id
+    interaction.user.id = 7
+    interaction.created_at = datetime.datetime.now(datetime.timezone.utc)
+    interaction.command = None
+    if command_name:
+        interaction.command = MagicMock()
+        interaction.command.qualified_name = command_name
+    return interaction
+
+def mongo_events(request_id):
+    started = MagicMock(request_id=request_id, connection_id=("localhost", 27017), command_name="find", database_name="credentials")
+    started.command = {'find': 'acme', 'filter': {}}
+    return started, MagicMock(request_id=request_id, connection_id=("localhost", 27017))
+
+@pytest.fixture
+def tracer(monkeypatch):
+    exporter = ListExporter()
+    tracer = tracing.Tracer([exporter], sample_rate=1.0, slow_seconds=None)
+    tracer.exporter = exporter
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    tracing._instrument_views()
+    yield tracer
+    tracer.processor.shutdown()
+
+def edit_callback():
+    pass
+
+@pytest.mark.asyncio
+async def test_interaction_trace_covers_mongo_http_and_follow_up_views(tracer):
+    listener = tracing.TracingCommandListener()
+    token_url = "https://discord.com/api/v10/interactions/123456789012345678/" + "a" * 70 + "/callback"
+
+    async def command(interaction):
+        with tracing.span("load_credentials"):
+            started, succeeded = mongo_events(1)
+            await asyncio.to_thread(listener.started, started)
+            listener.succeeded(succeeded)
+        context = SimpleNamespace()
+        await tracing._request_start(None, context, SimpleNamespace(method="POST", url=token_url))
+        await tracing._request_end(None, context, SimpleNamespace(response=SimpleNamespace(status=204)))
+        return discord.ui.View()
+
+    view = await asyncio.create_task(command(fake_interaction(1, "createad")))
+
+    async def dispatch(self, item, interaction):
+        tracing.record_error(RuntimeError("edit failed"))
+
+    await asyncio.create_task(dispatch(view, MagicMock(callback=edit_callback), fake_interaction(2)))
+    await asyncio.sleep(0)
+    tracer.processor.shutdown()
+
+    spans = {span.name: span for span in tracer.exporter.spans}
+    root = spans["/createad"]
+    assert root.parent_id is None and root.attributes['discord.interaction_id'] == 1
+    assert spans["load_credentials"].parent_id == root.span_id
+    assert spans["mongo.find"].parent_id == spans["load_credentials"].span_id
+    assert spans["mongo.find"].attributes['db.mongodb.collection'] == "acme"
+    http = spans["discord POST /api/v10/interactions/{id}/{token}/callback"]
+    assert http.parent_id == root.span_id and http.attributes['http.status_code'] == 204
+
+    # The view's callback continues the trace of the command that created the view
+    follow_up = spans["edit_callback"]
+    assert follow_up.trace_id == root.trace_id and follow_up.parent_id == root.span_id
+    assert follow_up.status == tracing.STATUS_ERROR and "edit failed" in follow_up.status_message
+    assert {span.trace_id for span in tracer.exporter.spans} == {root.trace_id}
+
+@pytest.mark.asyncio
+async def test_sampling_keeps_only_sampled_or_slow_interactions(tracer):
+    tracer.sample_rate = 0.0
+
+    async def command(interaction):
+        with tracing.span("work") as current:
+            return current
+
+    assert await asyncio.create_task(command(fake_interaction(1, "keywords"))) is None
+
+    tracer.slow_seconds = 60.0
+    await asyncio.create_task(command(fake_interaction(2, "keywords")))
+    slow = fake_interaction(3, "keywords")
+    slow.created_at -= datetime.timedelta(seconds=90)
+    await asyncio.create_task(command(slow))
+    await asyncio.sleep(0)
+    tracer.processor.shutdown()
+
+    assert sorted(span.name for span in tracer.exporter.spans) == ["/keywords", "work"]
+    assert tracer.exporter.spans[0].attributes['discord.interaction_id'] == 3
+
+def test_exporters_write_jsonl_and_otlp(tmp_path):
+    configured = tracing.configure({'TRACE_FILE': str(tmp_path / "traces" / "spans.jsonl")})
+    try:
+        assert tracing.enabled() and configured.sample_rate == tracing.DEFAULT_SAMPLE_RATE
+    finally:
+        tracing.shutdown()
+    assert not tracing.enabled() and tracing.configure({}) is None
+
+    scope = SimpleNamespace(name="/search", interaction_id=5, user_id=7, created_at=None)
+    trace = tracing.Trace(MagicMock(), scope, "ab" * 16, None, True)
+    trace.root.record_error(ValueError("bad query"))
+    trace.root.end_ns = trace.root.start_ns + 1500000
+
+    tracing.JsonlExporter(str(tmp_path / "spans.jsonl")).export([trace.root], "bot")
+    line = json.loads((tmp_path / "spans.jsonl").read_text())
+    assert line['name'] == "/search" and line['duration_ms'] == 1.5 and line['service'] == "bot"
+
+    payload = tracing.otlp_payload([trace.root], "bot")
+    span = payload['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+    assert span['traceId'] == "ab" * 16 and 'parentSpanId' not in span
+    assert span['status'] == {'code': tracing.STATUS_ERROR, 'message': "ValueError: bad query"}
+    assert {'key': 'discord.interaction_id', 'value': {'intValue': '5'}} in span['attributes']
+    assert tracing.OtlpHttpExporter("http://collector:4318").url == "http://collector:4318/v1/traces"
@@ -0,0 +1,88 @@
+import json
+import socket
+import time
+from datetime import timedelta
+import pytest
+from unittest.mock import MagicMock
+from mongomock import MongoClient
+import Helpers.job_queue as job_queue
+import Helpers.worker_pool as worker_pool
+import EventHandlers.ad_interactions as ad_interactions
+
+KEY = b"test-key"
+
+def test_claim_splits_job_types_between_gateway_and_workers():
+    collection = MongoClient().jobs.queue
+    gateway = job_queue.JobQueue(collection, exclude_types=job_queue.isolated_job_types())
+    workers = job_queue.JobQueue(collection, job_types=job_queue.isolated_job_types(), session=MagicMock())
+    gateway.enqueue('get_campaigns', {})
+    gateway.enqueue('upload_credentials', {})
+
+    assert workers.claim()['type'] == 'upload_credentials'
+    assert workers.claim() is None
+    assert gateway.claim()['type'] == 'get_campaigns'
+
+def test_gateway_takes_over_isolated_jobs_the_pool_leaves_waiting():
+    collection = MongoClient().jobs.queue
+    gateway = job_queue.JobQueue(collection, exclude_types=job_queue.isolated_job_types(), exclude_grace_seconds=worker_pool.GRACE_SECONDS)
+    job_id = gateway.enqueue('upload_credentials', {})
+    assert gateway.claim() is None
+
+    # Nothing claimed it within the grace period, e.g. because worker.py is not running
+    collection.update_one({'_id': job_id}, {'$set': {'available_at': job_queue.utcnow() - timedelta(seconds=worker_pool.GRACE_SECONDS + 1)}})
+    assert gateway.claim()['_id'] == job_id
+
+def test_notifier_wakes_the_pool_over_a_local_socket():
+    pool = worker_pool.WorkerPool(1, address=("127.0.0.1", 0), key=KEY)
+    pool.listen()
+    try:
+        notifier = worker_pool.JobNotifier(pool._listener.address, key=KEY)
+        notifier("job-1", "upload_credentials")
+        notifier("job-2", "get_campaigns")
+        assert pool.wakeups.get(timeout=5) == ("job-1", "upload_credentials")
+        time.sleep(0.05)
+        assert pool.received == 1 and notifier.reachable
+        notifier.close()
+    finally:
+        pool.stopping = True
+        pool._listener.close()
+
+def test_unreachable_pool_is_not_available_and_never_blocks_enqueue():
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        address = closed.getsockname()
+    notifier = worker_pool.JobNotifier(address, key=KEY, reconnect_seconds=0.01)
+    queue = job_queue.JobQueue(MongoClient().jobs.queue, notifier=notifier)
+    client = MagicMock(job_queue=queue)
+    try:
+        started = time.monotonic()
+        queue.enqueue('upload_credentials', {})
+        assert time.monotonic() - started < 0.5
+        time.sleep(0.1)
+        assert not notifier.reachable and not worker_pool.available(client)
+
+        # Once the pool is listening again the notifier reconnects by itself
+        pool = worker_pool.WorkerPool(1, address=address, key=KEY)
+        pool.listen()
+        try:
+            for _ in range(100):
+                if worker_pool.available(client):
+                    break
+                time.sleep(0.02)
+            assert worker_pool.available(client)
+        finally:
+            pool.stopping = True
+            pool._listener.close()
+    finally:
+        notifier.close()
+
+def test_save_credentials_validates_and_saves(monkeypatch):
+    database = MongoClient().credentials
+    monkeypatch.setattr(ad_interactions, "connect_to_mongo_and_get_collection", lambda connection_string, db_name, collection_name: database[collection_name])
+    credentials = {field: "value" for field in ad_interactions.CREDENTIAL_FIELDS}
+    credentials['use_proto_plus'] = True
+
+    assert ad_interactions.save_credentials("acme", "123", json.dumps(credentials).encode()) == "Credentials uploaded and saved successfully."
+    assert database.acme.find_one()["credentials"]["customer_id"] == "123"
+    with pytest.raises(ValueError, match="use_proto_plus"):
+        ad_interactions.save_credentials("acme", "123", json.dumps({**credentials, 'use_proto_plus': "yes"}).encode())
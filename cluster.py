@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Runs the bot sharded across several processes on one host. Each cluster process runs
+runBot.py with its own event loop and a slice of the shards; state the clusters share lives in
+Mongo. Crashed clusters are restarted and per-shard latency is printed periodically.
+
+    python cluster.py                 # Discord's recommended shard count, one cluster per core
+    SHARD_COUNT=8 CLUSTER_COUNT=4 python cluster.py
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import aiohttp
+import dotenv
+from MongoDBConnection.connectMongo import connect_to_mongo_and_get_collection
+import Helpers.sharding as sharding
+
+RESTART_DELAY_SECONDS = 5
+MAX_RESTART_DELAY_SECONDS = 300
+# A cluster that stays up this long is considered healthy again and restarts from the shortest delay
+STABLE_SECONDS = 600
+REPORT_SECONDS = 60
+POLL_SECONDS = 1
+
+async def recommended_shard_count(token):
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+def spawn_cluster(environment):
+    return subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "runBot.py")], env=environment)
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.restart_delay = RESTART_DELAY_SECONDS
+        self.restarts = 0
+
+class Supervisor:
+    """
+    Starts one process per cluster and restarts any that exit, backing off exponentially for
+    clusters that keep crashing.
+
+    Args:
+    - shard_count: total shards across all clusters
+    - cluster_count: number of processes to split them over
+    - spawn: callable taking the child environment and returning a Popen-like process
+    - status_collection: mappings.shard_status, or None to skip latency reports
+    """
+    def __init__(self, shard_count, cluster_count, spawn=spawn_cluster, status_collection=None, environ=None):
+        self.shard_count = shard_count
+        self.clusters = [Cluster(cluster_id, shard_ids) for cluster_id, shard_ids in enumerate(sharding.plan_clusters(shard_count, cluster_count))]
+        self.spawn = spawn
+        self.status_collection = status_collection
+        self.environ = dict(os.environ if environ is None else environ)
+        self.stopping = False
+        self._reported_at = time.monotonic()
+
+    def environment(self, cluster):
+        environment = dict(self.environ)
+        environment.update({
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": ",".join(str(shard_id) for shard_id in cluster.shard_ids),
+            "CLUSTER_ID": str(cluster.cluster_id),
+            "CLUSTER_COUNT": str(len(self.clusters)),
+        })
+        return environment
+
+    def start(self, cluster):
+        print(f"Starting cluster {cluster.cluster_id} with shards {cluster.shard_ids[0]}-{cluster.shard_ids[-1]}")
+        cluster.process = self.spawn(self.environment(cluster))
+        cluster.started_at = time.monotonic()
+
+    def check(self, now=None):
+        """
+        Restarts clusters whose process has exited once their backoff has passed.
+        """
+        now = time.monotonic() if now is None else now
+        for cluster in self.clusters:
+            if cluster.process is None:
+                if now >= cluster.restart_at:
+                    self.start(cluster)
+                continue
+            exit_code = cluster.process.poll()
+            if exit_code is None:
+                if now - cluster.started_at >= STABLE_SECONDS:
+                    cluster.restart_delay = RESTART_DELAY_SECONDS
+                continue
+            cluster.process = None
+            cluster.restarts += 1
+            cluster.restart_at = now + cluster.restart_delay
+            print(f"Cluster {cluster.cluster_id} exited with code {exit_code}; restarting in {cluster.restart_delay}s")
+            cluster.restart_delay = min(cluster.restart_delay * 2, MAX_RESTART_DELAY_SECONDS)
+
+    def report(self):
+        if self.status_collection is None:
+            return
+        try:
+            print("Shard status:\n" + sharding.format_status(sharding.read_status(self.status_collection)))
+        except Exception as e:
+            print(f"Could not read shard status: {e}")
+
+    def stop(self, *_):
+        self.stopping = True
+        for cluster in self.clusters:
+            if cluster.process is not None:
+                cluster.process.terminate()
+        for cluster in self.clusters:
+            if cluster.process is not None:
+                try:
+                    cluster.process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    cluster.process.kill()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while not self.stopping:
+            self.check()
+            if time.monotonic() - self._reported_at >= REPORT_SECONDS:
+                self.report()
+                self._reported_at = time.monotonic()
+            time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    shard_count = int(os.getenv("SHARD_COUNT") or asyncio.run(recommended_shard_count(os.getenv("DISCORD_TOKEN"))))
+    cluster_count = int(os.getenv("CLUSTER_COUNT") or os.cpu_count() or 1)
+    status_collection = connect_to_mongo_and_get_collection(
+        os.getenv("CONNECTION_STRING"), sharding.STATUS_DATABASE, sharding.STATUS_COLLECTION, create_if_missing=True
+    )
+    Supervisor(shard_count, cluster_count, status_collection=status_collection).run()
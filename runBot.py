@@ -1,4 +1,4 @@
-import aiohttp
+import asyncio
 import discord
 import os
 import dotenv
@@ -13,6 +13,22 @@ import Helpers.helperfuncs as helperfuncs
 import Helpers.helperClasses as helperClasses
 import EventHandlers.first_agent_interations as first_agent
 import EventHandlers.ad_interactions as ad_interactions
+import Helpers.job_queue as job_queue
+import Helpers.idempotency as idempotency
+import Helpers.campaign_index as campaign_index
+import Helpers.autocomplete as autocomplete
+import Helpers.dashboard as dashboard
+import Helpers.notifications as notifications
+import Helpers.outbound as outbound
+import Helpers.sharding as sharding
+import Helpers.gateway_profile as gateway_profile
+import Helpers.worker_pool as worker_pool
+import Helpers.loop_monitor as loop_monitor
+import Helpers.metrics as metrics
+import Helpers.tracing as tracing
+import Helpers.profiling as profiling
+import Helpers.interaction_scope as interaction_scope
+import server
 
 dotenv.load_dotenv()
 logging.basicConfig(level=logging.INFO)
@@ -21,19 +37,55 @@ guild_business_data = defaultdict(dict)
 guild_onboarded_status = {}
 user_data = {}
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.dm_messages = True
-intents.members = True 
+# Before any MongoClient exists, so every client reports to /metrics
+metrics.install_mongo_listeners()
+# Off unless TRACE_FILE or an OTLP endpoint is set; see Helpers/tracing.py
+tracing.configure()
 
-client = discord.Client(intents=intents)
+# BOT_PROFILE=lean trims intents and caches to what the bot reads; see Helpers/gateway_profile.py
+client_options = gateway_profile.client_options()
+intents = client_options.pop('intents')
+
+# Set when cluster.py runs this process as one of several shard clusters
+cluster = sharding.cluster_config()
+client = sharding.make_client(intents, cluster, http_trace=metrics.http_trace_config(), **client_options)
 tree = app_commands.CommandTree(client)
+# Attribute Mongo calls to the interaction even when a handler's first one runs in a thread
+interaction_scope.install(tree)
+
+async def setup_hook():
+    # Runs before the gateway connects, so /readyz can report the bot as not ready yet
+    port = server.PORT + (cluster.cluster_id if cluster is not None else 0)
+    client.health_server = server.HealthServer(client, port=port)
+    try:
+        await client.health_server.start()
+    except OSError as e:
+        print(f"Health server could not listen on port {port}: {e}")
+
+client.setup_hook = setup_hook
+
+def command_seconds(interaction):
+    return (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+@client.event
+async def on_app_command_completion(interaction, command):
+    metrics.observe_command(command.qualified_name, command_seconds(interaction))
+
+@tree.error
+async def on_app_command_error(interaction, error):
+    command = interaction.command
+    metrics.observe_command(command.qualified_name if command else "unknown", command_seconds(interaction), outcome="error")
+    tracing.record_error(error)
+    logger.error("Ignoring exception in command %r", command.name if command else None, exc_info=error)
 
 user_states = {}
 guild_states = {}
 setup_user_id = None
 
 async def sync_commands():
+    # Commands are global, so one cluster syncing them is enough
+    if cluster is not None and not cluster.primary:
+        return
     try:
         synced = await tree.sync()
         print(f"Synced {len(synced)} command(s)")
@@ -49,10 +101,113 @@ async def check_onboarded_status(owner_id):
         return True
     return False
 
+def start_job_queue():
+    # on_ready fires again after reconnects; the workers only need starting once
+    if isinstance(getattr(client, 'job_queue', None), job_queue.JobQueue):
+        return
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    ledger_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "jobs", "idempotency", create_if_missing=True)
+    if ledger_collection is not None:
+        client.idempotency_ledger = idempotency.IdempotencyLedger(ledger_collection)
+        client.idempotency_ledger.ensure_indexes()
+    jobs_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "jobs", "queue", create_if_missing=True)
+    if jobs_collection is None:
+        print("Job queue unavailable; long-running commands will run inline.")
+        return
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    # With WORKER_ADDRESS set, jobs that need no views run in worker.py's processes instead
+    worker_address = worker_pool.configured_address()
+    client.job_queue = job_queue.JobQueue(
+        jobs_collection,
+        client=client,
+        mappings_collection=mappings_collection,
+        concurrency=int(os.getenv("JOB_WORKERS", job_queue.DEFAULT_CONCURRENCY)),
+        exclude_types=job_queue.isolated_job_types() if worker_address else None,
+        exclude_grace_seconds=worker_pool.GRACE_SECONDS,
+        notifier=worker_pool.JobNotifier(worker_address) if worker_address else None,
+        cluster_id=cluster.cluster_id if cluster is not None else None
+    )
+    client.job_queue.start()
+
+def start_dashboards():
+    if isinstance(getattr(client, 'dashboards', None), dashboard.DashboardStore):
+        return
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    dashboards_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, dashboard.DASHBOARD_DATABASE, dashboard.DASHBOARD_COLLECTION, create_if_missing=True)
+    if dashboards_collection is None:
+        print("Dashboards unavailable; /overview is disabled.")
+        return
+    client.dashboards = dashboard.DashboardStore(dashboards_collection.database.client)
+    if cluster is not None and not cluster.primary:
+        # The primary cluster keeps the shared dashboards current
+        return
+    client.dashboards.ensure_indexes()
+    client.dashboard_updater = dashboard.DashboardUpdater(client.dashboards)
+    client.dashboard_updater.start()
+
+def start_outbound():
+    if outbound.scheduler is None:
+        # The global limit is per bot, so clusters split it
+        limit, period = outbound.GLOBAL_LIMIT
+        cluster_count = cluster.cluster_count if cluster is not None else 1
+        outbound.scheduler = outbound.MessageScheduler(global_limit=(max(1, limit // cluster_count), period))
+        outbound.scheduler.start()
+
+def start_notifications():
+    if isinstance(getattr(client, 'notifications', None), notifications.NotificationDispatcher):
+        return
+    if cluster is not None and not cluster.primary:
+        # One watcher per bot, or every cluster would post each notification
+        return
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    mappings_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, "mappings", "companies")
+    if mappings_collection is None:
+        print("Notifications unavailable; results will only show through slash commands.")
+        return
+    client.notifications = notifications.NotificationDispatcher()
+    client.notifications.start()
+    client.notification_watcher = notifications.NotificationWatcher(
+        mappings_collection.database.client, client.notifications, mappings_collection
+    )
+    client.notification_watcher.start()
+
+def start_guild_bootstrap():
+    # Guilds that added the bot while it was offline never got on_guild_join
+    if isinstance(getattr(client, 'guild_bootstrap', None), asyncio.Task):
+        return
+    client.guild_bootstrap = asyncio.create_task(
+        onboarding.bootstrap_guilds(list(client.guilds), guild_onboarded_status, guild_states)
+    )
+
+def start_shard_reporter():
+    if cluster is None or isinstance(getattr(client, 'shard_reporter', None), sharding.ShardReporter):
+        return
+    CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+    status_collection = connect_to_mongo_and_get_collection(CONNECTION_STRING, sharding.STATUS_DATABASE, sharding.STATUS_COLLECTION, create_if_missing=True)
+    if status_collection is None:
+        return
+    client.shard_reporter = sharding.ShardReporter(client, status_collection, cluster)
+    client.shard_reporter.start()
+
+def start_loop_monitor():
+    if isinstance(getattr(client, 'loop_monitor', None), loop_monitor.LoopMonitor):
+        return
+    client.loop_monitor = loop_monitor.LoopMonitor(
+        threshold=float(os.getenv("SLOW_CALLBACK_SECONDS", loop_monitor.SLOW_CALLBACK_SECONDS))
+    )
+    client.loop_monitor.start()
+
 @client.event
 async def on_ready():
     print(f'{client.user} has connected to Discord!')
+    start_loop_monitor()
     await sync_commands()
+    start_outbound()
+    start_job_queue()
+    start_dashboards()
+    start_notifications()
+    start_guild_bootstrap()
+    start_shard_reporter()
 
 @client.event
 async def on_guild_join(guild):
@@ -126,30 +281,123 @@ async def help_command(interaction: discord.Interaction):
 
 @tree.command(name="business", description="View and edit business information")
 async def business(interaction: discord.Interaction):
-    first_agent.handle_business(interaction, check_onboarded_status)
+    await first_agent.handle_business(interaction, check_onboarded_status)
+
+def autocomplete_choices(interaction, kind, current):
+    # Served from the in-memory per-business index; a cold index loads in the background
+    return [
+        app_commands.Choice(name=name, value=value)
+        for name, value in autocomplete.suggest(interaction.user.id, kind, current)
+    ]
+
+@tree.command(name="overview", description="See a summary of your business, keywords and ad text")
+async def overview(interaction: discord.Interaction):
+    await first_agent.handle_overview(interaction)
 
 @tree.command(name="research_paths", description="View and add research paths for your business")
-async def research_paths(interaction: discord.Interaction):
-    first_agent.handle_research_paths(interaction, check_onboarded_status)
+async def research_paths(interaction: discord.Interaction, path: str = None):
+    await first_agent.handle_research_paths(interaction, check_onboarded_status, path=path)
+
+@research_paths.autocomplete("path")
+async def research_paths_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(interaction, 'research_paths', current)
 
 @tree.command(name="user_personas", description="View and manage user personas for your business")
-async def user_personas(interaction: discord.Interaction):
-    first_agent.handle_user_personas(interaction, check_onboarded_status)
+async def user_personas(interaction: discord.Interaction, persona: str = None):
+    await first_agent.handle_user_personas(interaction, check_onboarded_status, persona=persona)
+
+@user_personas.autocomplete("persona")
+async def user_personas_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(interaction, 'user_personas', current)
 
 @tree.command(name="keywords", description="View and select keywords for your business")
-async def keywords(interaction: discord.Interaction):
-    ad_interactions.handle_keywords(interaction, check_onboarded_status)
+async def keywords(interaction: discord.Interaction, keyword: str = None):
+    await ad_interactions.handle_keywords(interaction, check_onboarded_status, keyword=keyword)
+
+@keywords.autocomplete("keyword")
+async def keywords_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(interaction, 'keywords', current)
+
+@tree.command(name="search", description="Search your business info, personas, research paths, keywords and ads")
+async def search(interaction: discord.Interaction, query: str):
+    await first_agent.handle_search(interaction, check_onboarded_status, query)
 
 @tree.command(name="adtext", description="View and edit ad variations for your business")
 async def adtext(interaction: discord.Interaction):
-    ad_interactions.handle_adtext(interaction, check_onboarded_status)
+    await ad_interactions.handle_adtext(interaction, check_onboarded_status)
 
 @tree.command(name="uploadcredentials", description="Upload your Google Ads API credentials")
 async def upload_credentials(interaction: discord.Interaction, credentials_file: discord.Attachment, customer_id: str):
-    await ad_interactions.handle_upload_credentials(interaction, credentials_file, customer_id)
+    await ad_interactions.handle_upload_credentials(interaction, credentials_file, customer_id, check_onboarded_status)
 
 @tree.command(name="createad", description="Create a new ad or add to an existing campaign")
-async def create_ad(interaction: discord.Interaction):
-    ad_interactions.handle_create_ad(interaction, check_onboarded_status)
+async def create_ad(interaction: discord.Interaction, campaign: str = None):
+    await ad_interactions.handle_create_ad(interaction, check_onboarded_status, campaign_id=campaign)
+
+@create_ad.autocomplete("campaign")
+async def create_ad_campaign_autocomplete(interaction: discord.Interaction, current: str):
+    # Answered from the campaigns cached by this user's last /createad, with no remote calls
+    index = campaign_index.get_cached(interaction.user.id)
+    if index is None:
+        return []
+    return [
+        app_commands.Choice(name=f"{campaign['name']} ({campaign['id']})"[:100], value=str(campaign['id']))
+        for campaign in index.search(current, limit=25)
+    ]
+
+@tree.command(name="jobstatus", description="Check the status of a background job")
+async def job_status(interaction: discord.Interaction, job_id: str):
+    queue = getattr(client, 'job_queue', None)
+    job = queue.get(job_id.strip().strip('`')) if queue else None
+    if not job or job.get("owner_id") != interaction.user.id:
+        await interaction.response.send_message(f"No job found with ID {job_id}.", ephemeral=True)
+        return
+    embed = Embed(title=f"Job {job['_id']}", color=discord.Color.blue())
+    embed.add_field(name="Type", value=job['type'], inline=True)
+    embed.add_field(name="State", value=job['state'], inline=True)
+    embed.add_field(name="Attempts", value=f"{job['attempts']} of {job['max_attempts']}", inline=True)
+    if job.get('progress'):
+        embed.add_field(name="Progress", value=job['progress'][:1024], inline=False)
+    if job.get('result'):
+        embed.add_field(name="Result", value=job['result'][:1024], inline=False)
+    if job.get('error'):
+        embed.add_field(name="Last Error", value=job['error'][:1024], inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@tree.command(name="profile", description="Profile the next runs of a command or view callback (bot owner only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(
+    target="A slash command such as /keywords, or a view callback such as KeywordPaginationView.submit_callback",
+    invocations="How many runs to profile"
+)
+async def profile(interaction: discord.Interaction, target: str, invocations: app_commands.Range[int, 1, profiling.MAX_INVOCATIONS] = 1):
+    if not await client.is_owner(interaction.user):
+        await interaction.response.send_message("Only the bot owner can profile handlers.", ephemeral=True)
+        return
+    if not isinstance(getattr(client, 'profiler', None), profiling.HandlerProfiler):
+        client.profiler = profiling.HandlerProfiler(asyncio.get_running_loop())
+    owner = interaction.user
+
+    async def deliver(session):
+        # The interaction token may have expired by now, so the profile goes by DM
+        try:
+            if session.path:
+                await owner.send(session.report(), file=discord.File(session.path))
+            else:
+                await owner.send(session.report())
+        except discord.HTTPException as e:
+            print(f"Could not send the profile of {session.target}: {e}")
+
+    try:
+        client.profiler.arm(target.strip(), invocations, on_complete=deliver)
+    except ValueError as e:
+        await interaction.response.send_message(str(e), ephemeral=True)
+        return
+    await interaction.response.send_message(
+        f"Profiling the next {invocations} runs of `{target.strip()}`. The collapsed stacks will be sent to you by DM "
+        f"and saved under {profiling.PROFILE_DIR}.",
+        ephemeral=True
+    )
 
-client.run(os.getenv('DISCORD_TOKEN'))
+if __name__ == "__main__":
+    client.run(os.getenv('DISCORD_TOKEN'))
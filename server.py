@@ -1,37 +1,139 @@
 #!/usr/bin/env python3
+"""
+Health, readiness and metrics endpoints served from the bot's own event loop, so they report
+on the process that actually holds the gateway connection:
+
+- /healthz: the process and its event loop are responding
+- /readyz: the gateway is connected and MongoDB answers a ping (503 otherwise)
+- /metrics: Prometheus text format
+
+Running this file starts the bot, which starts the server.
+"""
+import asyncio
+import json
 import os
-import threading
-import http.server
-import socketserver
+import runpy
+import time
+from aiohttp import web
+from pymongo import MongoClient
+import Helpers.metrics as metrics
+import Helpers.outbound as outbound
+import Helpers.sharding as sharding
 
 # Use the PORT environment variable set by Cloud Run
 PORT = int(os.getenv('PORT', 8080))
+MONGO_PING_TIMEOUT_SECONDS = 2
+# Probes can be frequent; one Mongo ping answers all of them for this long
+MONGO_CHECK_SECONDS = 5
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def gateway_ready(client):
+    if client is None or client.is_closed() or not client.is_ready():
+        return False
+    latencies = [latency for _, latency in sharding.shard_latencies(client)]
+    return bool(latencies) and all(latency == latency and latency != float('inf') for latency in latencies)
+
+class HealthServer:
+    """
+    Args:
+    - client: the running discord client
+    - port: port to listen on
+    - connection_string: MongoDB connection string checked by /readyz
+    """
+    def __init__(self, client, port=PORT, connection_string=None):
+        self.client = client
+        self.port = port
+        self.connection_string = connection_string if connection_string is not None else os.getenv("CONNECTION_STRING")
+        self._mongo = None
+        self._mongo_checked_at = 0.0
+        self._mongo_ok = False
+        self._mongo_error = None
+        self._runner = None
+        self.app = web.Application()
+        self.app.router.add_get("/", self.healthz)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        self.app.router.add_get("/metrics", self.metrics)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        print(f"Serving health and metrics on port {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _ping(self):
+        if self._mongo is None:
+            self._mongo = MongoClient(self.connection_string, serverSelectionTimeoutMS=MONGO_PING_TIMEOUT_SECONDS * 1000)
+        self._mongo.admin.command('ping')
+
+    async def mongo_ready(self):
+        if time.monotonic() - self._mongo_checked_at < MONGO_CHECK_SECONDS:
+            return self._mongo_ok
+        self._mongo_checked_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._ping), MONGO_PING_TIMEOUT_SECONDS + 1)
+            self._mongo_ok, self._mongo_error = True, None
+        except Exception as e:
+            self._mongo_ok, self._mongo_error = False, str(e) or type(e).__name__
+        return self._mongo_ok
+
+    async def healthz(self, request):
+        return web.Response(text="ok")
+
+    async def readyz(self, request):
+        checks = {'gateway': gateway_ready(self.client), 'mongo': await self.mongo_ready()}
+        body = {'ready': all(checks.values()), 'checks': checks}
+        if self._mongo_error:
+            body['mongo_error'] = self._mongo_error
+        return web.Response(text=json.dumps(body), status=200 if body['ready'] else 503, content_type="application/json")
+
+    async def metrics(self, request):
+        return web.Response(body="\n".join(self.render()) + "\n", headers={"Content-Type": CONTENT_TYPE})
+
+    def render(self):
+        client = self.client
+        lines = metrics.REGISTRY.render()
+        lines += metrics.render_gauges("bot_ready", int(gateway_ready(client)), "1 when the gateway is connected.")
+        if client is not None:
+            lines += metrics.render_gauges("bot_guilds", len(client.guilds), "Guilds this process serves.")
+            lines += metrics.render_gauges(
+                "gateway_latency_seconds",
+                {(('shard', shard_id),): latency for shard_id, latency in sharding.shard_latencies(client)},
+                "Heartbeat latency per shard."
+            )
+        lines += metrics.render_gauges("mongo_connections_checked_out", metrics.mongo_pool.checked_out, "Pooled MongoDB connections in use.")
+        lines += metrics.render_gauges("mongo_pools_cleared", metrics.mongo_pool.pools_cleared, "MongoDB pools cleared after errors since start.")
+        lines += metrics.render_gauges("cache_hit_ratio", metrics.cache_hit_ratios(), "Share of cache lookups that hit.")
+        if outbound.scheduler is not None:
+            lines += self.render_outbound(outbound.scheduler.metrics())
+        monitor = getattr(client, 'loop_monitor', None)
+        if monitor is not None:
+            lines += self.render_loop(monitor.metrics())
+        return lines
 
-# Define a simple request handler
-class Handler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(b"Discord bot is running")
+    def render_outbound(self, values):
+        lines = []
+        for name in ('messages_sent_total', 'messages_coalesced_total', 'rate_limited_total', 'send_failures_total'):
+            lines += metrics.render_gauges(f"outbound_{name}", values[name], kind="counter")
+        lines += metrics.render_gauges("outbound_messages_per_second", values['messages_per_second'])
+        lines += metrics.render_gauges("outbound_queued_messages", {(('priority', priority),): count for priority, count in values['queued'].items()})
+        return lines
 
-# Function to start the simple HTTP server
-def start_server():
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"Serving HTTP on port {PORT}")
-        httpd.serve_forever()
+    def render_loop(self, values):
+        lines = metrics.render_histogram("event_loop_lag_seconds", {(): values['loop_lag_seconds']}, "How late the loop monitor's sampler woke.")
+        lines += metrics.render_gauges("event_loop_lag_max_seconds", values['loop_lag_max_seconds'])
+        lines += metrics.render_gauges(
+            "event_loop_slow_callbacks_total",
+            {(('callback', label),): count for label, count in values['slow_callbacks_total'].items()},
+            "Callbacks that blocked the loop past the threshold.",
+            kind="counter"
+        )
+        return lines
 
 if __name__ == "__main__":
-    try:
-        # Log environment variables to verify they are set
-        print(f"DISCORD_TOKEN: {os.getenv('DISCORD_TOKEN')}")
-        print(f"CONNECTION_STRING: {os.getenv('CONNECTION_STRING')}")
-
-        # Start the HTTP server in a separate thread
-        server_thread = threading.Thread(target=start_server)
-        server_thread.start()
-        
-        # Simulate Discord bot initialization (to be replaced with actual bot logic)
-        print("Starting Discord bot...")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "runBot.py"), run_name="__main__")
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Runs job handlers that do not need the gateway's client in a pool of worker processes, so
+their parsing, blocking Mongo calls and HTTP waits never hold up the gateway's heartbeat.
+Currently that is credential uploads only; everything that sends views stays in the gateway.
+Start it next to runBot.py with the same WORKER_ADDRESS:
+
+    WORKER_ADDRESS=127.0.0.1:8765 python worker.py
+    WORKER_ADDRESS=127.0.0.1:8765 python runBot.py
+"""
+import os
+import dotenv
+import Helpers.worker_pool as worker_pool
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    worker_pool.WorkerPool(
+        processes=int(os.getenv("WORKER_PROCESSES") or os.cpu_count() or 1),
+        concurrency=int(os.getenv("JOB_WORKERS", worker_pool.DEFAULT_CONCURRENCY)),
+        address=worker_pool.configured_address()
+    ).run()